@@ -0,0 +1,280 @@
+"""Harness overhead benchmarks for ALE-lite.
+
+Runs microbenchmarks of the hot paths and full ``Agent.run`` episodes against a local
+OpenAI-compatible stub server, then writes JSON results that can be compared between commits::
+
+    python benchmarks/harness_bench.py --out bench.json
+    python benchmarks/harness_bench.py --out new.json --compare bench.json --threshold 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(ROOT / "src"))
+
+from ale_lite.api.openai_client import OpenAIChatClient, OpenAIConfig, build_messages  # noqa: E402
+from ale_lite.api.stub_server import StubScript, StubServer  # noqa: E402
+from ale_lite.iflow.agent import Agent, AgentConfig  # noqa: E402
+from ale_lite.iflow.prompts import TaskSpec, system_prompt  # noqa: E402
+from ale_lite.iflow.trajectory import TrajectoryWriter  # noqa: E402
+from ale_lite.rock.local_sandbox import LocalSandbox  # noqa: E402
+from ale_lite.rock.sandbox import SandboxConfig  # noqa: E402
+from ale_lite.roll.datasets import collect_runs  # noqa: E402
+from ale_lite.roll.ipa import assign_rewards, chunk_trajectory  # noqa: E402
+
+Result = Dict[str, Any]
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _result(name: str, scale: int, timings: List[float], ops: int) -> Result:
+    median = statistics.median(timings)
+    return {
+        "name": name,
+        "scale": scale,
+        "repeat": len(timings),
+        "median_s": median,
+        "min_s": min(timings),
+        "ops_per_s": ops / median if median > 0 else float("inf"),
+    }
+
+
+def _synthetic_events(steps: int, output_chars: int = 400) -> List[Dict[str, Any]]:
+    events: List[Dict[str, Any]] = [
+        {"type": "config", "payload": {"model": {"model": "bench"}, "sandbox": {}, "agent": {}}}
+    ]
+    for step in range(steps):
+        text = f"step {step} <micro-step>inspect</micro-step> then run"
+        events.append({"type": "message", "payload": {"role": "assistant", "content": text}})
+        result = {
+            "stdout": "x" * output_chars,
+            "stderr": "",
+            "exit_code": 1 if step % 7 == 0 else 0,
+        }
+        events.append(
+            {
+                "type": "tool",
+                "payload": {"name": "terminal.exec", "arguments": {"cmd": "ls"}, "result": result},
+            }
+        )
+        events.append(
+            {"type": "message", "payload": {"role": "tool", "content": "x" * output_chars}}
+        )
+    events.append({"type": "outcome", "payload": {"score": 1.0, "success": True}})
+    return events
+
+
+def bench_build_messages(scale: int, repeat: int) -> Result:
+    memory = [
+        {"role": "assistant" if i % 2 else "tool", "content": f"message {i} " + "y" * 300}
+        for i in range(scale)
+    ]
+    timings = _measure(
+        lambda: build_messages(system_prompt(), "task", memory, max_tokens=8000), repeat
+    )
+    return _result("build_messages", scale, timings, 1)
+
+
+def bench_trajectory_log(scale: int, repeat: int, suffix: str = "") -> Result:
+    payload = {"name": "terminal.exec", "arguments": {"cmd": "ls"}, "result": {"stdout": "z" * 500}}
+
+    def run() -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = TrajectoryWriter(Path(tmp) / f"bench_trajectory.jsonl{suffix}")
+            for _ in range(scale):
+                writer.log("tool", payload)
+            writer.close()
+
+    name = "trajectory_log" + ("_zstd" if suffix else "")
+    return _result(name, scale, _measure(run, repeat), scale)
+
+
+def bench_run_command(scale: int, repeat: int) -> Result:
+    sandbox = LocalSandbox(SandboxConfig())
+    sandbox.create_workspace()
+
+    def run() -> None:
+        for _ in range(scale):
+            sandbox.run_command("true", timeout_s=10)
+
+    try:
+        return _result("local_run_command", scale, _measure(run, repeat), scale)
+    finally:
+        sandbox.teardown()
+
+
+def bench_chunk_trajectory(scale: int, repeat: int) -> Result:
+    events = _synthetic_events(scale)
+    timings = _measure(lambda: assign_rewards(chunk_trajectory(events), 1.0), repeat)
+    return _result("chunk_and_score", scale, timings, scale)
+
+
+def bench_roll_collect(scale: int, repeat: int) -> Result:
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = Path(tmp)
+        for index in range(scale):
+            writer = TrajectoryWriter(runs / f"task{index:05d}_trajectory.jsonl")
+            for event in _synthetic_events(20):
+                writer.log(event["type"], event["payload"])
+            writer.close()
+
+        def run() -> None:
+            for trajectory in collect_runs(runs):
+                assign_rewards(chunk_trajectory(trajectory.events), 1.0)
+
+        return _result("roll_collect_score", scale, _measure(run, repeat), scale)
+
+
+def bench_episode(steps: int, repeat: int, latency_s: float) -> Result:
+    turns = [
+        {
+            "content": f"step {i}",
+            "tool_calls": [
+                {
+                    "name": "filesystem.write",
+                    "arguments": {"path": f"f{i}.txt", "content": "x" * 200},
+                }
+            ],
+        }
+        for i in range(steps - 1)
+    ]
+    turns.append({"content": "SUCCESS", "tool_calls": []})
+    script = StubScript(turns=turns, latency_s=latency_s)
+    with StubServer(script) as server, tempfile.TemporaryDirectory() as tmp:
+        client = OpenAIChatClient(
+            OpenAIConfig(base_url=server.base_url, api_key="bench", model="bench")
+        )
+
+        executed: List[int] = []
+
+        def run() -> None:
+            sandbox = LocalSandbox(SandboxConfig())
+            sandbox.create_workspace()
+            path = Path(tmp) / f"episode_{time.perf_counter_ns()}_trajectory.jsonl"
+            agent = Agent(client, sandbox, TrajectoryWriter(path), AgentConfig(max_steps=steps))
+            outcome = agent.run(TaskSpec(goal="bench", evaluation="bench"))
+            sandbox.teardown()
+            if not outcome.success:
+                raise RuntimeError(f"benchmark episode ended {outcome.outcome}: {outcome.reason}")
+            executed.append(outcome.usage.llm_calls)
+
+        timings = _measure(run, repeat)
+    result = _result("agent_episode", steps, timings, steps)
+    result["latency_s"] = latency_s
+    result["steps_executed"] = statistics.median(executed)
+    result["overhead_per_step_s"] = result["median_s"] / result["steps_executed"] - latency_s
+    return result
+
+
+def _has_zstandard() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def run_suite(scales: List[int], repeat: int, latency_s: float) -> List[Result]:
+    results: List[Result] = []
+    for scale in scales:
+        results.append(bench_build_messages(scale, repeat))
+        results.append(bench_trajectory_log(scale, repeat))
+        if _has_zstandard():
+            results.append(bench_trajectory_log(scale, repeat, suffix=".zst"))
+        results.append(bench_chunk_trajectory(scale, repeat))
+        results.append(bench_run_command(min(scale, 50), repeat))
+        results.append(bench_roll_collect(max(1, scale // 10), repeat))
+        results.append(bench_episode(min(scale, 40), repeat, latency_s))
+    return results
+
+
+def _key(result: Result) -> str:
+    return f"{result['name']}@{result['scale']}"
+
+
+def compare(current: List[Result], baseline: List[Result], threshold: float) -> List[str]:
+    previous = {_key(result): result for result in baseline}
+    regressions = []
+    for result in current:
+        old = previous.get(_key(result))
+        if old is None or old["median_s"] <= 0:
+            continue
+        ratio = result["median_s"] / old["median_s"]
+        if ratio > 1 + threshold:
+            before, after = old["median_s"], result["median_s"]
+            regressions.append(f"{_key(result)}: {before:.6f}s -> {after:.6f}s (x{ratio:.2f})")
+    return regressions
+
+
+def _git_commit() -> str | None:
+    try:
+        process = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return process.stdout.strip() or None
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--scales", default="10,100,1000", help="Comma-separated problem sizes.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency-s", type=float, default=0.0, help="Stub LLM latency per call.")
+    parser.add_argument("--compare", type=Path, default=None, help="Baseline results JSON.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown ratio.")
+    args = parser.parse_args(argv)
+
+    scales = [int(value) for value in args.scales.split(",") if value.strip()]
+    results = run_suite(scales, args.repeat, args.latency_s)
+    payload = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "scales": scales,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    for result in results:
+        print(
+            f"{_key(result):32s} median={result['median_s']:.6f}s ops/s={result['ops_per_s']:.1f}"
+        )
+
+    if args.compare is None:
+        return 0
+    baseline = json.loads(args.compare.read_text(encoding="utf-8"))["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
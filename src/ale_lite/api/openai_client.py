@@ -5,7 +5,7 @@ import time
 import json
 import math
 from dataclasses import dataclass
-from typing import Any, Iterable, List, Optional, Tuple, Type
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Type, Union
 
 
 @dataclass(frozen=True)
@@ -16,6 +16,7 @@ class OpenAIConfig:
     temperature: float = 0.2
     max_tokens: int = 1024
     timeout_s: float = 120.0
+    seed: Optional[int] = None
 
 
 class OpenAIChatClient:
@@ -51,6 +52,9 @@ class OpenAIChatClient:
         backoff = 1.0
         for attempt in range(max_retries + 1):
             try:
+                extra: dict[str, Any] = {}
+                if self.config.seed is not None:
+                    extra["seed"] = self.config.seed
                 response = self.client.chat.completions.create(
                     model=self.config.model,
                     messages=messages,
@@ -59,6 +63,7 @@ class OpenAIChatClient:
                     timeout=self.config.timeout_s,
                     tools=tools,
                     tool_choice=tool_choice,
+                    **extra,
                 )
                 message = response.choices[0].message
                 tool_calls = [
@@ -75,6 +80,7 @@ class OpenAIChatClient:
                 return {
                     "content": message.content or "",
                     "tool_calls": tool_calls,
+                    "usage": extract_usage(response),
                     "raw": response,
                 }
             except self._retry_exceptions as exc:
@@ -84,6 +90,17 @@ class OpenAIChatClient:
                 backoff *= 2
 
 
+def extract_usage(response: Any) -> dict[str, int]:
+    usage = getattr(response, "usage", None)
+    prompt_tokens = int(getattr(usage, "prompt_tokens", 0) or 0)
+    completion_tokens = int(getattr(usage, "completion_tokens", 0) or 0)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": int(getattr(usage, "total_tokens", 0) or prompt_tokens + completion_tokens),
+    }
+
+
 def tool_schema() -> List[dict[str, Any]]:
     return [
         {
@@ -147,6 +164,10 @@ def tool_choice_auto() -> str:
     return "auto"
 
 
+def tool_choice_required() -> str:
+    return "required"
+
+
 def estimate_tokens(text: str) -> int:
     """Approximate token usage as len(text) / 4 for deterministic budgeting."""
     if not text:
@@ -186,14 +207,23 @@ def build_messages(
     memory: Iterable[dict[str, Any]],
     *,
     max_tokens: Optional[int] = None,
-    memory_summary: Optional[str] = None,
+    memory_summary: Optional[Union[str, Callable[[int], str]]] = None,
 ) -> List[dict[str, Any]]:
+    """System and user prompts, then as much recent memory as fits ``max_tokens``.
+
+    ``memory_summary`` may be a callable taking the number of omitted (oldest) memory messages,
+    such as ``WorkingMemory.summary_with``; its result is always included when non-empty, which
+    is how items already evicted from working memory stay visible.
+    """
     messages: List[dict[str, Any]] = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt},
     ]
     memory_list = list(memory)
     if max_tokens is None:
+        if callable(memory_summary) and (summary_text := memory_summary(0)):
+            summary_message = f"Working memory summary:\n{summary_text}"
+            messages.append({"role": "system", "content": summary_message})
         messages.extend(memory_list)
         return messages
 
@@ -212,8 +242,13 @@ def build_messages(
     selected.reverse()
 
     omitted_count = len(memory_list) - len(selected)
-    if omitted_count > 0:
+    if callable(memory_summary):
+        summary_text = memory_summary(omitted_count)
+    elif omitted_count > 0:
         summary_text = memory_summary or _summarize_messages(memory_list[:omitted_count])
+    else:
+        summary_text = ""
+    if summary_text:
         prefix = "Working memory summary:\n"
         summary_budget = remaining - estimate_tokens(prefix)
         summary_text = _truncate_to_budget(summary_text, summary_budget)
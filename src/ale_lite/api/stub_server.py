@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+from ale_lite.api.openai_client import estimate_tokens
+
+
+def _tool_call(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return {"name": name, "arguments": arguments}
+
+
+DEFAULT_SCRIPT: List[Dict[str, Any]] = [
+    {
+        "content": "Inspecting the workspace.",
+        "tool_calls": [_tool_call("filesystem.list", {"path": "."})],
+    },
+    {
+        "content": "Writing the fix.",
+        "tool_calls": [_tool_call("filesystem.write", {"path": "note.txt", "content": "fixed\n"})],
+    },
+    {"content": "Verifying.", "tool_calls": [_tool_call("terminal.exec", {"cmd": "cat note.txt"})]},
+    {"content": "SUCCESS", "tool_calls": []},
+]
+
+
+# Tool call ids carry the turn that issued them, so a conversation's position in the script
+# survives working-memory eviction and context trimming of its older assistant messages.
+_CALL_ID_RE = re.compile(r"^stub_(\d+)_\d+$")
+
+
+def _marked_turn(message: Dict[str, Any]) -> int | None:
+    for call in message.get("tool_calls") or []:
+        match = _CALL_ID_RE.match(str(call.get("id", "")))
+        if match:
+            return int(match.group(1))
+    return None
+
+
+@dataclass
+class StubScript:
+    """Scripted assistant turns, tracked per conversation from the request alone.
+
+    The next turn follows the latest assistant message whose tool call ids name its turn, plus
+    any assistant messages after it; without one, it is the number of assistant messages. No
+    server-side state is kept, so concurrent episodes sharing one server stay independent.
+    """
+
+    turns: List[Dict[str, Any]] = field(default_factory=lambda: list(DEFAULT_SCRIPT))
+    latency_s: float = 0.0
+    jitter_s: float = 0.0
+    ttft_s: float = 0.0
+    loop: bool = False
+
+    def turn_index(self, messages: List[Dict[str, Any]]) -> int:
+        later = 0
+        for message in reversed(messages):
+            if message.get("role") != "assistant":
+                continue
+            marked = _marked_turn(message)
+            if marked is not None:
+                return marked + 1 + later
+            later += 1
+        return later
+
+    def turn_for(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return self.turn_at(self.turn_index(messages))
+
+    def turn_at(self, index: int) -> Dict[str, Any]:
+        if self.loop:
+            return self.turns[index % len(self.turns)]
+        return self.turns[min(index, len(self.turns) - 1)]
+
+
+def completion_response(
+    turn: Dict[str, Any], model: str, prompt_tokens: int, turn_index: int = 0
+) -> Dict[str, Any]:
+    tool_calls = [
+        {
+            "id": f"stub_{turn_index}_{index}",
+            "type": "function",
+            "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])},
+        }
+        for index, call in enumerate(turn.get("tool_calls", []))
+    ]
+    content = str(turn.get("content", ""))
+    completion_tokens = estimate_tokens(content + json.dumps(tool_calls))
+    message: Dict[str, Any] = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def stream_chunks(response: Dict[str, Any], include_usage: bool = False) -> List[Dict[str, Any]]:
+    """Split a completion response into ``chat.completion.chunk`` deltas.
+
+    With ``include_usage`` a final chunk with no choices carries the usage, as OpenAI sends for
+    ``stream_options={"include_usage": true}``.
+    """
+    message = response["choices"][0]["message"]
+    base = {key: response[key] for key in ("id", "created", "model")}
+    base["object"] = "chat.completion.chunk"
+
+    def chunk(delta: Dict[str, Any], finish_reason: str | None = None) -> Dict[str, Any]:
+        return {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+    chunks = [chunk({"role": "assistant", "content": ""})]
+    content = message.get("content") or ""
+    for start in range(0, len(content), 16):
+        chunks.append(chunk({"content": content[start : start + 16]}))
+    for index, call in enumerate(message.get("tool_calls", [])):
+        chunks.append(chunk({"tool_calls": [{"index": index, **call}]}))
+    chunks.append(chunk({}, response["choices"][0]["finish_reason"]))
+    if include_usage:
+        chunks.append({**base, "choices": [], "usage": response["usage"]})
+    return chunks
+
+
+class StubServer:
+    """Local OpenAI-compatible ``/v1/chat/completions`` endpoint serving a :class:`StubScript`."""
+
+    def __init__(
+        self, script: StubScript | None = None, host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        self.script = script or StubScript()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode("ascii")
+        return f"http://{host}:{port}/v1"
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:  # noqa: N802 - http.server API
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._reply(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                with stub._lock:
+                    stub.requests += 1
+                messages = request.get("messages", [])
+                script = stub.script
+                delay = script.latency_s + random.uniform(0.0, script.jitter_s)
+                prompt_tokens = estimate_tokens(json.dumps(messages))
+                index = script.turn_index(messages)
+                response = completion_response(
+                    script.turn_at(index), str(request.get("model", "stub")), prompt_tokens, index
+                )
+                if request.get("stream"):
+                    include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+                    self._stream(
+                        response,
+                        include_usage,
+                        min(script.ttft_s, delay),
+                        max(0.0, delay - script.ttft_s),
+                    )
+                    return
+                if delay > 0:
+                    time.sleep(delay)
+                self._reply(200, response)
+
+            def _stream(
+                self, response: Dict[str, Any], include_usage: bool, ttft_s: float, rest_s: float
+            ) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                chunks = stream_chunks(response, include_usage)
+                if ttft_s > 0:
+                    time.sleep(ttft_s)
+                for position, item in enumerate(chunks):
+                    self.wfile.write(f"data: {json.dumps(item)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if position == 0 and rest_s > 0:
+                        time.sleep(rest_s)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return
+
+        return Handler
+
+    def start(self) -> StubServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> StubServer:
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
@@ -2,14 +2,38 @@ from __future__ import annotations
 
 import json
 import time
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Tuple
 
-from ale_lite.api.openai_client import OpenAIChatClient, build_messages, tool_choice_auto, tool_schema
+from ale_lite.api.openai_client import (
+    OpenAIChatClient,
+    build_messages,
+    tool_choice_auto,
+    tool_choice_required,
+    tool_schema,
+)
 from ale_lite.iflow.context import WorkingMemory
 from ale_lite.iflow.prompts import TaskSpec, system_prompt, task_prompt
-from ale_lite.iflow.tools import dispatch_tool_args
-from ale_lite.iflow.trajectory import TrajectoryWriter, config_event, message_event, tool_event
+from ale_lite.iflow.stall import (
+    DEFAULT_STALL_ACTIONS,
+    Stall,
+    StallDetector,
+    call_fingerprint,
+    nudge_message,
+    step_fingerprint,
+)
+from ale_lite.iflow.telemetry import record_usage, span
+from ale_lite.iflow.tools import MUTATING_TOOLS, dispatch_tool_args
+from ale_lite.iflow.trajectory import (
+    TrajectoryWriter,
+    checkpoint_event,
+    checkpoints_path,
+    config_event,
+    message_event,
+    stall_event,
+    tool_event,
+)
+from ale_lite.rock.checkpoint import CheckpointRecorder
 from ale_lite.rock.sandbox import Sandbox
 
 
@@ -21,6 +45,39 @@ class AgentConfig:
     time_limit_s: float = 600
     context_max_tokens: int = 8000
     memory_items: int = 20
+    memory_summary_tokens: int = 512
+    # Per-tool output budgets in tokens, overriding tools.TOOL_OUTPUT_TOKENS.
+    tool_output_tokens: Dict[str, int] = field(default_factory=dict)
+    checkpoint_every_steps: int = 0
+    checkpoint_on_mutation: bool = False
+    # Stall detection is opt-in: 0 disables; see iflow.stall.StallDetector.
+    stall_window: int = 0
+    stall_patience: int = 2
+    stall_actions: List[str] = field(default_factory=lambda: list(DEFAULT_STALL_ACTIONS))
+
+
+@dataclass
+class EpisodeUsage:
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_time_s: float = 0.0
+    tool_calls: int = 0
+    tool_time_s: float = 0.0
+    wasted_steps: int = 0
+
+    def add_llm(self, usage: Dict[str, int], duration_s: float) -> None:
+        self.llm_calls += 1
+        self.prompt_tokens += int(usage.get("prompt_tokens", 0))
+        self.completion_tokens += int(usage.get("completion_tokens", 0))
+        self.llm_time_s += duration_s
+
+    def add_tool(self, duration_s: float) -> None:
+        self.tool_calls += 1
+        self.tool_time_s += duration_s
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
 
 
 @dataclass
@@ -29,6 +86,7 @@ class AgentResult:
     reason: str
     outcome: str
     duration_s: float
+    usage: EpisodeUsage = field(default_factory=EpisodeUsage)
 
 
 class Agent:
@@ -43,7 +101,84 @@ class Agent:
         self.sandbox = sandbox
         self.trajectory = trajectory
         self.config = config
-        self.memory = WorkingMemory(max_items=config.memory_items)
+        self.memory = WorkingMemory(
+            max_items=config.memory_items, summary_max_tokens=config.memory_summary_tokens
+        )
+        self.checkpoints: CheckpointRecorder | None = None
+        if config.checkpoint_every_steps > 0 or config.checkpoint_on_mutation:
+            self.checkpoints = CheckpointRecorder(checkpoints_path(trajectory.path))
+        self._tool_index = 0
+        self._last_checkpoint: int | None = None
+        self.usage = EpisodeUsage()
+        self.stalls: StallDetector | None = None
+        if config.stall_window > 0:
+            self.stalls = StallDetector(
+                config.stall_window, config.stall_patience, config.stall_actions
+            )
+        self._excluded_tools: Tuple[str, ...] | None = None
+
+    def _checkpoint(self) -> None:
+        if self.checkpoints is None or self.sandbox.workspace is None:
+            return
+        if self._last_checkpoint == self._tool_index:
+            return
+        checkpoint = self.checkpoints.capture(self.sandbox.workspace, self._tool_index)
+        self._last_checkpoint = self._tool_index
+        self.trajectory.log(
+            "checkpoint",
+            checkpoint_event(
+                checkpoint.sequence,
+                checkpoint.tool_index,
+                checkpoint.archive,
+                checkpoint.changed,
+                checkpoint.deleted,
+            ),
+        )
+
+    def _tool_request(self) -> Tuple[List[Dict[str, Any]], str]:
+        tools = tool_schema()
+        if self._excluded_tools is None:
+            return tools, tool_choice_auto()
+        # Forced after a stall: a tool call is required, and not one of the repeated tools.
+        allowed = [tool for tool in tools if tool["function"]["name"] not in self._excluded_tools]
+        self._excluded_tools = None
+        return allowed or tools, tool_choice_required()
+
+    def _on_stall(self, stall: Stall) -> None:
+        self.trajectory.log(
+            "stall",
+            stall_event(
+                stall.step,
+                stall.action,
+                stall.description,
+                stall.repeated_steps,
+                self.usage.wasted_steps,
+            ),
+        )
+        if stall.action == "nudge":
+            content = nudge_message(stall)
+            self.memory.add({"role": "user", "content": content})
+            self.trajectory.log("message", message_event("user", content))
+        elif stall.action == "force_tool":
+            self._excluded_tools = stall.tools
+
+    def _observe_step(self, step: int, fingerprint: str, tools: List[str]) -> Stall | None:
+        if self.stalls is None:
+            return None
+        stall = self.stalls.observe(step, fingerprint, tools)
+        self.usage.wasted_steps = self.stalls.wasted_steps
+        if stall is not None:
+            self._on_stall(stall)
+        return stall
+
+    def _stalled(self, stall: Stall, start_time: float) -> AgentResult:
+        return AgentResult(
+            success=False,
+            reason=f"stalled: {stall.description}",
+            outcome="stalled",
+            duration_s=time.monotonic() - start_time,
+            usage=self.usage,
+        )
 
     def run(self, task: TaskSpec) -> AgentResult:
         start_time = time.monotonic()
@@ -64,10 +199,21 @@ class Agent:
                     "time_limit_s": self.config.time_limit_s,
                     "context_max_tokens": self.config.context_max_tokens,
                     "memory_items": self.config.memory_items,
+                    "memory_summary_tokens": self.config.memory_summary_tokens,
+                    "tool_output_tokens": dict(self.config.tool_output_tokens),
+                    "checkpoint_every_steps": self.config.checkpoint_every_steps,
+                    "checkpoint_on_mutation": self.config.checkpoint_on_mutation,
+                    "stall_window": self.config.stall_window,
+                    "stall_patience": self.config.stall_patience,
+                    "stall_actions": list(self.config.stall_actions),
                 },
             ),
         )
+        self._checkpoint()
         for step in range(self.config.max_steps):
+            every = self.config.checkpoint_every_steps
+            if every > 0 and step > 0 and step % every == 0:
+                self._checkpoint()
             if time.monotonic() > deadline:
                 duration = time.monotonic() - start_time
                 return AgentResult(
@@ -75,13 +221,16 @@ class Agent:
                     reason="timeout",
                     outcome="timeout",
                     duration_s=duration,
+                    usage=self.usage,
+                )
+            with span(self.trajectory, "agent.context", step=step):
+                messages = build_messages(
+                    system_prompt(),
+                    task_prompt(task),
+                    self.memory.to_messages(),
+                    max_tokens=self.config.context_max_tokens,
+                    memory_summary=self.memory.summary_with,
                 )
-            messages = build_messages(
-                system_prompt(),
-                task_prompt(task),
-                self.memory.to_messages(),
-                max_tokens=self.config.context_max_tokens,
-            )
             summary_message = next(
                 (
                     message["content"]
@@ -93,11 +242,18 @@ class Agent:
             )
             if summary_message:
                 self.trajectory.log("message", message_event("system", summary_message))
-            response = self.client.chat(
-                messages=messages,
-                tools=tool_schema(),
-                tool_choice=tool_choice_auto(),
-            )
+            llm_start = time.perf_counter()
+            tools, tool_choice = self._tool_request()
+            with span(self.trajectory, "agent.llm", step=step) as llm_span:
+                response = self.client.chat(
+                    messages=messages,
+                    tools=tools,
+                    tool_choice=tool_choice,
+                )
+                usage = response.get("usage") or {}
+                llm_span.update(usage)
+            self.usage.add_llm(usage, time.perf_counter() - llm_start)
+            record_usage(usage, self.client.config.model)
             assistant_text = response["content"]
             tool_calls = response["tool_calls"]
             self.memory.add({"role": "assistant", "content": assistant_text, "tool_calls": tool_calls})
@@ -111,9 +267,14 @@ class Agent:
                         reason="assistant reported success",
                         outcome="success",
                         duration_s=duration,
+                        usage=self.usage,
                     )
+                stall = self._observe_step(step, step_fingerprint([]), [])
+                if stall is not None and stall.action == "terminate":
+                    return self._stalled(stall, start_time)
                 continue
 
+            fingerprints: List[str] = []
             for tool_call in tool_calls:
                 if time.monotonic() > deadline:
                     duration = time.monotonic() - start_time
@@ -122,6 +283,7 @@ class Agent:
                         reason="timeout",
                         outcome="timeout",
                         duration_s=duration,
+                        usage=self.usage,
                     )
                 name = tool_call["function"]["name"]
                 args = tool_call["function"]["arguments"]
@@ -129,7 +291,12 @@ class Agent:
                 if name == "terminal.exec":
                     remaining = max(1.0, deadline - time.monotonic())
                     arguments["timeout_s"] = min(self.config.tool_timeout_s, remaining)
-                result = dispatch_tool_args(self.sandbox, name, arguments)
+                tool_start = time.perf_counter()
+                with span(self.trajectory, "agent.tool", step=step, tool=name):
+                    result = dispatch_tool_args(
+                        self.sandbox, name, arguments, self.config.tool_output_tokens
+                    )
+                self.usage.add_tool(time.perf_counter() - tool_start)
                 self.trajectory.log(
                     "tool",
                     tool_event(name, arguments, result.raw),
@@ -141,6 +308,15 @@ class Agent:
                 }
                 self.memory.add(tool_message)
                 self.trajectory.log("message", message_event("tool", result.output))
+                self._tool_index += 1
+                fingerprints.append(call_fingerprint(name, arguments, result.output))
+                if self.config.checkpoint_on_mutation and name in MUTATING_TOOLS:
+                    self._checkpoint()
+
+            names = [tool_call["function"]["name"] for tool_call in tool_calls]
+            stall = self._observe_step(step, step_fingerprint(fingerprints), names)
+            if stall is not None and stall.action == "terminate":
+                return self._stalled(stall, start_time)
 
         duration = time.monotonic() - start_time
         return AgentResult(
@@ -148,4 +324,5 @@ class Agent:
             reason="max steps reached",
             outcome="max_steps",
             duration_s=duration,
+            usage=self.usage,
         )
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+BLOB_KEY = "$blob"
+BLOB_DIR_NAME = "blobs"
+BLOB_SUFFIX = ".z"
+DEFAULT_BLOB_THRESHOLD = 4096
+
+
+def default_blob_dir(trajectory_path: Path) -> Path:
+    """Trajectories in one runs directory share a store, so rollouts dedupe payloads."""
+    return trajectory_path.parent / BLOB_DIR_NAME
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, dict) and BLOB_KEY in value
+
+
+@lru_cache(maxsize=32)
+def _read_blob(path: str) -> str:
+    # Blobs are immutable, so a decoded payload referenced many times is inflated once.
+    with open(path, "rb") as handle:
+        return zlib.decompress(handle.read()).decode("utf-8")
+
+
+@dataclass
+class BlobStore:
+    """Content-addressed store of zlib-compressed strings named by their SHA-256."""
+
+    root: Path
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}{BLOB_SUFFIX}"
+
+    def put(self, text: str) -> str:
+        return self.put_bytes(text.encode("utf-8"))
+
+    def put_bytes(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Episodes on other threads or processes may store the same payload concurrently, so
+            # each writes its own temp file; losing the rename to an identical blob is success.
+            fd, tmp = tempfile.mkstemp(prefix=f"{path.name}.", suffix=".tmp", dir=path.parent)
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(zlib.compress(data, 6))
+                os.replace(tmp, path)
+            except OSError:
+                if not path.exists():
+                    raise
+            finally:
+                Path(tmp).unlink(missing_ok=True)
+        return digest
+
+    def get(self, digest: str) -> str:
+        return _read_blob(str(self.path_for(digest)))
+
+    def externalize(self, value: Any, threshold: int, store_ref: str) -> Any:
+        """Copy of ``value`` with every string over ``threshold`` bytes replaced by a reference.
+
+        ``store_ref`` is the store's path relative to the trajectory, kept in each reference
+        so readers find a shared store without extra configuration.
+        """
+        if isinstance(value, str):
+            if len(value) * 4 <= threshold:
+                return value
+            data = value.encode("utf-8")
+            if len(data) <= threshold:
+                return value
+            return {BLOB_KEY: self.put_bytes(data), "bytes": len(data), "store": store_ref}
+        if isinstance(value, dict):
+            return {
+                key: self.externalize(item, threshold, store_ref) for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self.externalize(item, threshold, store_ref) for item in value]
+        return value
+
+
+def resolve_blobs(value: Any, base_dir: Path) -> Any:
+    """Replace blob references in ``value`` (relative to ``base_dir``) with their contents."""
+    if is_blob_ref(value):
+        store = BlobStore(base_dir / value.get("store", BLOB_DIR_NAME))
+        return store.get(value[BLOB_KEY])
+    if isinstance(value, dict):
+        return {key: resolve_blobs(item, base_dir) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_blobs(item, base_dir) for item in value]
+    return value
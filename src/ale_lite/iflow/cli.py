@@ -1,12 +1,28 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 
 import typer
 
-from ale_lite.iflow.replay import reexec_tools, replay, summarize
+from ale_lite.iflow.replay import (
+    ReplayDiff,
+    reexec_tools,
+    replay,
+    replay_steps,
+    restore_nearest_checkpoint,
+    sandbox_config_for,
+    summarize_trajectory,
+    tool_index_for_step,
+    verify_trajectories,
+)
+from ale_lite.iflow.trajectory import (
+    build_index,
+    convert_trajectory,
+    find_trajectories,
+    write_index,
+)
 from ale_lite.rock.factory import make_sandbox
-from ale_lite.rock.sandbox import SandboxConfig
 from ale_lite.tbp.runner import load_config, run_task
 from ale_lite.tbp.tasks import load_task
 
@@ -32,33 +48,37 @@ def replay_command(
     prefer_docker: bool = typer.Option(False, "--prefer-docker"),
     backend: str = typer.Option("auto", "--backend"),
     image: str | None = typer.Option(None, "--image"),
+    from_step: int | None = typer.Option(None, "--from-step", help="0-based step to start from."),
+    to_step: int | None = typer.Option(None, "--to-step", help="0-based step to stop before."),
 ) -> None:
-    events = replay(trajectory)
-    summary = summarize(events)
+    summary = summarize_trajectory(trajectory)
     typer.echo(f"steps: {summary.steps}")
     typer.echo(f"tool_calls: {summary.tool_calls}")
     typer.echo(f"outcome: {summary.outcome}")
 
+    if from_step is not None or to_step is not None:
+        for event in replay_steps(trajectory, from_step or 0, to_step):
+            typer.echo(json.dumps(event, sort_keys=True))
+
     if not reexec_tools_flag:
         return
 
+    events = replay(trajectory)
     sandbox_info = next(
         (event["payload"].get("sandbox", {}) for event in events if event["type"] == "config"),
         {},
     )
-    network_enabled = bool(sandbox_info.get("network_enabled", False))
-    sandbox_backend = backend
-    if sandbox_backend == "auto" and sandbox_info.get("type") in {"docker", "local"}:
-        sandbox_backend = sandbox_info["type"]
-    sandbox_config = SandboxConfig(
-        backend=sandbox_backend,
-        prefer_docker=prefer_docker or sandbox_info.get("type") == "docker",
-        image=image or sandbox_info.get("image"),
-        network_enabled=network_enabled,
+    sandbox_config = sandbox_config_for(
+        sandbox_info, backend=backend, prefer_docker=prefer_docker, image=image
     )
     sandbox = make_sandbox(sandbox_config)
     sandbox.create_workspace()
-    diffs = reexec_tools(events, sandbox)
+    start_tool = 0
+    if from_step is not None:
+        target = tool_index_for_step(events, from_step)
+        start_tool = restore_nearest_checkpoint(trajectory, events, sandbox, target)
+        typer.echo(f"reexec: resuming at tool call {start_tool}")
+    diffs = reexec_tools(events, sandbox, start_tool=start_tool)
     sandbox.teardown()
     if not diffs:
         typer.echo("reexec: no differences found")
@@ -68,3 +88,65 @@ def replay_command(
         typer.echo(f"- {diff.name}")
         for line in diff.differences:
             typer.echo(f"  {line}")
+
+
+@app.command("replay-all")
+def replay_all_command(
+    runs: Path = typer.Option(..., "--runs", exists=True, file_okay=False),
+    workers: int = typer.Option(4, "--workers", min=1),
+    report: Path | None = typer.Option(None, "--report", help="Write a JSON divergence report."),
+    stop_on_divergence: bool = typer.Option(False, "--stop-on-divergence"),
+    prefer_docker: bool = typer.Option(False, "--prefer-docker"),
+    backend: str = typer.Option("auto", "--backend"),
+    image: str | None = typer.Option(None, "--image"),
+) -> None:
+    paths = find_trajectories(runs)
+
+    def on_diff(path: Path, diff: ReplayDiff) -> None:
+        typer.echo(f"{path.name}: tool[{diff.tool_index}] {diff.name}")
+        for line in diff.differences:
+            typer.echo(f"  {line}")
+
+    results = verify_trajectories(
+        paths,
+        workers=workers,
+        backend=backend,
+        prefer_docker=prefer_docker,
+        image=image,
+        stop_on_divergence=stop_on_divergence,
+        on_diff=on_diff,
+    )
+    for result in results:
+        if result.error is not None:
+            typer.echo(f"{result.path.name}: error {result.error}")
+    diverged = sum(1 for result in results if result.diverged)
+    if report is not None:
+        report.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "runs": str(runs),
+            "trajectories": len(results),
+            "diverged": diverged,
+            "results": [result.to_dict() for result in results],
+        }
+        report.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    typer.echo(f"replayed {len(results)} trajectories, {diverged} diverged")
+    if diverged:
+        raise typer.Exit(code=1)
+
+
+@app.command("convert")
+def convert_command(
+    input_path: Path = typer.Option(..., "--in", exists=True, dir_okay=False),
+    out: Path = typer.Option(..., "--out"),
+) -> None:
+    count = convert_trajectory(input_path, out)
+    typer.echo(f"Wrote {count} events to {out}")
+
+
+@app.command("index")
+def index_command(
+    trajectory: Path = typer.Option(..., "--trajectory", exists=True, dir_okay=False),
+) -> None:
+    index = build_index(trajectory)
+    write_index(trajectory, index)
+    typer.echo(f"Indexed {len(index.offsets)} events")
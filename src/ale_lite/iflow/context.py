@@ -1,29 +1,101 @@
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Any, Iterable, List
+from itertools import islice
+from typing import Any, Deque, Iterable, List
+
+SUMMARY_LINE_CHARS = 200
+
+
+def summary_line(item: dict[str, Any]) -> str:
+    """One line per memory item; assistant tool calls are kept by name and arguments."""
+    role = item.get("role", "unknown")
+    content = " ".join(str(item.get("content") or "").split())
+    if role == "tool" and item.get("name"):
+        role = f"tool {item['name']}"
+    calls = []
+    for call in item.get("tool_calls") or []:
+        function = call.get("function", {})
+        calls.append(f"{function.get('name', '?')}({function.get('arguments') or ''})")
+    if calls:
+        content = f"{content} [calls: {'; '.join(calls)}]".lstrip()
+    if len(content) > SUMMARY_LINE_CHARS:
+        content = content[:SUMMARY_LINE_CHARS] + "..."
+    return f"{role}: {content}"
 
 
 @dataclass
 class WorkingMemory:
+    """Recent items verbatim plus a rolling summary of everything evicted.
+
+    Each item's summary line is computed once, when it is added; on eviction the line is folded
+    into ``summary``, whose oldest lines are dropped to stay within ``summary_max_tokens``.
+    """
+
     max_items: int
-    items: List[dict[str, Any]] = field(default_factory=list)
+    summary_max_tokens: int = 512
+    items: Deque[dict[str, Any]] = field(default_factory=deque)
+    evicted: int = 0
+    _lines: Deque[str] = field(default_factory=deque, init=False, repr=False)
+    _summary_lines: Deque[str] = field(default_factory=deque, init=False, repr=False)
+    _summary_chars: int = field(default=0, init=False, repr=False)
+    _summary: str | None = field(default="", init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        initial = list(self.items)
+        self.items = deque()
+        for item in initial:
+            self.add(item)
 
     def add(self, message: dict[str, Any]) -> None:
         self.items.append(message)
-        if len(self.items) > self.max_items:
-            self.items = self.items[-self.max_items :]
+        self._lines.append(summary_line(message))
+        while len(self.items) > self.max_items:
+            self.items.popleft()
+            self._fold(self._lines.popleft())
+
+    def _fold(self, line: str) -> None:
+        self.evicted += 1
+        max_chars = max(0, self.summary_max_tokens) * 4
+        if len(line) > max_chars:
+            line = line[:max_chars]
+        self._summary_lines.append(line)
+        self._summary_chars += len(line) + 1
+        while self._summary_chars > max_chars and self._summary_lines:
+            self._summary_chars -= len(self._summary_lines.popleft()) + 1
+        self._summary = None
+
+    @property
+    def summary(self) -> str:
+        """Rolling summary of evicted items; empty until something has been evicted."""
+        if self._summary is None:
+            dropped = self.evicted - len(self._summary_lines)
+            lines = list(self._summary_lines)
+            if dropped:
+                lines.insert(0, f"({dropped} earlier items omitted)")
+            self._summary = "\n".join(lines)
+        return self._summary
+
+    def summary_with(self, omitted: int) -> str:
+        """The rolling summary followed by the cached lines of the ``omitted`` oldest items.
+
+        Passed to ``build_messages`` as ``memory_summary`` so items that do not fit the context
+        budget are summarized without recomputing anything per step.
+        """
+        parts = [self.summary] if self.summary else []
+        parts.extend(islice(self._lines, max(0, omitted)))
+        return "\n".join(parts)
 
-    def summarize(self, items: Iterable[dict[str, Any]] | None = None, max_chars: int | None = None) -> str:
-        target_items = list(items) if items is not None else self.items
-        if not target_items:
+    def summarize(
+        self, items: Iterable[dict[str, Any]] | None = None, max_chars: int | None = None
+    ) -> str:
+        if items is None:
+            summary = self.summary_with(len(self.items))
+        else:
+            summary = "\n".join(summary_line(item) for item in items)
+        if not summary:
             return "No prior steps."
-        summary_lines = []
-        for item in target_items:
-            role = item.get("role", "unknown")
-            content = item.get("content", "")
-            summary_lines.append(f"{role}: {content[:200]}")
-        summary = "\n".join(summary_lines)
         if max_chars is not None and len(summary) > max_chars:
             return summary[:max_chars] + "...<truncated>"
         return summary
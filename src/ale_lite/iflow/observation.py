@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Tuple
+
+ANSI_RE = re.compile(r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])")
+_AMOUNT = r"(?:\d{1,3}(?:\.\d+)?%|\d+(?:\.\d+)?/\d+(?:\.\d+)?)"
+_BAR = r"[#=>█━▏▎▍▌▋▊▉]{3,}"
+PROGRESS_RE = re.compile(rf"{_AMOUNT}.*?{_BAR}|{_BAR}.*?{_AMOUNT}")
+_COLUMN_GAP_RE = re.compile(r"\S {2,}\S|\S\t\S")
+
+MIN_REPEATS = 3
+TABLE_MIN_ROWS = 12
+TABLE_HEAD_ROWS = 5
+TABLE_TAIL_ROWS = 3
+TAIL_SHARE = 0.6
+
+# (original 1-based line number, text); lines added by compaction carry None.
+Line = Tuple[Optional[int], str]
+
+
+def strip_ansi(text: str) -> str:
+    return ANSI_RE.sub("", text)
+
+
+def _resolve_carriage_returns(line: str) -> str:
+    # Terminals redraw progress output in place; only the final redraw is visible.
+    line = line.rstrip("\r")
+    return line.rsplit("\r", 1)[-1] if "\r" in line else line
+
+
+def _is_table_row(text: str) -> bool:
+    return text.count("|") >= 2 or len(_COLUMN_GAP_RE.findall(text)) >= 2
+
+
+def _line_span(lines: List[Line]) -> str:
+    numbers = [number for number, _ in lines if number is not None]
+    return f" (lines {min(numbers)}-{max(numbers)})" if numbers else ""
+
+
+def _collapse_progress(lines: List[Line]) -> List[Line]:
+    out: List[Line] = []
+    for line in lines:
+        if out and PROGRESS_RE.search(line[1]) and PROGRESS_RE.search(out[-1][1]):
+            out[-1] = line
+        else:
+            out.append(line)
+    return out
+
+
+def _collapse_repeats(lines: List[Line]) -> List[Line]:
+    out: List[Line] = []
+    index = 0
+    while index < len(lines):
+        end = index + 1
+        while end < len(lines) and lines[end][1] == lines[index][1]:
+            end += 1
+        if end - index >= MIN_REPEATS:
+            out.append(lines[index])
+            out.append((None, f"[previous line repeated {end - index - 1} more times]"))
+        else:
+            out.extend(lines[index:end])
+        index = end
+    return out
+
+
+def _summarize_tables(lines: List[Line]) -> List[Line]:
+    out: List[Line] = []
+    index = 0
+    while index < len(lines):
+        end = index
+        while end < len(lines) and _is_table_row(lines[end][1]):
+            end += 1
+        if end - index >= TABLE_MIN_ROWS:
+            out.extend(lines[index : index + TABLE_HEAD_ROWS])
+            hidden = lines[index + TABLE_HEAD_ROWS : end - TABLE_TAIL_ROWS]
+            span = _line_span(hidden)
+            out.append((None, f"[... {len(hidden)} table rows elided{span} ...]"))
+            out.extend(lines[end - TABLE_TAIL_ROWS : end])
+            index = end
+        else:
+            out.append(lines[index])
+            index += 1
+    return out
+
+
+def _clip_line(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    keep = max_chars // 2
+    return f"{text[:keep]}[... {len(text) - 2 * keep} chars elided ...]{text[-keep:]}"
+
+
+def _cost(lines: List[Line]) -> int:
+    return sum(len(text) + 1 for _, text in lines)
+
+
+def _head_and_tail(lines: List[Line], max_chars: int, total: int, fetch_hint: str) -> List[Line]:
+    tail_budget = int(max_chars * TAIL_SHARE)
+    head_budget = max_chars - tail_budget
+    head: List[Line] = []
+    used = 0
+    for line in lines:
+        if used + len(line[1]) + 1 > head_budget:
+            break
+        head.append(line)
+        used += len(line[1]) + 1
+    tail: List[Line] = []
+    used = 0
+    for line in reversed(lines[len(head) :]):
+        if used + len(line[1]) + 1 > tail_budget:
+            break
+        tail.append(line)
+        used += len(line[1]) + 1
+    tail.reverse()
+    elided = lines[len(head) : len(lines) - len(tail)]
+    numbers = [number for number, _ in elided if number is not None]
+    if numbers:
+        start, end = min(numbers), max(numbers)
+        hint = fetch_hint.format(start=start, end=end) if fetch_hint else ""
+        marker = f"[... lines {start}-{end} of {total} elided{hint} ...]"
+    else:
+        marker = f"[... {len(elided)} summary lines elided ...]"
+    return head + [(None, marker)] + tail
+
+
+def compact_observation(text: str, max_tokens: int, fetch_hint: str = "") -> Tuple[str, bool]:
+    """Fit a tool output into roughly ``max_tokens`` (``len / 4``) tokens.
+
+    ANSI codes and carriage-return redraws are always removed. Only outputs over budget are
+    compacted further: progress bars and repeated lines collapse, long tables keep their
+    header and last rows, over-long lines are clipped in the middle, and finally the head and
+    (larger) tail are kept around a marker naming the elided original line range.
+    ``fetch_hint`` is appended to that marker and may use ``{start}`` and ``{end}``.
+    Returns ``(output, truncated)``.
+    """
+    raw_lines = strip_ansi(text).split("\n")
+    lines: List[Line] = [
+        (number, _resolve_carriage_returns(line)) for number, line in enumerate(raw_lines, 1)
+    ]
+    cleaned = "\n".join(line for _, line in lines)
+    max_chars = max(1, max_tokens) * 4
+    if len(cleaned) <= max_chars:
+        return cleaned, False
+
+    lines = _collapse_progress(lines)
+    lines = _collapse_repeats(lines)
+    if _cost(lines) > max_chars:
+        lines = _summarize_tables(lines)
+    if _cost(lines) > max_chars:
+        line_chars = max(80, max_chars // 4)
+        lines = [(number, _clip_line(line, line_chars)) for number, line in lines]
+    if _cost(lines) > max_chars:
+        lines = _head_and_tail(lines, max_chars, len(raw_lines), fetch_hint)
+    return "\n".join(line for _, line in lines), True
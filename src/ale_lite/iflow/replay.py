@@ -1,13 +1,24 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+import queue
+import threading
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence
 
 from ale_lite.iflow.tools import dispatch_tool
-from ale_lite.iflow.trajectory import load_trajectory
-from ale_lite.rock.sandbox import Sandbox
+from ale_lite.iflow.trajectory import (
+    build_index,
+    checkpoints_path,
+    iter_trajectory,
+    load_index,
+    load_trajectory,
+    read_events,
+)
+from ale_lite.rock.checkpoint import Checkpoint, restore_checkpoints
+from ale_lite.rock.factory import make_sandbox
+from ale_lite.rock.sandbox import Sandbox, SandboxConfig
 
 
 @dataclass
@@ -21,6 +32,7 @@ class ReplaySummary:
 class ReplayDiff:
     name: str
     differences: List[str]
+    tool_index: int = -1
 
 
 def replay(path: Path) -> List[Dict[str, Any]]:
@@ -41,11 +53,44 @@ def summarize(events: Iterable[Dict[str, Any]]) -> ReplaySummary:
     return ReplaySummary(steps=steps, tool_calls=tool_calls, outcome=outcome)
 
 
-def reexec_tools(events: Iterable[Dict[str, Any]], sandbox: Sandbox) -> List[ReplayDiff]:
-    diffs: List[ReplayDiff] = []
+def summarize_trajectory(path: Path) -> ReplaySummary:
+    """Summarize from the sidecar index when it is valid, reading only the outcome event."""
+    index = load_index(path)
+    if index is None:
+        return summarize(load_trajectory(path))
+    outcome: Dict[str, Any] | None = None
+    if index.outcome_event is not None:
+        event = next(read_events(path, index, index.outcome_event, index.outcome_event + 1))
+        outcome = event["payload"]
+    return ReplaySummary(
+        steps=len(index.step_events),
+        tool_calls=index.counts.get("tool", 0),
+        outcome=outcome,
+    )
+
+
+def replay_steps(
+    path: Path, start_step: int, stop_step: int | None = None
+) -> Iterator[Dict[str, Any]]:
+    index = load_index(path)
+    if index is None:
+        index = build_index(path)
+    start, stop = index.step_range(start_step, stop_step)
+    return read_events(path, index, start, stop)
+
+
+def iter_reexec(
+    events: Iterable[Dict[str, Any]],
+    sandbox: Sandbox,
+    start_tool: int = 0,
+) -> Iterator[ReplayDiff]:
+    tool_index = -1
     for event in events:
         if event["type"] != "tool":
             continue
+        tool_index += 1
+        if tool_index < start_tool:
+            continue
         payload = event["payload"]
         name = payload.get("name", "")
         arguments = payload.get("arguments", {})
@@ -57,10 +102,165 @@ def reexec_tools(events: Iterable[Dict[str, Any]], sandbox: Sandbox) -> List[Rep
         except Exception as exc:  # pragma: no cover - defensive safety
             differences = [f"reexec error: {exc}"]
         if differences:
-            diffs.append(ReplayDiff(name=name, differences=differences))
+            yield ReplayDiff(name=name, differences=differences, tool_index=tool_index)
+
+
+def reexec_tools(
+    events: Iterable[Dict[str, Any]],
+    sandbox: Sandbox,
+    stop_on_divergence: bool = False,
+    start_tool: int = 0,
+) -> List[ReplayDiff]:
+    diffs: List[ReplayDiff] = []
+    for diff in iter_reexec(events, sandbox, start_tool=start_tool):
+        diffs.append(diff)
+        if stop_on_divergence:
+            break
     return diffs
 
 
+def tool_index_for_step(events: Iterable[Dict[str, Any]], step: int) -> int:
+    """Number of tool calls executed before assistant step ``step`` (0-based)."""
+    tool_calls = 0
+    steps = 0
+    for event in events:
+        if event["type"] == "message" and event["payload"].get("role") == "assistant":
+            if steps == step:
+                break
+            steps += 1
+        if event["type"] == "tool":
+            tool_calls += 1
+    return tool_calls
+
+
+def restore_nearest_checkpoint(
+    trajectory_path: Path,
+    events: Iterable[Dict[str, Any]],
+    sandbox: Sandbox,
+    tool_index: int,
+) -> int:
+    """Restore the latest checkpoint taken at or before ``tool_index``.
+
+    Returns the tool index re-execution should start from (0 when no checkpoint applies).
+    """
+    chain = [
+        Checkpoint(**event["payload"])
+        for event in events
+        if event["type"] == "checkpoint" and event["payload"]["tool_index"] <= tool_index
+    ]
+    if not chain or sandbox.workspace is None:
+        return 0
+    restore_checkpoints(checkpoints_path(trajectory_path), chain, sandbox.workspace)
+    return max(checkpoint.tool_index for checkpoint in chain)
+
+
+def sandbox_config_for(
+    sandbox_info: Dict[str, Any],
+    backend: str = "auto",
+    prefer_docker: bool = False,
+    image: str | None = None,
+) -> SandboxConfig:
+    sandbox_backend = backend
+    if sandbox_backend == "auto" and sandbox_info.get("type") in {"docker", "local"}:
+        sandbox_backend = sandbox_info["type"]
+    return SandboxConfig(
+        backend=sandbox_backend,
+        prefer_docker=prefer_docker or sandbox_info.get("type") == "docker",
+        image=image or sandbox_info.get("image"),
+        network_enabled=bool(sandbox_info.get("network_enabled", False)),
+    )
+
+
+@dataclass
+class VerificationResult:
+    path: Path
+    diffs: List[ReplayDiff] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def diverged(self) -> bool:
+        return bool(self.diffs) or self.error is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "diverged": self.diverged,
+            "error": self.error,
+            "diffs": [asdict(diff) for diff in self.diffs],
+        }
+
+
+def verify_trajectories(
+    paths: Sequence[Path],
+    workers: int = 1,
+    backend: str = "auto",
+    prefer_docker: bool = False,
+    image: str | None = None,
+    stop_on_divergence: bool = False,
+    on_diff: Callable[[Path, ReplayDiff], None] | None = None,
+    sandbox_factory: Callable[[SandboxConfig], Sandbox] = make_sandbox,
+) -> List[VerificationResult]:
+    """Re-execute tool calls of many trajectories, one reusable sandbox per worker thread.
+
+    ``on_diff`` is called (serialized) as soon as each divergence is found. Results keep the
+    order of ``paths``.
+    """
+    pending: "queue.Queue[int]" = queue.Queue()
+    for position in range(len(paths)):
+        pending.put(position)
+    results: List[VerificationResult | None] = [None] * len(paths)
+    report_lock = threading.Lock()
+
+    def verify_one(path: Path, sandbox: Sandbox) -> VerificationResult:
+        verification = VerificationResult(path=path)
+        for diff in iter_reexec(iter_trajectory(path), sandbox):
+            verification.diffs.append(diff)
+            if on_diff is not None:
+                with report_lock:
+                    on_diff(path, diff)
+            if stop_on_divergence:
+                break
+        return verification
+
+    def worker() -> None:
+        sandbox: Sandbox | None = None
+        sandbox_config: SandboxConfig | None = None
+        while True:
+            try:
+                position = pending.get_nowait()
+            except queue.Empty:
+                return
+            path = paths[position]
+            try:
+                config = sandbox_config_for(
+                    _sandbox_info(path), backend=backend, prefer_docker=prefer_docker, image=image
+                )
+                if sandbox is None or config != sandbox_config:
+                    sandbox = sandbox_factory(config)
+                    sandbox_config = config
+                sandbox.create_workspace()
+                try:
+                    results[position] = verify_one(path, sandbox)
+                finally:
+                    sandbox.teardown()
+            except Exception as exc:
+                results[position] = VerificationResult(path=path, error=str(exc))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [result for result in results if result is not None]
+
+
+def _sandbox_info(path: Path) -> Dict[str, Any]:
+    for event in iter_trajectory(path):
+        if event["type"] == "config":
+            return dict(event["payload"].get("sandbox", {}))
+    return {}
+
+
 def _compare_dicts(expected: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
     diffs: List[str] = []
     keys = set(expected.keys()) | set(actual.keys())
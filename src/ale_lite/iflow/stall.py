@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Sequence, Tuple
+
+STALL_ACTIONS = ("nudge", "force_tool", "terminate")
+# Ending episodes changes run outcomes, so ``terminate`` is opt-in.
+DEFAULT_STALL_ACTIONS = ("nudge", "force_tool")
+REPLY_FINGERPRINT = "reply"
+# Injected by the agent from its own deadline, so it never distinguishes two calls.
+_VOLATILE_ARGUMENTS = frozenset({"timeout_s"})
+
+
+def call_fingerprint(name: str, arguments: Dict[str, Any], output: str) -> str:
+    """Hash of (tool name, arguments, output) for one tool call."""
+    stable = {key: value for key, value in arguments.items() if key not in _VOLATILE_ARGUMENTS}
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(name.encode("utf-8"))
+    digest.update(b"\0" + json.dumps(stable, sort_keys=True, default=str).encode("utf-8"))
+    digest.update(b"\0" + output.encode("utf-8", "replace"))
+    return digest.hexdigest()
+
+
+def step_fingerprint(calls: Sequence[str]) -> str:
+    return "|".join(calls) if calls else REPLY_FINGERPRINT
+
+
+@dataclass
+class Stall:
+    step: int
+    action: str
+    repeated_steps: int
+    tools: Tuple[str, ...]
+
+    @property
+    def description(self) -> str:
+        if not self.tools:
+            return f"the last {self.repeated_steps} replies made no tool calls"
+        names = ", ".join(self.tools)
+        return f"the last {self.repeated_steps} steps repeated earlier {names} calls and outputs"
+
+
+class StallDetector:
+    """Flags no-progress cycles from per-step fingerprints over a sliding window.
+
+    A step is novel when its fingerprint is not among the last ``window`` steps; replies
+    without tool calls all share one fingerprint. ``patience`` consecutive non-novel steps
+    are a stall, answered with the next of ``actions`` (the last one repeats); a novel step
+    resets both the streak and the escalation. Every non-novel step counts as wasted.
+    """
+
+    def __init__(
+        self, window: int = 8, patience: int = 2, actions: Sequence[str] = DEFAULT_STALL_ACTIONS
+    ) -> None:
+        unknown = [action for action in actions if action not in STALL_ACTIONS]
+        if unknown or not actions:
+            raise ValueError(f"Unsupported stall actions: {list(actions)}")
+        self.patience = max(1, patience)
+        self.actions = tuple(actions)
+        self.recent: Deque[str] = deque(maxlen=max(1, window))
+        self.streak = 0
+        self.escalation = 0
+        self.wasted_steps = 0
+
+    def observe(self, step: int, fingerprint: str, tools: Sequence[str] = ()) -> Stall | None:
+        novel = fingerprint not in self.recent
+        self.recent.append(fingerprint)
+        if novel:
+            self.streak = 0
+            self.escalation = 0
+            return None
+        self.streak += 1
+        self.wasted_steps += 1
+        if self.streak < self.patience:
+            return None
+        action = self.actions[min(self.escalation, len(self.actions) - 1)]
+        stall = Stall(step, action, self.streak, tuple(dict.fromkeys(tools)))
+        self.escalation += 1
+        self.streak = 0
+        return stall
+
+
+def nudge_message(stall: Stall) -> str:
+    return (
+        f"You appear to be stuck: {stall.description}, without progress. "
+        "Do not repeat them. Try a different approach, inspect something you have not looked "
+        "at yet, or reply SUCCESS if the task is already complete."
+    )
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from ale_lite.iflow.trajectory import TrajectoryWriter
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300,
+)
+SPAN_METRIC = "ale_lite_span_seconds"
+TOKENS_METRIC = "ale_lite_tokens_total"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class Histogram:
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    counts: List[int] = field(default_factory=list)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[position] += 1
+
+
+class MetricsRegistry:
+    """Thread-safe counters and cumulative histograms, exportable as Prometheus text or JSON."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(buckets=self.buckets)
+            series[key].observe(value)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "counters": {
+                    name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "histograms": {
+                    name: [
+                        {
+                            "labels": dict(key),
+                            "buckets": list(hist.buckets),
+                            "counts": list(hist.counts),
+                            "sum": hist.total,
+                            "count": hist.count,
+                        }
+                        for key, hist in series.items()
+                    ]
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, counters in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(counters.items()):
+                    lines.append(f"{name}{_labels(key)} {value}")
+            for name, histograms in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in sorted(histograms.items()):
+                    for bound, count in zip(hist.buckets, hist.counts, strict=True):
+                        lines.append(f"{name}_bucket{_labels(key, le=str(bound))} {count}")
+                    lines.append(f"{name}_bucket{_labels(key, le='+Inf')} {hist.count}")
+                    lines.append(f"{name}_sum{_labels(key)} {hist.total}")
+                    lines.append(f"{name}_count{_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(key: LabelKey, **extra: str) -> str:
+    items = list(key) + sorted(extra.items())
+    if not items:
+        return ""
+    rendered = ",".join(f'{name}="{_escape_label(value)}"' for name, value in items)
+    return "{" + rendered + "}"
+
+
+def _escape_label(value: str) -> str:
+    # Label values escape backslash, double quote and newline in the text exposition format.
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = MetricsRegistry()
+
+
+def span_event(name: str, duration_s: float, attributes: Dict[str, Any]) -> Dict[str, Any]:
+    return {"name": name, "duration_s": duration_s, "attributes": attributes}
+
+
+@contextmanager
+def span(
+    trajectory: TrajectoryWriter | None,
+    name: str,
+    registry: MetricsRegistry | None = None,
+    **attributes: Any,
+) -> Iterator[Dict[str, Any]]:
+    """Time a phase; the yielded dict may be filled with extra attributes (e.g. token usage)."""
+    target = registry or METRICS
+    start = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        duration = time.perf_counter() - start
+        target.observe(SPAN_METRIC, duration, span=name)
+        if trajectory is not None:
+            trajectory.log("span", span_event(name, duration, attributes))
+
+
+def record_usage(
+    usage: Dict[str, int],
+    model: str,
+    registry: MetricsRegistry | None = None,
+) -> None:
+    target = registry or METRICS
+    for kind in ("prompt", "completion"):
+        tokens = usage.get(f"{kind}_tokens", 0)
+        if tokens:
+            target.inc(TOKENS_METRIC, float(tokens), kind=kind, model=model)
+
+
+def serve_prometheus(
+    port: int,
+    host: str = "127.0.0.1",
+    registry: MetricsRegistry | None = None,
+) -> ThreadingHTTPServer:
+    target = registry or METRICS
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server API
+            body = target.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class JsonSnapshotExporter:
+    def __init__(
+        self,
+        path: Path,
+        interval_s: float = 10.0,
+        registry: MetricsRegistry | None = None,
+    ) -> None:
+        self.path = path
+        self.interval_s = interval_s
+        self.registry = registry or METRICS
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        snapshot = json.dumps(self.registry.snapshot(), indent=2, sort_keys=True)
+        tmp.write_text(snapshot, encoding="utf-8")
+        tmp.replace(self.path)
+
+    def start(self) -> None:
+        def loop() -> None:
+            while not self._stop.wait(self.interval_s):
+                self.write()
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import json
+import shlex
 from dataclasses import dataclass
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, Mapping
 
+from ale_lite.iflow.observation import compact_observation
 from ale_lite.rock.sandbox import Sandbox
 
 
@@ -16,25 +18,28 @@ class ToolResult:
     raw: Dict[str, Any]
 
 
-MAX_OUTPUT_CHARS = 2000
-
-
-def _truncate(text: str) -> tuple[str, bool]:
-    if len(text) <= MAX_OUTPUT_CHARS:
-        return text, False
-    return text[:MAX_OUTPUT_CHARS] + "...<truncated>", True
+DEFAULT_OUTPUT_TOKENS = 500
+TOOL_OUTPUT_TOKENS: dict[str, int] = {
+    "terminal.exec": 750,
+    "filesystem.read": 1000,
+    "filesystem.list": 250,
+}
+# How the model can see what compaction elided, in original line numbers.
+FETCH_HINTS: dict[str, str] = {
+    "terminal.exec": "; re-run piped through `sed -n '{start},{end}p'` to see them",
+    "filesystem.read": "; run `sed -n '{start},{end}p' {path}` to see them",
+}
 
 
 def terminal_exec(sandbox: Sandbox, args: dict[str, Any]) -> ToolResult:
     cmd = args.get("cmd", "")
     timeout_s = float(args.get("timeout_s", 60))
     result = sandbox.run_command(cmd, timeout_s=timeout_s)
-    output, truncated = _truncate(result["stdout"] + result["stderr"])
     return ToolResult(
         name="terminal.exec",
-        output=output,
+        output=str(result["stdout"]) + str(result["stderr"]),
         success=result["exit_code"] == 0,
-        truncated=truncated,
+        truncated=False,
         raw=result,
     )
 
@@ -42,12 +47,11 @@ def terminal_exec(sandbox: Sandbox, args: dict[str, Any]) -> ToolResult:
 def filesystem_read(sandbox: Sandbox, args: dict[str, Any]) -> ToolResult:
     path = args.get("path", "")
     content = sandbox.read_file(path)
-    output, truncated = _truncate(content)
     return ToolResult(
         name="filesystem.read",
-        output=output,
+        output=content,
         success=True,
-        truncated=truncated,
+        truncated=False,
         raw={"path": path, "content": content},
     )
 
@@ -68,17 +72,18 @@ def filesystem_write(sandbox: Sandbox, args: dict[str, Any]) -> ToolResult:
 def filesystem_list(sandbox: Sandbox, args: dict[str, Any]) -> ToolResult:
     path = args.get("path", ".")
     entries = sandbox.list_dir(path)
-    output = "\n".join(entries)
-    output, truncated = _truncate(output)
     return ToolResult(
         name="filesystem.list",
-        output=output,
+        output="\n".join(entries),
         success=True,
-        truncated=truncated,
+        truncated=False,
         raw={"path": path, "entries": entries},
     )
 
 
+MUTATING_TOOLS = frozenset({"terminal.exec", "filesystem.write"})
+
+
 ToolHandler = Callable[[Sandbox, dict[str, Any]], ToolResult]
 
 
@@ -90,9 +95,30 @@ TOOL_REGISTRY: dict[str, ToolHandler] = {
 }
 
 
-def dispatch_tool_args(sandbox: Sandbox, name: str, arguments: dict[str, Any]) -> ToolResult:
+def output_budget(name: str, overrides: Mapping[str, int] | None = None) -> int:
+    if overrides and name in overrides:
+        return int(overrides[name])
+    return TOOL_OUTPUT_TOKENS.get(name, DEFAULT_OUTPUT_TOKENS)
+
+
+def dispatch_tool_args(
+    sandbox: Sandbox,
+    name: str,
+    arguments: dict[str, Any],
+    output_tokens: Mapping[str, int] | None = None,
+) -> ToolResult:
+    """Run a tool and compact its output to the tool's token budget.
+
+    ``output_tokens`` overrides ``TOOL_OUTPUT_TOKENS`` per tool name; ``raw`` stays complete.
+    """
     handler = TOOL_REGISTRY[name]
-    return handler(sandbox, arguments)
+    result = handler(sandbox, arguments)
+    path = shlex.quote(str(arguments.get("path", ""))).replace("{", "{{").replace("}", "}}")
+    hint = FETCH_HINTS.get(name, "").replace("{path}", path)
+    result.output, result.truncated = compact_observation(
+        result.output, output_budget(name, output_tokens), hint
+    )
+    return result
 
 
 def dispatch_tool(sandbox: Sandbox, name: str, arguments_json: str) -> ToolResult:
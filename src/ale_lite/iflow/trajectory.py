@@ -1,21 +1,167 @@
 from __future__ import annotations
 
+import io
 import json
+import os
 import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List
+
+from ale_lite.iflow.blobs import DEFAULT_BLOB_THRESHOLD, BlobStore, default_blob_dir, resolve_blobs
 
 SCHEMA_VERSION = "1.0"
 
+TRAJECTORY_SUFFIX = "_trajectory.jsonl"
+COMPRESSED_SUFFIX = ".zst"
+TRAJECTORY_FORMATS = {"jsonl": "", "zstd": COMPRESSED_SUFFIX}
+ZSTD_BLOCK_EVENTS = 64
+INDEX_SUFFIX = ".idx.json"
+ROLLOUT_SEPARATOR = ".rollout"
+
+
+def _require_zstandard() -> Any:
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError(
+            "Compressed trajectories require optional dependencies. "
+            "Install with: pip install -e .[zstd]"
+        ) from exc
+    return zstandard
+
+
+def is_compressed(path: Path) -> bool:
+    return path.name.endswith(COMPRESSED_SUFFIX)
+
+
+def trajectory_filename(name: str, fmt: str = "jsonl") -> str:
+    if fmt not in TRAJECTORY_FORMATS:
+        raise ValueError(f"Unsupported trajectory format: {fmt}")
+    return f"{name}{TRAJECTORY_SUFFIX}{TRAJECTORY_FORMATS[fmt]}"
+
+
+def trajectory_name(path: Path) -> str:
+    name = path.name
+    if is_compressed(path):
+        name = name[: -len(COMPRESSED_SUFFIX)]
+    return name.replace(TRAJECTORY_SUFFIX, "")
+
+
+def rollout_name(name: str, index: int) -> str:
+    return f"{name}{ROLLOUT_SEPARATOR}{index}"
+
+
+def split_rollout(name: str) -> tuple[str, int | None]:
+    """``"task.rollout3"`` -> ``("task", 3)``; names without a rollout suffix give ``None``."""
+    base, separator, index = name.rpartition(ROLLOUT_SEPARATOR)
+    if not separator or not base or not index.isdigit():
+        return name, None
+    return base, int(index)
+
+
+def checkpoints_path(path: Path) -> Path:
+    return path.with_name(f"{trajectory_name(path)}_checkpoints")
+
+
+def find_trajectories(runs_dir: Path) -> List[Path]:
+    paths = list(runs_dir.glob(f"*{TRAJECTORY_SUFFIX}"))
+    paths.extend(runs_dir.glob(f"*{TRAJECTORY_SUFFIX}{COMPRESSED_SUFFIX}"))
+    return sorted(paths)
+
+
+@dataclass
+class TrajectoryIndex:
+    """Sidecar index: ``offsets[i]`` is the byte offset of the line (or zstd frame) holding
+    event ``i`` and ``positions[i]`` its ordinal inside that frame."""
+
+    size: int = 0
+    offsets: List[int] = field(default_factory=list)
+    positions: List[int] = field(default_factory=list)
+    counts: Dict[str, int] = field(default_factory=dict)
+    step_events: List[int] = field(default_factory=list)
+    outcome_event: int | None = None
+
+    def add(self, event: Dict[str, Any], offset: int, position: int = 0) -> None:
+        event_index = len(self.offsets)
+        self.offsets.append(offset)
+        self.positions.append(position)
+        event_type = str(event.get("type", ""))
+        self.counts[event_type] = self.counts.get(event_type, 0) + 1
+        if event_type == "message" and event.get("payload", {}).get("role") == "assistant":
+            self.step_events.append(event_index)
+        if event_type == "outcome":
+            self.outcome_event = event_index
+
+    @property
+    def outcome_offset(self) -> int | None:
+        if self.outcome_event is None:
+            return None
+        return self.offsets[self.outcome_event]
+
+    def step_range(self, start_step: int, stop_step: int | None = None) -> tuple[int, int]:
+        end = len(self.offsets)
+        if start_step >= len(self.step_events):
+            return end, end
+        start = self.step_events[start_step]
+        if stop_step is None or stop_step >= len(self.step_events):
+            return start, end
+        # A stop before the start is an empty range, never an inverted one.
+        return start, max(start, self.step_events[stop_step])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "size": self.size,
+            "offsets": self.offsets,
+            "positions": self.positions,
+            "counts": self.counts,
+            "step_events": self.step_events,
+            "outcome_event": self.outcome_event,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrajectoryIndex":
+        return cls(
+            size=int(data["size"]),
+            offsets=list(data["offsets"]),
+            positions=list(data["positions"]),
+            counts=dict(data["counts"]),
+            step_events=list(data["step_events"]),
+            outcome_event=data.get("outcome_event"),
+        )
+
 
 @dataclass
 class TrajectoryWriter:
+    """Paths ending in ``.zst`` are written as zstd frames of up to ``block_events`` events,
+    each led by a versioned block header. Buffered events and the sidecar index are flushed
+    on ``outcome`` and ``close``.
+
+    Strings over ``blob_threshold`` bytes in tool events (outputs, file contents) are moved to
+    a content-addressed :class:`BlobStore` (``blobs/`` next to the trajectory unless
+    ``blob_dir`` is given) and replaced by references; ``0`` keeps everything inline."""
+
     path: Path
     events: List[Dict[str, Any]] = field(default_factory=list)
+    block_events: int = ZSTD_BLOCK_EVENTS
+    blob_threshold: int = DEFAULT_BLOB_THRESHOLD
+    blob_dir: Path | None = None
+    index: TrajectoryIndex = field(init=False, repr=False)
+    _pending: List[tuple[Dict[str, Any], str]] = field(default_factory=list, init=False, repr=False)
+    _blobs: BlobStore = field(init=False, repr=False)
+    _blob_ref: str = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.index = build_index(self.path) if self.path.exists() else TrajectoryIndex()
+        blob_dir = self.blob_dir or default_blob_dir(self.path)
+        self._blobs = BlobStore(blob_dir)
+        self._blob_ref = os.path.relpath(blob_dir, self.path.parent)
+
+    @property
+    def compressed(self) -> bool:
+        return is_compressed(self.path)
 
     def log(self, event_type: str, payload: Dict[str, Any]) -> None:
         event = {
@@ -25,22 +171,187 @@ class TrajectoryWriter:
             "payload": payload,
         }
         self.events.append(event)
-        with self.path.open("a", encoding="utf-8") as handle:
-            handle.write(json.dumps(event, sort_keys=True) + "\n")
+        self._write(event)
+
+    def append(self, event: Dict[str, Any]) -> None:
+        """Write an already-built event, e.g. when converting between formats."""
+        self._write(event)
+
+    def _write(self, event: Dict[str, Any]) -> None:
+        if event["type"] == "tool" and self.blob_threshold > 0:
+            payload = self._blobs.externalize(event["payload"], self.blob_threshold, self._blob_ref)
+            event = {**event, "payload": payload}
+        line = json.dumps(event, sort_keys=True)
+        if self.compressed:
+            self._pending.append((event, line))
+            if len(self._pending) >= self.block_events or event["type"] == "outcome":
+                self.flush()
+            return
+        data = (line + "\n").encode("utf-8")
+        with self.path.open("ab") as handle:
+            handle.write(data)
             handle.flush()
+        self.index.add(event, self.index.size)
+        self.index.size += len(data)
+        if event["type"] == "outcome":
+            write_index(self.path, self.index)
+
+    def flush(self) -> None:
+        if not self._pending:
+            if not self.compressed:
+                write_index(self.path, self.index)
+            return
+        offset = self.index.size
+        self.index.size += _append_block(self.path, [line for _, line in self._pending])
+        for position, (event, _) in enumerate(self._pending):
+            self.index.add(event, offset, position)
+        self._pending.clear()
+        write_index(self.path, self.index)
+
+    def close(self) -> None:
+        self.flush()
 
     def to_list(self) -> List[Dict[str, Any]]:
         return list(self.events)
 
 
-def load_trajectory(path: Path) -> List[Dict[str, Any]]:
-    events: List[Dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as handle:
-        for line in handle:
-            if not line.strip():
-                continue
-            events.append(json.loads(line))
-    return events
+def _block_header(count: int) -> str:
+    return json.dumps({"block": {"count": count, "schema_version": SCHEMA_VERSION}}, sort_keys=True)
+
+
+def _append_block(path: Path, lines: List[str]) -> int:
+    zstandard = _require_zstandard()
+    body = "\n".join([_block_header(len(lines)), *lines]) + "\n"
+    frame = zstandard.ZstdCompressor(level=3).compress(body.encode("utf-8"))
+    with path.open("ab") as handle:
+        handle.write(frame)
+        handle.flush()
+    return len(frame)
+
+
+def _iter_lines(path: Path, offset: int = 0) -> Iterator[str]:
+    if not is_compressed(path):
+        with path.open("rb") as raw:
+            raw.seek(offset)
+            yield from io.TextIOWrapper(raw, encoding="utf-8")
+        return
+    zstandard = _require_zstandard()
+    with path.open("rb") as raw:
+        raw.seek(offset)
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        yield from io.TextIOWrapper(reader, encoding="utf-8")
+
+
+def _iter_records(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if "block" in record and "type" not in record:
+            version = str(record["block"].get("schema_version", ""))
+            if version.split(".")[0] != SCHEMA_VERSION.split(".")[0]:
+                raise ValueError(f"Unsupported trajectory block schema: {version}")
+            continue
+        yield record
+
+
+def _resolve_events(
+    events: Iterator[Dict[str, Any]], path: Path
+) -> Iterator[Dict[str, Any]]:
+    # Blob references are only ever written into tool events; they are inflated as each
+    # event is reached, so readers that stop early never touch the store.
+    for event in events:
+        if event.get("type") == "tool":
+            event["payload"] = resolve_blobs(event["payload"], path.parent)
+        yield event
+
+
+def iter_trajectory(path: Path, resolve: bool = True) -> Iterator[Dict[str, Any]]:
+    """Stream events; with ``resolve=False`` blob references are left in place."""
+    events = _iter_records(_iter_lines(path))
+    return _resolve_events(events, path) if resolve else events
+
+
+def load_trajectory(path: Path, resolve: bool = True) -> List[Dict[str, Any]]:
+    return list(iter_trajectory(path, resolve=resolve))
+
+
+def index_path(path: Path) -> Path:
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def write_index(path: Path, index: TrajectoryIndex) -> None:
+    target = index_path(path)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_text(json.dumps(index.to_dict(), sort_keys=True), encoding="utf-8")
+    tmp.replace(target)
+
+
+def load_index(path: Path) -> TrajectoryIndex | None:
+    """Return the sidecar index, or ``None`` if it is missing or stale for ``path``."""
+    target = index_path(path)
+    if not target.exists() or not path.exists():
+        return None
+    index = TrajectoryIndex.from_dict(json.loads(target.read_text(encoding="utf-8")))
+    if index.size != path.stat().st_size:
+        return None
+    return index
+
+
+def build_index(path: Path) -> TrajectoryIndex:
+    index = TrajectoryIndex()
+    if is_compressed(path):
+        zstandard = _require_zstandard()
+        data = path.read_bytes()
+        offset = 0
+        while offset < len(data):
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+            body = decompressor.decompress(data[offset:])
+            lines = body.decode("utf-8").splitlines()
+            for position, event in enumerate(_iter_records(lines)):
+                index.add(event, offset, position)
+            offset = len(data) - len(decompressor.unused_data)
+        index.size = len(data)
+        return index
+    with path.open("rb") as handle:
+        for raw_line in handle:
+            if raw_line.strip():
+                index.add(json.loads(raw_line), index.size)
+            index.size += len(raw_line)
+    return index
+
+
+def read_events(
+    path: Path,
+    index: TrajectoryIndex,
+    start: int = 0,
+    stop: int | None = None,
+    resolve: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """Stream events ``[start, stop)`` by seeking to the first one instead of parsing the file."""
+    stop = len(index.offsets) if stop is None else min(stop, len(index.offsets))
+    if start >= stop:
+        return
+    records = _iter_records(_iter_lines(path, index.offsets[start]))
+    for _ in range(index.positions[start]):
+        next(records)
+    selected = (next(records) for _ in range(stop - start))
+    yield from _resolve_events(selected, path) if resolve else selected
+
+
+def convert_trajectory(src: Path, dst: Path, block_events: int = ZSTD_BLOCK_EVENTS) -> int:
+    """Rewrite ``src`` into the format implied by ``dst``'s suffix, preserving events.
+
+    Payloads are resolved from ``src``'s blob store and re-stored next to ``dst``."""
+    if dst.exists():
+        raise FileExistsError(f"Refusing to overwrite trajectory: {dst}")
+    writer = TrajectoryWriter(dst, block_events=block_events)
+    count = 0
+    for event in iter_trajectory(src):
+        writer.append(event)
+        count += 1
+    writer.close()
+    return count
 
 
 def message_event(role: str, content: str, tool_calls: List[dict[str, Any]] | None = None) -> Dict[str, Any]:
@@ -63,11 +374,51 @@ def config_event(model: Dict[str, Any], sandbox: Dict[str, Any], agent: Dict[str
     return {"model": model, "sandbox": sandbox, "agent": agent}
 
 
-def outcome_event(success: bool, score: float, reason: str, outcome: str, duration_s: float) -> Dict[str, Any]:
+def stall_event(
+    step: int,
+    action: str,
+    description: str,
+    repeated_steps: int,
+    wasted_steps: int,
+) -> Dict[str, Any]:
+    return {
+        "step": step,
+        "action": action,
+        "description": description,
+        "repeated_steps": repeated_steps,
+        "wasted_steps": wasted_steps,
+    }
+
+
+def checkpoint_event(
+    sequence: int,
+    tool_index: int,
+    archive: str,
+    changed: int,
+    deleted: List[str],
+) -> Dict[str, Any]:
+    return {
+        "sequence": sequence,
+        "tool_index": tool_index,
+        "archive": archive,
+        "changed": changed,
+        "deleted": deleted,
+    }
+
+
+def outcome_event(
+    success: bool,
+    score: float,
+    reason: str,
+    outcome: str,
+    duration_s: float,
+    usage: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
     return {
         "success": success,
         "score": score,
         "reason": reason,
         "outcome": outcome,
         "duration_s": duration_s,
+        "usage": usage or {},
     }
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tarfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from ale_lite.rock.filesystem import safe_path
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    sequence: int
+    tool_index: int
+    archive: str
+    changed: int
+    deleted: List[str] = field(default_factory=list)
+
+
+def _hash_tree(root: Path) -> Dict[str, str]:
+    digests: Dict[str, str] = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            if path.is_symlink() or not path.is_file():
+                continue
+            rel = path.relative_to(root).as_posix()
+            digest = hashlib.sha256()
+            digest.update(oct(path.stat().st_mode & 0o777).encode("ascii"))
+            with path.open("rb") as handle:
+                for block in iter(lambda: handle.read(1 << 20), b""):
+                    digest.update(block)
+            digests[rel] = digest.hexdigest()
+    return digests
+
+
+class CheckpointRecorder:
+    """Writes workspace checkpoints as diffs: each archive holds only files that changed since
+    the previous checkpoint, and deletions are listed on the checkpoint itself."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.sequence = 0
+        self._previous: Dict[str, str] = {}
+
+    def capture(self, workspace: Path, tool_index: int) -> Checkpoint:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        current = _hash_tree(workspace)
+        changed = sorted(
+            rel for rel, digest in current.items() if self._previous.get(rel) != digest
+        )
+        deleted = sorted(rel for rel in self._previous if rel not in current)
+        archive = f"checkpoint_{self.sequence:04d}.tar.gz"
+        with tarfile.open(self.directory / archive, "w:gz") as tar:
+            for rel in changed:
+                tar.add(workspace / rel, arcname=rel, recursive=False)
+        checkpoint = Checkpoint(
+            sequence=self.sequence,
+            tool_index=tool_index,
+            archive=archive,
+            changed=len(changed),
+            deleted=deleted,
+        )
+        self._previous = current
+        self.sequence += 1
+        return checkpoint
+
+
+def restore_checkpoints(
+    directory: Path, checkpoints: Iterable[Checkpoint], workspace: Path
+) -> None:
+    """Replay a checkpoint chain (in sequence order) onto ``workspace``."""
+    for checkpoint in sorted(checkpoints, key=lambda item: item.sequence):
+        for rel in checkpoint.deleted:
+            target = safe_path(workspace, rel)
+            if target.exists():
+                target.unlink()
+        with tarfile.open(directory / checkpoint.archive, "r:gz") as tar:
+            for member in tar.getmembers():
+                if not member.isfile():
+                    continue
+                source = tar.extractfile(member)
+                if source is None:
+                    continue
+                target = safe_path(workspace, member.name)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with source, target.open("wb") as handle:
+                    handle.write(source.read())
+                target.chmod(member.mode & 0o777)
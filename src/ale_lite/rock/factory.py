@@ -48,6 +48,11 @@ def make_sandbox(
     task_image: Optional[str] = None,
 ) -> Sandbox:
     resolved = resolve_backend(sandbox_config, task_image=task_image)
+    return build_sandbox(sandbox_config, resolved)
+
+
+def build_sandbox(sandbox_config: SandboxConfig, resolved: ResolvedBackend) -> Sandbox:
+    """Instantiate an already resolved backend, e.g. once per rollout of a task."""
     if resolved.backend == "docker":
         return DockerSandbox(sandbox_config, image=resolved.image or DEFAULT_DOCKER_IMAGE)
     return LocalSandbox(sandbox_config)
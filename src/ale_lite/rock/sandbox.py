@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import shutil
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Dict, List
 
 
@@ -18,6 +20,7 @@ class SandboxConfig:
 class Sandbox(ABC):
     def __init__(self, config: SandboxConfig) -> None:
         self.config = config
+        self.workspace: Path | None = None
 
     @abstractmethod
     def create_workspace(self) -> None:
@@ -46,3 +49,9 @@ class Sandbox(ABC):
     @abstractmethod
     def describe(self) -> Dict[str, object]:
         raise NotImplementedError
+
+    def copy_workspace_from(self, source: "Sandbox") -> None:
+        """Copy ``source``'s workspace into this one, e.g. to fork a post-setup state."""
+        if self.workspace is None or source.workspace is None:
+            raise RuntimeError("Workspace not initialized")
+        shutil.copytree(source.workspace, self.workspace, symlinks=True, dirs_exist_ok=True)
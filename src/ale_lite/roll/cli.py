@@ -1,13 +1,29 @@
 from __future__ import annotations
 
-import json
 from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 import typer
 
-from ale_lite.roll.datasets import collect_runs, write_raw_dataset
-from ale_lite.roll.ipa import assign_rewards, chunk_trajectory, write_ipa_scored
+from ale_lite.roll.datasets import collect_runs, iter_jsonl, write_raw_dataset
+from ale_lite.roll.dedup import NearDuplicateFilter, dedup_chunks, dpo_text
+from ale_lite.roll.ipa import (
+    IPA_LAYOUTS,
+    Chunk,
+    NormalizedEncoder,
+    assign_rewards,
+    chunk_trajectory,
+    iter_ipa_scored,
+    scored_chunk,
+    write_ipa_scored,
+)
+from ale_lite.roll.ipa_batch import RETURN_MODES, batch_rewards, build_batch
+from ale_lite.roll.mining import MinerConfig, mine_dpo_pairs
 from ale_lite.roll.preference import make_dpo_records, write_dpo
+from ale_lite.roll.ref_logprobs import precompute_ref_logprobs
+from ale_lite.roll.shuffle import shuffle_split
+from ale_lite.roll.stream import resolve_shards
+from ale_lite.roll.token_cache import build_token_cache
 from ale_lite.roll.train_dpo import load_train_config, train_dpo
 
 app = typer.Typer(help="ROLL post-training pipeline")
@@ -20,48 +36,244 @@ def collect(runs: Path = typer.Option(..., "--runs"), out: Path = typer.Option(.
     typer.echo(f"Wrote {len(trajectories)} trajectories")
 
 
-@app.command("ipa-score")
-def ipa_score(input_path: Path = typer.Option(..., "--in"), out: Path = typer.Option(..., "--out")) -> None:
-    records = []
-    with input_path.open("r", encoding="utf-8") as handle:
-        for line in handle:
-            record = json.loads(line)
-            events = record["events"]
-            chunks = chunk_trajectory(events)
-            final_reward = 0.0
-            for event in events:
-                if event["type"] == "outcome":
-                    final_reward = float(event["payload"]["score"])
-            scored = assign_rewards(chunks, final_reward)
-            record["chunks"] = [
-                {
-                    "chunk": {
-                        "state_summary": item["chunk"].state_summary,
-                        "assistant_text": item["chunk"].assistant_text,
-                        "tool_calls": item["chunk"].tool_calls,
-                        "observations": item["chunk"].observations,
-                        "outcome_features": item["chunk"].outcome_features,
-                    },
-                    "reward": item["reward"],
-                    "advantage": item["advantage"],
-                }
-                for item in scored
+def _final_reward(events: List[Dict[str, Any]]) -> float:
+    final_reward = 0.0
+    for event in events:
+        if event["type"] == "outcome":
+            final_reward = float(event["payload"]["score"])
+    return final_reward
+
+
+Scored = List[Tuple[Chunk, float, float]]
+
+
+def _score_python(records: List[Dict[str, Any]], with_refs: bool) -> List[Scored]:
+    results = []
+    for record in records:
+        chunks = chunk_trajectory(record["events"], with_refs=with_refs)
+        scored = assign_rewards(chunks, _final_reward(record["events"]))
+        results.append([(item["chunk"], item["reward"], item["advantage"]) for item in scored])
+    return results
+
+
+def _score_batch(
+    records: List[Dict[str, Any]], with_refs: bool, returns: str, gamma: float, lam: float
+) -> List[Scored]:
+    trajectories = [chunk_trajectory(record["events"], with_refs=with_refs) for record in records]
+    batch = build_batch(trajectories, [_final_reward(record["events"]) for record in records])
+    rewards, advantages = batch_rewards(batch, mode=returns, gamma=gamma, lam=lam)
+    rewards, advantages = rewards.tolist(), advantages.tolist()
+    results = []
+    offset = 0
+    for chunks in trajectories:
+        results.append(
+            [
+                (chunk, rewards[offset + idx], advantages[offset + idx])
+                for idx, chunk in enumerate(chunks)
             ]
-            records.append(record)
-    write_ipa_scored(records, out)
-    typer.echo(f"Wrote {len(records)} ipa-scored records")
+        )
+        offset += len(chunks)
+    return results
+
+
+def _batched(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@app.command("ipa-score")
+def ipa_score(
+    input_path: Path = typer.Option(..., "--in"),
+    out: Path = typer.Option(..., "--out"),
+    engine: str = typer.Option("python", "--engine", help="python or batch (numpy)"),
+    returns: str = typer.Option("position", "--returns", help=", ".join(RETURN_MODES)),
+    gamma: float = typer.Option(1.0, "--gamma"),
+    lam: float = typer.Option(0.95, "--lam"),
+    batch_size: int = typer.Option(1024, "--batch-size", help="Trajectories per batch"),
+    layout: str = typer.Option(
+        "inline",
+        "--layout",
+        help="inline repeats state and chunk content per record; normalized writes each state "
+        "once and references events by index.",
+    ),
+    drop_events: bool = typer.Option(
+        False, "--drop-events", help="Omit raw events (normalized layout inlines chunk content)."
+    ),
+) -> None:
+    if engine not in ("python", "batch"):
+        raise typer.BadParameter("--engine must be python or batch")
+    if returns not in RETURN_MODES:
+        raise typer.BadParameter(f"--returns must be one of {', '.join(RETURN_MODES)}")
+    if engine == "python" and returns != "position":
+        raise typer.BadParameter("--returns other than position requires --engine batch")
+    if layout not in IPA_LAYOUTS:
+        raise typer.BadParameter(f"--layout must be one of {', '.join(IPA_LAYOUTS)}")
+    normalized = layout == "normalized"
+    encoder = NormalizedEncoder(drop_events=drop_events)
+    with_refs = normalized and not drop_events
+    count = 0
+
+    def lines() -> Iterator[Dict[str, Any]]:
+        nonlocal count
+        for records in _batched(iter_jsonl(input_path), max(1, batch_size)):
+            if engine == "batch":
+                results = _score_batch(records, with_refs, returns, gamma, lam)
+            else:
+                results = _score_python(records, with_refs)
+            for record, scored in zip(records, results, strict=True):
+                count += 1
+                if normalized:
+                    yield from encoder.encode(record, scored)
+                    continue
+                record["chunks"] = [scored_chunk(*item) for item in scored]
+                if drop_events:
+                    record.pop("events", None)
+                yield record
+
+    write_ipa_scored(lines(), out)
+    typer.echo(f"Wrote {count} ipa-scored records")
 
 
 @app.command("make-dpo")
-def make_dpo(input_path: Path = typer.Option(..., "--in"), out: Path = typer.Option(..., "--out")) -> None:
-    with input_path.open("r", encoding="utf-8") as handle:
-        ipa_records = [json.loads(line) for line in handle if line.strip()]
-    dpo_records = make_dpo_records(ipa_records)
-    write_dpo(dpo_records, out)
-    typer.echo(f"Wrote {len(dpo_records)} dpo records")
+def make_dpo(
+    input_path: Path = typer.Option(..., "--in"),
+    out: Path = typer.Option(..., "--out"),
+    group_by: str | None = typer.Option(
+        None,
+        "--group-by",
+        help="Mine pairs across trajectories grouped by task|step|observation. "
+        "Without it, one pair is built per trajectory.",
+    ),
+    top_k: int = typer.Option(1, "--top-k", help="Pairs per group when mining."),
+    min_margin: float = typer.Option(0.0, "--min-margin", help="Min chosen-rejected reward gap."),
+    max_groups: int = typer.Option(
+        100_000, "--max-groups", help="Groups mined in memory before spilling to disk."
+    ),
+    tmp_dir: Path | None = typer.Option(None, "--tmp-dir", help="Where mining spills go."),
+    dedup_threshold: float | None = typer.Option(
+        None, "--dedup-threshold", help="Drop pairs at or above this MinHash similarity."
+    ),
+) -> None:
+    if group_by is None:
+        dpo_records: Iterable[Dict[str, str]] = make_dpo_records(iter_ipa_scored(input_path))
+    else:
+        miner = MinerConfig(
+            group_by=group_by,
+            top_k=top_k,
+            min_margin=min_margin,
+            max_groups=max_groups,
+            tmp_dir=tmp_dir,
+        )
+        dpo_records = mine_dpo_pairs(iter_ipa_scored(input_path), miner)
+    dedup = None
+    if dedup_threshold is not None:
+        dedup = NearDuplicateFilter(threshold=dedup_threshold)
+        dpo_records = dedup.filter(dpo_records, dpo_text)
+    count = write_dpo(dpo_records, out)
+    typer.echo(f"Wrote {count} dpo records")
+    if dedup is not None:
+        typer.echo(f"Removed {dedup.stats.removed} near-duplicate records")
+
+
+@app.command()
+def dedup(
+    input_path: Path = typer.Option(..., "--in"),
+    out: Path = typer.Option(..., "--out"),
+    kind: str = typer.Option("dpo", "--kind", help="dpo records or ipa-scored chunks."),
+    threshold: float = typer.Option(0.8, "--threshold"),
+    num_perm: int = typer.Option(64, "--num-perm"),
+    max_index_entries: int = typer.Option(1_000_000, "--max-index-entries"),
+) -> None:
+    dedup_filter = NearDuplicateFilter(
+        threshold=threshold, num_perm=num_perm, max_index_entries=max_index_entries
+    )
+    if kind == "dpo":
+        kept = dedup_filter.filter(iter_jsonl(input_path), dpo_text)
+    elif kind == "ipa":
+        kept = dedup_chunks(iter_ipa_scored(input_path), dedup_filter)
+    else:
+        raise typer.BadParameter(f"Unsupported kind: {kind}")
+    count = write_dpo(kept, out)
+    stats = dedup_filter.stats
+    typer.echo(f"Wrote {count} records; removed {stats.removed} of {stats.seen} {kind} items")
+
+
+@app.command()
+def tokenize(
+    input_path: Path = typer.Option(..., "--in"),
+    tokenizer_name: str = typer.Option(..., "--tokenizer", help="Tokenizer name or local path"),
+    cache_dir: Path = typer.Option(Path(".cache/tokens"), "--cache-dir"),
+    batch_size: int = typer.Option(1024, "--batch-size"),
+) -> None:
+    try:
+        from transformers import AutoTokenizer
+    except ImportError as exc:
+        raise RuntimeError(
+            "Tokenizing requires optional dependencies. Install with: pip install -e .[train]"
+        ) from exc
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    cache = build_token_cache(input_path, tokenizer, cache_dir, batch_size=batch_size)
+    typer.echo(
+        f"Cached {len(cache)} pairs ({cache.meta.num_tokens} tokens) in {cache.directory}"
+    )
+
+
+@app.command("ref-logprobs")
+def ref_logprobs(
+    config: Path = typer.Option(..., "--config"),
+    out: Path = typer.Option(..., "--out"),
+    ref_model: str | None = typer.Option(
+        None, "--ref-model", help="Reference model (defaults to model_name_or_path)"
+    ),
+    batch_size: int = typer.Option(8, "--batch-size"),
+) -> None:
+    train_config = load_train_config(config)
+    count = precompute_ref_logprobs(
+        train_config, out, batch_size=batch_size, ref_model_name_or_path=ref_model
+    )
+    typer.echo(f"Wrote {count} dpo records with reference logprobs")
+
+
+@app.command("shuffle-split")
+def shuffle_split_command(
+    input_path: str = typer.Option(..., "--in", help="JSONL file, shard directory or glob"),
+    out_dir: Path = typer.Option(..., "--out-dir"),
+    eval_fraction: float = typer.Option(0.05, "--eval-fraction"),
+    seed: int = typer.Option(0, "--seed"),
+    group_key: str = typer.Option("task_id", "--group-key", help="Field kept within one split"),
+    bucket_mb: int = typer.Option(256, "--bucket-mb", help="Approximate memory per bucket"),
+    tmp_dir: Path | None = typer.Option(None, "--tmp-dir"),
+) -> None:
+    if not 0.0 <= eval_fraction <= 1.0:
+        raise typer.BadParameter("--eval-fraction must be between 0 and 1")
+    stats = shuffle_split(
+        resolve_shards(input_path),
+        out_dir,
+        eval_fraction=eval_fraction,
+        seed=seed,
+        group_key=group_key,
+        bucket_bytes=bucket_mb << 20,
+        tmp_dir=tmp_dir,
+    )
+    typer.echo(
+        f"train: {stats.records['train']} records, eval: {stats.records['eval']} records "
+        f"({stats.buckets} buckets)"
+    )
+    if stats.ungrouped:
+        typer.echo(f"{stats.ungrouped} records had no {group_key} and were split individually")
 
 
 @app.command("train-dpo")
 def train_dpo_command(config: Path = typer.Option(..., "--config")) -> None:
     train_config = load_train_config(config)
-    train_dpo(train_config)
+    stats = train_dpo(train_config)
+    typer.echo(
+        f"Trained on {stats.samples} pairs: {stats.tokens_per_s:.1f} tokens/s, "
+        f"peak memory {stats.peak_memory_mb:.0f} MB"
+    )
@@ -3,9 +3,14 @@ from __future__ import annotations
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List
 
-from ale_lite.iflow.trajectory import load_trajectory
+from ale_lite.iflow.trajectory import (
+    find_trajectories,
+    load_trajectory,
+    split_rollout,
+    trajectory_name,
+)
 
 
 @dataclass
@@ -13,14 +18,17 @@ class RawTrajectory:
     task_id: str
     path: Path
     events: List[dict[str, object]]
+    rollout: int | None = None
 
 
 def collect_runs(runs_dir: Path) -> List[RawTrajectory]:
     trajectories = []
-    for path in sorted(runs_dir.glob("*_trajectory.jsonl")):
-        task_id = path.name.replace("_trajectory.jsonl", "")
+    for path in find_trajectories(runs_dir):
+        task_id, rollout = split_rollout(trajectory_name(path))
         events = load_trajectory(path)
-        trajectories.append(RawTrajectory(task_id=task_id, path=path, events=events))
+        trajectories.append(
+            RawTrajectory(task_id=task_id, path=path, events=events, rollout=rollout)
+        )
     return trajectories
 
 
@@ -28,10 +36,19 @@ def write_raw_dataset(trajectories: Iterable[RawTrajectory], out_path: Path) ->
     out_path.parent.mkdir(parents=True, exist_ok=True)
     with out_path.open("w", encoding="utf-8") as handle:
         for traj in trajectories:
-            record = {
+            record: Dict[str, Any] = {
                 "task_id": traj.task_id,
                 "path": str(traj.path),
                 "events": traj.events,
             }
+            if traj.rollout is not None:
+                record["rollout"] = traj.rollout
             handle.write(json.dumps(record, sort_keys=True) + "\n")
             handle.flush()
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Set, Tuple
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def _hash64(data: str) -> int:
+    return int.from_bytes(hashlib.blake2b(data.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Token ``size``-grams of ``text``; empty when it has fewer than ``size`` tokens."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    return {" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) so the LSH S-curve midpoint ``(1/b) ** (1/r)`` is near ``threshold``."""
+    best = (1, num_perm)
+    best_error = float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, seed: int = 1) -> None:
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> List[int]:
+        hashes = [_hash64(shingle) for shingle in shingles(text)]
+        if not hashes:
+            return []
+        return [
+            min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in hashes)
+            for a, b in self._params
+        ]
+
+
+@dataclass
+class DedupStats:
+    seen: int = 0
+    kept: int = 0
+    removed: int = 0
+
+
+@dataclass
+class NearDuplicateFilter:
+    """Single-pass MinHash/LSH filter.
+
+    A record is dropped when any LSH band of its signature was already seen. The band index
+    holds at most ``max_index_entries`` keys and forgets the oldest first, so memory stays
+    bounded on arbitrarily long streams at the cost of missing very distant duplicates.
+    Texts shorter than one shingle have no band keys and are always kept, so empty or very
+    short chunks do not all collapse into one cluster.
+    """
+
+    threshold: float = 0.8
+    num_perm: int = 64
+    max_index_entries: int = 1_000_000
+    seed: int = 1
+    stats: DedupStats = field(default_factory=DedupStats)
+
+    def __post_init__(self) -> None:
+        self.bands, self.rows = lsh_params(self.threshold, self.num_perm)
+        self._hasher = MinHasher(self.num_perm, self.seed)
+        self._index: Set[int] = set()
+        self._order: Deque[int] = deque()
+
+    def _band_keys(self, text: str) -> List[int]:
+        signature = self._hasher.signature(text)
+        if not signature:
+            return []
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows : (band + 1) * self.rows]
+            keys.append(_hash64(f"{band}:" + ",".join(map(str, rows))))
+        return keys
+
+    def is_duplicate(self, text: str) -> bool:
+        """Check ``text`` against the index and remember it if it is new."""
+        self.stats.seen += 1
+        keys = self._band_keys(text)
+        if any(key in self._index for key in keys):
+            self.stats.removed += 1
+            return True
+        for key in keys:
+            self._index.add(key)
+            self._order.append(key)
+        while len(self._order) > self.max_index_entries:
+            self._index.discard(self._order.popleft())
+        self.stats.kept += 1
+        return False
+
+    def filter(
+        self,
+        records: Iterable[Dict[str, Any]],
+        text_of: Callable[[Dict[str, Any]], str],
+    ) -> Iterator[Dict[str, Any]]:
+        for record in records:
+            if not self.is_duplicate(text_of(record)):
+                yield record
+
+
+def dpo_text(record: Dict[str, Any]) -> str:
+    return "\n".join(str(record.get(key, "")) for key in ("prompt", "chosen", "rejected"))
+
+
+def chunk_text(chunk: Dict[str, Any]) -> str:
+    tool_calls = [
+        {"name": call.get("name"), "arguments": call.get("arguments")}
+        for call in chunk.get("tool_calls", [])
+    ]
+    return str(chunk.get("assistant_text", "")) + "\n" + json.dumps(tool_calls, sort_keys=True)
+
+
+def dedup_chunks(
+    records: Iterable[Dict[str, Any]],
+    dedup: NearDuplicateFilter,
+) -> Iterator[Dict[str, Any]]:
+    """Drop near-duplicate chunks from ipa-scored records, and records left with no chunks."""
+    for record in records:
+        chunks = [
+            item
+            for item in record.get("chunks", [])
+            if not dedup.is_duplicate(chunk_text(item["chunk"]))
+        ]
+        if chunks:
+            record["chunks"] = chunks
+            yield record
@@ -1,89 +1,182 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
 
 
 MICRO_STEP_START = "<micro-step>"
 MICRO_STEP_END = "</micro-step>"
+TOOL_ERROR_PENALTY = 0.1
+IPA_LAYOUTS = ("inline", "normalized")
 
 
-@dataclass
 class Chunk:
-    state_summary: str
-    assistant_text: str
-    tool_calls: List[Dict[str, Any]]
-    observations: List[Dict[str, Any]]
-    outcome_features: Dict[str, Any]
+    """One scored unit of a trajectory.
+
+    The assistant text is kept as ``(source, start, end)`` into the original message so
+    micro-steps share one string, and tool calls, observations and the state summary are
+    referenced rather than copied. ``refs`` optionally holds ``(message, tools, observations)``
+    event indices for the normalized output layout.
+    """
+
+    __slots__ = (
+        "state_summary",
+        "tool_calls",
+        "observations",
+        "_source",
+        "_start",
+        "_end",
+        "_features",
+        "refs",
+    )
+
+    def __init__(
+        self,
+        state_summary: str,
+        assistant_text: str,
+        tool_calls: Sequence[Dict[str, Any]],
+        observations: Sequence[Dict[str, Any]],
+        outcome_features: Dict[str, Any] | None = None,
+        start: int = 0,
+        end: int | None = None,
+        refs: Tuple[int, Tuple[int, ...], Tuple[int, ...]] | None = None,
+    ) -> None:
+        self.state_summary = state_summary
+        self.tool_calls = tool_calls
+        self.observations = observations
+        self._source = assistant_text
+        self._start = start
+        self._end = len(assistant_text) if end is None else end
+        self._features = outcome_features or None
+        self.refs = refs
+
+    @property
+    def assistant_text(self) -> str:
+        if self._start == 0 and self._end == len(self._source):
+            return self._source
+        return self._source[self._start : self._end]
+
+    @property
+    def span(self) -> Tuple[int, int]:
+        return self._start, self._end
+
+    @property
+    def outcome_features(self) -> Dict[str, Any]:
+        if self._features is None:
+            self._features = {}
+        return self._features
+
+    def __repr__(self) -> str:
+        return (
+            f"Chunk(state_summary={self.state_summary!r}, assistant_text={self.assistant_text!r})"
+        )
+
+
+_EMPTY: Tuple[Dict[str, Any], ...] = ()
+
+
+def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _micro_step_spans(text: str) -> List[Tuple[int, int]]:
+    """Single left-to-right scan; same segments as splitting on the tags, without copying tails."""
+    first = text.find(MICRO_STEP_START)
+    if first < 0:
+        return [(0, len(text))]
+    spans: List[Tuple[int, int]] = []
+    pos = 0
+    tag = first
+    while tag >= 0:
+        before = _strip_span(text, pos, tag)
+        if before[0] < before[1]:
+            spans.append(before)
+        body = tag + len(MICRO_STEP_START)
+        close = text.find(MICRO_STEP_END, body)
+        if close < 0:
+            spans.append(_strip_span(text, body, len(text)))
+            return spans
+        mid = _strip_span(text, body, close)
+        if mid[0] < mid[1]:
+            spans.append(mid)
+        pos = close + len(MICRO_STEP_END)
+        tag = text.find(MICRO_STEP_START, pos)
+    tail = _strip_span(text, pos, len(text))
+    if tail[0] < tail[1]:
+        spans.append(tail)
+    return spans
 
 
 def _split_micro_steps(text: str) -> List[str]:
-    if MICRO_STEP_START not in text:
-        return [text]
-    segments: List[str] = []
-    remaining = text
-    while MICRO_STEP_START in remaining:
-        before, rest = remaining.split(MICRO_STEP_START, 1)
-        if before.strip():
-            segments.append(before.strip())
-        if MICRO_STEP_END in rest:
-            mid, remaining = rest.split(MICRO_STEP_END, 1)
-            if mid.strip():
-                segments.append(mid.strip())
-        else:
-            segments.append(rest.strip())
-            remaining = ""
-    if remaining.strip():
-        segments.append(remaining.strip())
-    return segments
-
-
-def chunk_trajectory(events: List[Dict[str, Any]]) -> List[Chunk]:
+    return [text[start:end] for start, end in _micro_step_spans(text)]
+
+
+def chunk_trajectory(events: List[Dict[str, Any]], with_refs: bool = False) -> List[Chunk]:
     chunks: List[Chunk] = []
     current_tools: List[Dict[str, Any]] = []
     current_obs: List[Dict[str, Any]] = []
+    tool_refs: List[int] = []
+    obs_refs: List[int] = []
     state_summary = ""
 
-    for event in events:
+    for index, event in enumerate(events):
         if event["type"] == "message":
             payload = event["payload"]
             if payload["role"] == "assistant":
-                for segment in _split_micro_steps(payload["content"]):
+                content = payload["content"]
+                for start, end in _micro_step_spans(content):
+                    # Hand the pending lists to the chunk and start fresh ones; later
+                    # micro-steps of the same message share one empty tuple.
                     chunks.append(
                         Chunk(
-                            state_summary=state_summary,
-                            assistant_text=segment,
-                            tool_calls=list(current_tools),
-                            observations=list(current_obs),
-                            outcome_features={},
+                            state_summary,
+                            content,
+                            current_tools or _EMPTY,
+                            current_obs or _EMPTY,
+                            start=start,
+                            end=end,
+                            refs=(index, tuple(tool_refs), tuple(obs_refs)) if with_refs else None,
                         )
                     )
-                    current_tools.clear()
-                    current_obs.clear()
+                    if current_tools:
+                        current_tools = []
+                        tool_refs.clear()
+                    if current_obs:
+                        current_obs = []
+                        obs_refs.clear()
             elif payload["role"] == "tool":
                 current_obs.append({"content": payload["content"]})
+                if with_refs:
+                    obs_refs.append(index)
         elif event["type"] == "tool":
             current_tools.append(event["payload"])
+            if with_refs:
+                tool_refs.append(index)
         elif event["type"] == "config":
             state_summary = json.dumps(event["payload"], sort_keys=True)
 
     return chunks
 
 
+def has_tool_error(chunk: Chunk) -> bool:
+    return any(
+        call.get("result", {}).get("exit_code") not in (0, None) for call in chunk.tool_calls
+    )
+
+
 def assign_rewards(chunks: List[Chunk], final_reward: float) -> List[Dict[str, Any]]:
     scored = []
     total = len(chunks) or 1
     for idx, chunk in enumerate(chunks):
         weight = (idx + 1) / total
         reward = final_reward * weight
-        tool_error = any(
-            call.get("result", {}).get("exit_code") not in (0, None)
-            for call in chunk.tool_calls
-        )
-        if tool_error:
-            reward = max(0.0, reward - 0.1)
+        if has_tool_error(chunk):
+            reward = max(0.0, reward - TOOL_ERROR_PENALTY)
         scored.append({"chunk": chunk, "reward": reward})
     mean_reward = sum(item["reward"] for item in scored) / total
     for item in scored:
@@ -91,9 +184,119 @@ def assign_rewards(chunks: List[Chunk], final_reward: float) -> List[Dict[str, A
     return scored
 
 
-def write_ipa_scored(records: Iterable[Dict[str, Any]], out_path: Path) -> None:
+def scored_chunk(chunk: Chunk, reward: float, advantage: float) -> Dict[str, Any]:
+    return {
+        "chunk": {
+            "state_summary": chunk.state_summary,
+            "assistant_text": chunk.assistant_text,
+            "tool_calls": chunk.tool_calls,
+            "observations": chunk.observations,
+            "outcome_features": chunk.outcome_features,
+        },
+        "reward": reward,
+        "advantage": advantage,
+    }
+
+
+class NormalizedEncoder:
+    """Encode scored records in the ``normalized`` ipa-scored layout.
+
+    Each distinct state summary is written once as a ``{"state": {"id", "summary"}}`` line
+    ahead of the first record that uses it. Chunks reference it by id and point at the
+    record's events by index; with ``drop_events`` the events are omitted and the chunk
+    text, tool calls and observations are written inline instead.
+    """
+
+    def __init__(self, drop_events: bool = False) -> None:
+        self.drop_events = drop_events
+        self.states: Dict[str, int] = {}
+
+    def encode(
+        self, record: Dict[str, Any], scored: Iterable[Tuple[Chunk, float, float]]
+    ) -> List[Dict[str, Any]]:
+        lines: List[Dict[str, Any]] = []
+        chunks: List[Dict[str, Any]] = []
+        for chunk, reward, advantage in scored:
+            state_id = self.states.get(chunk.state_summary)
+            if state_id is None:
+                state_id = self.states[chunk.state_summary] = len(self.states)
+                lines.append({"state": {"id": state_id, "summary": chunk.state_summary}})
+            item: Dict[str, Any] = {"state": state_id, "reward": reward, "advantage": advantage}
+            if self.drop_events or chunk.refs is None:
+                item["text"] = chunk.assistant_text
+                item["tool_calls"] = chunk.tool_calls
+                item["observations"] = chunk.observations
+            else:
+                message, tools, observations = chunk.refs
+                item["message"] = message
+                item["span"] = list(chunk.span)
+                item["tools"] = tools
+                item["obs"] = observations
+            chunks.append(item)
+        out = {key: value for key, value in record.items() if key not in ("events", "chunks")}
+        if not self.drop_events:
+            out["events"] = record["events"]
+        out["layout"] = "normalized"
+        out["chunks"] = chunks
+        lines.append(out)
+        return lines
+
+
+def _resolve_chunk(
+    item: Dict[str, Any], states: Dict[int, str], events: List[Dict[str, Any]] | None
+) -> Dict[str, Any]:
+    if "text" in item:
+        text, tool_calls, observations = item["text"], item["tool_calls"], item["observations"]
+    else:
+        if events is None:
+            raise ValueError("Normalized chunk references events, but the record has none")
+        start, end = item["span"]
+        text = events[item["message"]]["payload"]["content"][start:end]
+        tool_calls = [events[index]["payload"] for index in item["tools"]]
+        observations = [{"content": events[index]["payload"]["content"]} for index in item["obs"]]
+    return {
+        "chunk": {
+            "state_summary": states[item["state"]],
+            "assistant_text": text,
+            "tool_calls": tool_calls,
+            "observations": observations,
+            "outcome_features": {},
+        },
+        "reward": item["reward"],
+        "advantage": item["advantage"],
+    }
+
+
+def iter_ipa_scored(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream ipa-scored records of either layout, with chunks in the inline form.
+
+    State summaries are kept in a table as they are read, and every resolved chunk shares
+    the same string for its state summary.
+    """
+    states: Dict[int, str] = {}
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            state = record.get("state")
+            if isinstance(state, dict) and len(record) == 1:
+                states[int(state["id"])] = state["summary"]
+                continue
+            if record.get("layout") == "normalized":
+                events = record.get("events")
+                record["chunks"] = [
+                    _resolve_chunk(item, states, events) for item in record["chunks"]
+                ]
+            yield record
+
+
+def write_ipa_scored(records: Iterable[Dict[str, Any]], out_path: Path) -> int:
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
     with out_path.open("w", encoding="utf-8") as handle:
         for record in records:
             handle.write(json.dumps(record, sort_keys=True, default=str) + "\n")
             handle.flush()
+            count += 1
+    return count
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, List, Sequence, Tuple
+
+from ale_lite.roll.ipa import TOOL_ERROR_PENALTY, Chunk, has_tool_error
+
+RETURN_MODES = ("position", "discounted", "gae")
+
+
+def _require_numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError(
+            "Batch IPA scoring requires optional dependencies. Install with: pip install -e .[roll]"
+        ) from exc
+    return numpy
+
+
+@dataclass
+class ChunkBatch:
+    """Chunk metadata for many trajectories as flat arrays, ordered by (trajectory, position)."""
+
+    trajectory_ids: Any
+    positions: Any
+    lengths: Any
+    tool_errors: Any
+    final_rewards: Any
+
+    @property
+    def num_trajectories(self) -> int:
+        return int(len(self.final_rewards))
+
+    def segment_ends(self) -> Any:
+        """Flat index of the last chunk of each trajectory."""
+        np = _require_numpy()
+        counts = np.bincount(self.trajectory_ids, minlength=self.num_trajectories)
+        return np.cumsum(counts) - 1
+
+
+def build_batch(trajectories: Sequence[List[Chunk]], final_rewards: Sequence[float]) -> ChunkBatch:
+    np = _require_numpy()
+    lengths = [len(chunks) for chunks in trajectories]
+    total = sum(lengths)
+    trajectory_ids = np.repeat(np.arange(len(trajectories), dtype=np.int64), lengths)
+    starts = np.repeat(np.cumsum([0] + lengths[:-1]), lengths) if total else np.zeros(0, np.int64)
+    positions = np.arange(total, dtype=np.int64) - starts
+    tool_errors = np.fromiter(
+        (has_tool_error(chunk) for chunks in trajectories for chunk in chunks),
+        dtype=bool,
+        count=total,
+    )
+    return ChunkBatch(
+        trajectory_ids=trajectory_ids,
+        positions=positions,
+        lengths=np.asarray(lengths, dtype=np.int64)[trajectory_ids],
+        tool_errors=tool_errors,
+        final_rewards=np.asarray(final_rewards, dtype=np.float64),
+    )
+
+
+def _padded(np: Any, batch: ChunkBatch, values: Any) -> Any:
+    """``values`` scattered into a zero-padded [position, trajectory] array."""
+    max_len = int(batch.positions.max()) + 1
+    padded = np.zeros((max_len, batch.num_trajectories), dtype=np.float64)
+    padded[batch.positions, batch.trajectory_ids] = values
+    return padded
+
+
+def _segment_mean(np: Any, batch: ChunkBatch, values: Any) -> Any:
+    """Per-trajectory mean, summed position by position so it matches the scalar ``sum()``."""
+    counts = np.bincount(batch.trajectory_ids, minlength=batch.num_trajectories)
+    sums = np.zeros(batch.num_trajectories, dtype=np.float64)
+    if len(values):
+        for row in _padded(np, batch, values):
+            sums += row
+    return sums / np.maximum(counts, 1)
+
+
+def _discounted_suffix_sum(np: Any, batch: ChunkBatch, values: Any, discount: float) -> Any:
+    """``out[t] = sum_{k >= t} discount ** (k - t) * values[k]`` within each trajectory.
+
+    Runs the recurrence ``out[t] = values[t] + discount * out[t + 1]`` backwards over
+    positions, vectorized across trajectories on a zero-padded [position, trajectory] array,
+    so each trajectory's result is independent of the batch and never rescaled.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values
+    padded = _padded(np, batch, values)
+    acc = np.zeros(batch.num_trajectories, dtype=np.float64)
+    for position in range(len(padded) - 1, -1, -1):
+        acc = padded[position] + discount * acc
+        padded[position] = acc
+    return padded[batch.positions, batch.trajectory_ids]
+
+
+def _step_rewards(np: Any, batch: ChunkBatch, error_penalty: float) -> Any:
+    rewards = np.where(batch.tool_errors, -error_penalty, 0.0)
+    last = batch.positions == batch.lengths - 1
+    return rewards + np.where(last, batch.final_rewards[batch.trajectory_ids], 0.0)
+
+
+def batch_rewards(
+    batch: ChunkBatch,
+    mode: str = "position",
+    gamma: float = 1.0,
+    lam: float = 0.95,
+    error_penalty: float = TOOL_ERROR_PENALTY,
+    values: Any | None = None,
+) -> Tuple[Any, Any]:
+    """Return per-chunk ``(rewards, advantages)`` for every trajectory in ``batch``.
+
+    ``position`` reproduces :func:`ale_lite.roll.ipa.assign_rewards` exactly. ``discounted``
+    uses the discounted return of the final reward with per-step tool-error penalties.
+    ``gae`` computes generalized advantage estimates against ``values`` (defaulting to the
+    per-trajectory mean discounted return) and reports ``advantage + value`` as the reward.
+    """
+    np = _require_numpy()
+    if mode not in RETURN_MODES:
+        raise ValueError(f"Unsupported return mode: {mode}")
+    if mode == "position":
+        weights = (batch.positions + 1) / batch.lengths
+        rewards = batch.final_rewards[batch.trajectory_ids] * weights
+        rewards = np.where(batch.tool_errors, np.maximum(0.0, rewards - error_penalty), rewards)
+        return rewards, rewards - _segment_mean(np, batch, rewards)[batch.trajectory_ids]
+
+    step_rewards = _step_rewards(np, batch, error_penalty)
+    returns = _discounted_suffix_sum(np, batch, step_rewards, gamma)
+    if mode == "discounted":
+        return returns, returns - _segment_mean(np, batch, returns)[batch.trajectory_ids]
+
+    if values is None:
+        values = _segment_mean(np, batch, returns)[batch.trajectory_ids]
+    last = batch.positions == batch.lengths - 1
+    next_values = np.where(last, 0.0, np.roll(values, -1))
+    deltas = step_rewards + gamma * next_values - values
+    advantages = _discounted_suffix_sum(np, batch, deltas, gamma * lam)
+    return advantages + values, advantages
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, TextIO, Tuple
+
+GROUP_BY_MODES = ("task", "step", "observation")
+
+# (sort key, sequence, prompt, text); sequence keeps heap ordering stable for equal rewards.
+_Entry = Tuple[float, int, str, str]
+
+
+@dataclass
+class MinerConfig:
+    group_by: str = "observation"
+    top_k: int = 1
+    min_margin: float = 0.0
+    max_groups: int = 100_000
+    spill_partitions: int = 64
+    tmp_dir: Path | None = None
+
+    def __post_init__(self) -> None:
+        if self.group_by not in GROUP_BY_MODES:
+            raise ValueError(f"Unsupported group_by: {self.group_by}")
+        if self.top_k < 1:
+            raise ValueError("top_k must be >= 1")
+        if self.max_groups < 1 or self.spill_partitions < 1:
+            raise ValueError("max_groups and spill_partitions must be >= 1")
+
+
+@dataclass
+class _Group:
+    best: List[_Entry] = field(default_factory=list)
+    worst: List[_Entry] = field(default_factory=list)
+
+    def offer(self, reward: float, seq: int, prompt: str, text: str, top_k: int) -> None:
+        _push_bounded(self.best, (reward, seq, prompt, text), top_k)
+        _push_bounded(self.worst, (-reward, seq, prompt, text), top_k)
+
+    def entries(self) -> List[_Entry]:
+        """Retained ``(reward, seq, prompt, text)`` entries; offering them again rebuilds it."""
+        kept = {entry[1]: entry for entry in self.best}
+        for neg_reward, seq, prompt, text in self.worst:
+            kept.setdefault(seq, (-neg_reward, seq, prompt, text))
+        return [kept[seq] for seq in sorted(kept)]
+
+
+def _push_bounded(heap: List[_Entry], entry: _Entry, limit: int) -> None:
+    if len(heap) < limit:
+        heapq.heappush(heap, entry)
+    elif entry[0] > heap[0][0]:
+        heapq.heapreplace(heap, entry)
+
+
+def chunk_prompt(chunk: Dict[str, Any]) -> str:
+    observations = [str(obs.get("content", "")) for obs in chunk.get("observations", [])]
+    if not observations:
+        return str(chunk.get("state_summary", ""))
+    return "\n\n".join([str(chunk.get("state_summary", "")), *observations])
+
+
+def group_key(task_id: str, index: int, chunk: Dict[str, Any], group_by: str) -> bytes:
+    digest = hashlib.blake2b(task_id.encode("utf-8"), digest_size=16)
+    if group_by == "step":
+        digest.update(f"\0{index}".encode("ascii"))
+    elif group_by == "observation":
+        digest.update(b"\0")
+        digest.update(json.dumps(chunk.get("observations", []), sort_keys=True).encode("utf-8"))
+    return digest.digest()
+
+
+class _Spill:
+    """Hash partitions of group entries on disk, each small enough to mine in memory."""
+
+    def __init__(self, partitions: int, tmp_dir: Path | None) -> None:
+        if tmp_dir is not None:
+            tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.directory = Path(tempfile.mkdtemp(prefix=".mine-", dir=tmp_dir))
+        self.paths = [self.directory / f"{index:04d}.jsonl" for index in range(partitions)]
+        self.handles: List[TextIO] = [path.open("w", encoding="utf-8") for path in self.paths]
+
+    def write(self, key: bytes, entry: _Entry) -> None:
+        handle = self.handles[int.from_bytes(key[:8], "big") % len(self.handles)]
+        handle.write(json.dumps([key.hex(), *entry]) + "\n")
+
+    def groups(self, top_k: int) -> Iterator[Dict[bytes, _Group]]:
+        for handle in self.handles:
+            handle.close()
+        for path in self.paths:
+            groups: Dict[bytes, _Group] = {}
+            with path.open(encoding="utf-8") as handle:
+                for line in handle:
+                    key, reward, seq, prompt, text = json.loads(line)
+                    group = groups.setdefault(bytes.fromhex(key), _Group())
+                    group.offer(reward, seq, prompt, text, top_k)
+            path.unlink()
+            yield groups
+
+    def close(self) -> None:
+        for handle in self.handles:
+            handle.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _group_pairs(groups: Iterable[_Group], config: MinerConfig) -> Iterator[Dict[str, str]]:
+    for group in groups:
+        best = sorted(group.best, reverse=True)
+        worst = sorted(group.worst, reverse=True)
+        for chosen, rejected in zip(best, worst, strict=True):
+            margin = chosen[0] + rejected[0]
+            if chosen[1] == rejected[1] or margin < config.min_margin or margin <= 0:
+                continue
+            if chosen[3] == rejected[3]:
+                continue
+            yield {"prompt": chosen[2], "chosen": chosen[3], "rejected": rejected[3]}
+
+
+def mine_dpo_pairs(
+    ipa_scored: Iterable[Dict[str, Any]],
+    config: MinerConfig | None = None,
+) -> Iterator[Dict[str, str]]:
+    """Mine chosen/rejected pairs across trajectories that share a task and comparable state.
+
+    Records are consumed one at a time and each group keeps only its ``top_k`` best and worst
+    chunks. Up to ``max_groups`` groups are mined in memory; past that, the retained and all
+    further chunks are hash-partitioned by group to ``spill_partitions`` files under
+    ``tmp_dir``, which are then mined one at a time, so memory stays bounded by
+    ``max_groups`` (or one partition) whatever the number of distinct states.
+    """
+    config = config or MinerConfig()
+    groups: Dict[bytes, _Group] = {}
+    spill: _Spill | None = None
+    seq = 0
+    try:
+        for record in ipa_scored:
+            task_id = str(record.get("task_id", ""))
+            for index, item in enumerate(record.get("chunks", [])):
+                chunk = item["chunk"]
+                key = group_key(task_id, index, chunk, config.group_by)
+                text = str(chunk.get("assistant_text", ""))
+                entry: _Entry = (float(item["reward"]), seq, chunk_prompt(chunk), text)
+                seq += 1
+                if spill is None and key not in groups and len(groups) >= config.max_groups:
+                    spill = _Spill(config.spill_partitions, config.tmp_dir)
+                    for spilled_key, spilled_group in groups.items():
+                        for retained in spilled_group.entries():
+                            spill.write(spilled_key, retained)
+                    groups.clear()
+                if spill is not None:
+                    spill.write(key, entry)
+                    continue
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = _Group()
+                group.offer(*entry, config.top_k)
+
+        if spill is None:
+            yield from _group_pairs(groups.values(), config)
+        else:
+            for partition in spill.groups(config.top_k):
+                yield from _group_pairs(partition.values(), config)
+    finally:
+        if spill is not None:
+            spill.close()
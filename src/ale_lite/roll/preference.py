@@ -25,9 +25,11 @@ def make_dpo_records(ipa_scored: Iterable[Dict[str, object]]) -> List[Dict[str,
     return records
 
 
-def write_dpo(records: Iterable[Dict[str, str]], out_path: Path) -> None:
+def write_dpo(records: Iterable[Dict[str, str]], out_path: Path) -> int:
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
     with out_path.open("w", encoding="utf-8") as handle:
         for record in records:
             handle.write(json.dumps(record, sort_keys=True) + "\n")
-            handle.flush()
+            count += 1
+    return count
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, cast
+
+from ale_lite.roll.datasets import iter_jsonl
+from ale_lite.roll.train_dpo import (
+    REF_CHOSEN_COLUMN,
+    REF_REJECTED_COLUMN,
+    TrainConfig,
+    truncate_completion,
+    truncate_prompt,
+)
+
+
+def _require_torch() -> Any:
+    try:
+        import torch
+    except ImportError as exc:
+        raise RuntimeError(
+            "Reference logprobs require optional dependencies. "
+            "Install with: pip install -e .[train]"
+        ) from exc
+    return torch
+
+
+def completion_logprobs(
+    model: Any, prompts: List[List[int]], completions: List[List[int]], pad_token_id: int
+) -> List[float]:
+    """Sum of ``log p(completion | prompt)`` per row, in one right-padded forward pass."""
+    torch = _require_torch()
+    sequences = [
+        prompt + completion for prompt, completion in zip(prompts, completions, strict=True)
+    ]
+    width = max(len(sequence) for sequence in sequences)
+    device = next(model.parameters()).device
+    input_ids = torch.full((len(sequences), width), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(sequences), width), dtype=torch.long)
+    # loss_mask[i, t] marks positions whose next token belongs to the completion.
+    loss_mask = torch.zeros((len(sequences), max(width - 1, 1)), dtype=torch.bool)
+    for row, (prompt, sequence) in enumerate(zip(prompts, sequences, strict=True)):
+        input_ids[row, : len(sequence)] = torch.tensor(sequence, dtype=torch.long)
+        attention_mask[row, : len(sequence)] = 1
+        loss_mask[row, max(len(prompt) - 1, 0) : len(sequence) - 1] = True
+
+    with torch.no_grad():
+        logits = model(
+            input_ids=input_ids.to(device), attention_mask=attention_mask.to(device)
+        ).logits
+    logprobs = torch.log_softmax(logits[:, :-1].float(), dim=-1)
+    targets = input_ids[:, 1:].to(device)
+    token_logprobs = logprobs.gather(-1, targets.unsqueeze(-1)).squeeze(-1)
+    mask = loss_mask[:, : token_logprobs.shape[1]].to(device)
+    return cast(List[float], (token_logprobs * mask).sum(dim=-1).tolist())
+
+
+def _batches(records: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def precompute_ref_logprobs(
+    config: TrainConfig,
+    out_path: Path,
+    batch_size: int = 8,
+    ref_model_name_or_path: str | None = None,
+    model: Any = None,
+    tokenizer: Any = None,
+) -> int:
+    """Score every pair of ``config.dataset_path`` with the reference model once.
+
+    Writes the DPO records to ``out_path`` with ``ref_chosen_logps``/``ref_rejected_logps``
+    added, using the same prompt/completion truncation as ``train_dpo`` (``max_length`` is
+    left to TRL, so keep prompt + completion limits within it). Point the training config's
+    ``dataset_path`` at the output to train without a reference model.
+    """
+    torch = _require_torch()
+    try:
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+    except ImportError as exc:
+        raise RuntimeError(
+            "Reference logprobs require optional dependencies. "
+            "Install with: pip install -e .[train]"
+        ) from exc
+
+    name = ref_model_name_or_path or config.model_name_or_path
+    if model is None:
+        model = AutoModelForCausalLM.from_pretrained(name)
+        if torch.cuda.is_available() and not config.use_cpu:
+            model = model.to("cuda")
+    if tokenizer is None:
+        tokenizer = AutoTokenizer.from_pretrained(name)  # type: ignore[no-untyped-call]
+    pad_token_id = tokenizer.pad_token_id
+    if pad_token_id is None:
+        pad_token_id = tokenizer.eos_token_id
+    model.eval()
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with out_path.open("w", encoding="utf-8") as handle:
+        for batch in _batches(iter_jsonl(Path(config.dataset_path)), max(1, batch_size)):
+            encoded = {
+                field: tokenizer([record[field] for record in batch], add_special_tokens=False)[
+                    "input_ids"
+                ]
+                for field in ("prompt", "chosen", "rejected")
+            }
+            prompts = [truncate_prompt(config, ids) for ids in encoded["prompt"]]
+            eos = tokenizer.eos_token_id
+            for field, column in (("chosen", REF_CHOSEN_COLUMN), ("rejected", REF_REJECTED_COLUMN)):
+                completions = [truncate_completion(config, ids, eos) for ids in encoded[field]]
+                scores = completion_logprobs(model, prompts, completions, pad_token_id)
+                for record, score in zip(batch, scores, strict=True):
+                    record[column] = score
+            for record in batch:
+                handle.write(json.dumps(record, sort_keys=True) + "\n")
+                count += 1
+    return count
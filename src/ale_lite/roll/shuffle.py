@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import random
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Sequence
+
+SPLITS = ("train", "eval")
+IO_BUFFER_BYTES = 1 << 20
+BUCKET_BUFFER_BYTES = 64 << 10
+# Both splits keep every bucket open during pass one; stay well under common fd limits.
+MAX_BUCKETS = 256
+
+
+def split_for(group: str, eval_fraction: float, seed: int) -> str:
+    """Deterministic split of a group id; every record of a group lands on the same side."""
+    digest = hashlib.blake2b(f"{seed}\0{group}".encode("utf-8"), digest_size=8).digest()
+    position = int.from_bytes(digest, "big") / 2**64
+    return "eval" if position < eval_fraction else "train"
+
+
+@dataclass
+class ShuffleSplitStats:
+    buckets: int
+    records: Dict[str, int] = field(default_factory=lambda: {split: 0 for split in SPLITS})
+    ungrouped: int = 0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "buckets": self.buckets,
+            "records": dict(self.records),
+            "ungrouped": self.ungrouped,
+        }
+
+
+_DECODER = json.JSONDecoder()
+
+
+def _group_of(line: bytes, group_key: str) -> str | None:
+    value = _DECODER.decode(line.decode("utf-8")).get(group_key)
+    return None if value is None else str(value)
+
+
+def shuffle_split(
+    inputs: Sequence[Path],
+    out_dir: Path,
+    eval_fraction: float = 0.05,
+    seed: int = 0,
+    group_key: str = "task_id",
+    bucket_bytes: int = 256 << 20,
+    tmp_dir: Path | None = None,
+) -> ShuffleSplitStats:
+    """Seeded two-pass external shuffle into ``train.jsonl`` and ``eval.jsonl``.
+
+    Pass one streams every line to a random on-disk bucket of its split; pass two loads one
+    bucket at a time (about ``bucket_bytes``), shuffles it in memory and appends it to the
+    output. Records are copied as raw bytes, so both passes run at sequential disk speed and
+    memory stays bounded by one bucket (buckets grow past ``bucket_bytes`` only beyond
+    ``MAX_BUCKETS`` of them). The split is a hash of the group, so no per-group state is kept;
+    records without ``group_key`` are split individually.
+    """
+    total_bytes = sum(path.stat().st_size for path in inputs)
+    num_buckets = min(MAX_BUCKETS, max(1, math.ceil(total_bytes / max(1, bucket_bytes))))
+    stats = ShuffleSplitStats(buckets=num_buckets)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if tmp_dir is not None:
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+    # A private directory per run: ``tmp_dir`` may be shared scratch space, so only this is removed.
+    work = Path(tempfile.mkdtemp(prefix=".shuffle-", dir=tmp_dir or out_dir))
+    try:
+        _bucket_records(inputs, work, num_buckets, eval_fraction, seed, group_key, stats)
+        for split in SPLITS:
+            with (out_dir / f"{split}.jsonl").open("wb", buffering=IO_BUFFER_BYTES) as out:
+                for index in range(num_buckets):
+                    bucket = work / f"{split}-{index:05d}.jsonl"
+                    lines = bucket.read_bytes().splitlines(keepends=True)
+                    random.Random(f"{seed}:{split}:{index}").shuffle(lines)
+                    out.writelines(lines)
+                    bucket.unlink()
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return stats
+
+
+def _bucket_records(
+    inputs: Sequence[Path],
+    work: Path,
+    num_buckets: int,
+    eval_fraction: float,
+    seed: int,
+    group_key: str,
+    stats: ShuffleSplitStats,
+) -> None:
+    rng = random.Random(seed)
+    handles: Dict[str, List[BinaryIO]] = {
+        split: [
+            (work / f"{split}-{index:05d}.jsonl").open("wb", buffering=BUCKET_BUFFER_BYTES)
+            for index in range(num_buckets)
+        ]
+        for split in SPLITS
+    }
+    try:
+        for path in inputs:
+            with path.open("rb", buffering=IO_BUFFER_BYTES) as source:
+                for line in source:
+                    if not line.strip():
+                        continue
+                    if not line.endswith(b"\n"):
+                        line += b"\n"
+                    group = _group_of(line, group_key)
+                    if group is None:
+                        stats.ungrouped += 1
+                        group = hashlib.blake2b(line).hexdigest()
+                    split = split_for(group, eval_fraction, seed)
+                    stats.records[split] += 1
+                    handles[split][int(rng.random() * num_buckets)].write(line)
+    finally:
+        for split_handles in handles.values():
+            for handle in split_handles:
+                handle.close()
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import glob
+import json
+import random
+from dataclasses import asdict, dataclass
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, TypeVar
+
+from ale_lite.roll.datasets import iter_jsonl
+
+STREAM_POSITION_NAME = "stream_position.json"
+
+T = TypeVar("T")
+
+
+def resolve_shards(dataset_path: str) -> List[Path]:
+    """A JSONL file, a directory of ``*.jsonl`` shards, or a glob pattern."""
+    path = Path(dataset_path)
+    if path.is_dir():
+        shards = sorted(path.glob("*.jsonl"))
+    elif glob.has_magic(dataset_path):
+        shards = sorted(Path(match) for match in glob.glob(dataset_path))
+    else:
+        shards = [path]
+    if not shards:
+        raise FileNotFoundError(f"No dataset shards found for {dataset_path}")
+    return shards
+
+
+def shuffle_buffer(items: Iterable[T], size: int, rng: random.Random) -> Iterator[T]:
+    """Approximate shuffle holding at most ``size`` items in memory."""
+    buffer: List[T] = []
+    for item in items:
+        if len(buffer) < size:
+            buffer.append(item)
+            continue
+        index = rng.randrange(size)
+        yield buffer[index]
+        buffer[index] = item
+    rng.shuffle(buffer)
+    yield from buffer
+
+
+def stream_records(
+    shards: Sequence[Path],
+    buffer_size: int = 10_000,
+    seed: int = 42,
+    start: int = 0,
+    epochs: int | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """Lazily yield records pass after pass (forever when ``epochs`` is None).
+
+    Each pass visits shards in a seeded order through a bounded shuffle buffer, so the stream
+    is a pure function of ``seed``. ``start`` skips that many records (read, but never
+    tokenized or trained on), which is how training resumes from a :class:`StreamPosition`.
+    """
+    emitted = 0
+    epoch = 0
+    while epochs is None or epoch < epochs:
+        rng = random.Random(f"{seed}:{epoch}")
+        order = list(shards)
+        rng.shuffle(order)
+        records = chain.from_iterable(iter_jsonl(shard) for shard in order)
+        passed = 0
+        for record in shuffle_buffer(records, max(1, buffer_size), rng):
+            passed += 1
+            if emitted >= start:
+                yield record
+            emitted += 1
+        if passed == 0:
+            return
+        epoch += 1
+
+
+@dataclass
+class StreamPosition:
+    samples: int
+
+    def write(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / STREAM_POSITION_NAME).write_text(json.dumps(asdict(self)), encoding="utf-8")
+
+    @classmethod
+    def read(cls, directory: Path) -> "StreamPosition":
+        path = directory / STREAM_POSITION_NAME
+        if not path.exists():
+            return cls(samples=0)
+        return cls(**json.loads(path.read_text(encoding="utf-8")))
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import asdict, dataclass
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from ale_lite.roll.datasets import iter_jsonl
+
+CACHE_VERSION = 1
+CACHE_FIELDS = ("prompt", "chosen", "rejected")
+META_NAME = "meta.json"
+TOKEN_DTYPE = "<i4"
+
+
+def _require_numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError(
+            "Token caches require optional dependencies. Install with: pip install -e .[roll]"
+        ) from exc
+    return numpy
+
+
+def dataset_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def tokenizer_fingerprint(tokenizer: Any) -> str:
+    """Hash of everything that changes token ids: class, vocabulary/merges and special tokens."""
+    digest = hashlib.sha256(type(tokenizer).__name__.encode("utf-8"))
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        digest.update(backend.to_str().encode("utf-8"))
+    else:
+        digest.update(json.dumps(sorted(tokenizer.get_vocab().items())).encode("utf-8"))
+    # Padding never changes ids, and train_dpo may default pad_token to eos_token.
+    special = dict(getattr(tokenizer, "special_tokens_map", {}))
+    special.pop("pad_token", None)
+    digest.update(json.dumps(special, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class TokenCacheMeta:
+    dataset_sha256: str
+    tokenizer_fingerprint: str
+    num_samples: int
+    num_tokens: int
+    version: int = CACHE_VERSION
+
+
+def cache_dir_for(cache_root: Path, dataset_sha256: str, fingerprint: str) -> Path:
+    return cache_root / f"{dataset_sha256[:16]}-{fingerprint[:16]}"
+
+
+class TokenizedPairs:
+    """Memory-mapped token ids of a DPO dataset.
+
+    Each field is a flat ``<field>.tokens.npy`` array plus a ``<field>.offsets.npy`` table of
+    ``num_samples + 1`` boundaries; rows are zero-copy views into the mapped file, so worker
+    processes share the page cache instead of holding their own copies.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        np = _require_numpy()
+        self.directory = directory
+        meta = json.loads((directory / META_NAME).read_text(encoding="utf-8"))
+        self.meta = TokenCacheMeta(**meta)
+        self._tokens = {
+            field: np.load(directory / f"{field}.tokens.npy", mmap_mode="r")
+            for field in CACHE_FIELDS
+        }
+        self._offsets = {
+            field: np.load(directory / f"{field}.offsets.npy", mmap_mode="r")
+            for field in CACHE_FIELDS
+        }
+
+    def __len__(self) -> int:
+        return self.meta.num_samples
+
+    def ids(self, field: str, index: int) -> Any:
+        offsets = self._offsets[field]
+        return self._tokens[field][offsets[index] : offsets[index + 1]]
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return {field: self.ids(field, index) for field in CACHE_FIELDS}
+
+    def tokens(self, field: str) -> Any:
+        """The flat memory-mapped token array of ``field``."""
+        return self._tokens[field]
+
+    def offsets(self, field: str) -> Any:
+        return self._offsets[field]
+
+    def lengths(self, field: str) -> Any:
+        np = _require_numpy()
+        return np.diff(self._offsets[field])
+
+
+def _is_valid(directory: Path, dataset_sha256: str, fingerprint: str) -> bool:
+    try:
+        meta = json.loads((directory / META_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    if (
+        meta.get("version") != CACHE_VERSION
+        or meta.get("dataset_sha256") != dataset_sha256
+        or meta.get("tokenizer_fingerprint") != fingerprint
+    ):
+        return False
+    return all(
+        (directory / f"{field}.{kind}.npy").exists()
+        for field in CACHE_FIELDS
+        for kind in ("tokens", "offsets")
+    )
+
+
+def find_token_cache(cache_root: Path, dataset_path: Path, tokenizer: Any) -> TokenizedPairs | None:
+    """Return the cache for this dataset and tokenizer if a valid one exists."""
+    dataset_sha256 = dataset_hash(dataset_path)
+    fingerprint = tokenizer_fingerprint(tokenizer)
+    directory = cache_dir_for(cache_root, dataset_sha256, fingerprint)
+    if not _is_valid(directory, dataset_sha256, fingerprint):
+        return None
+    return TokenizedPairs(directory)
+
+
+def _batches(records: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _finish_npy(np: Any, raw_path: Path, out_path: Path, count: int) -> None:
+    # Tokens were streamed to a raw file; prefix a .npy header so np.load can memory-map it.
+    with out_path.open("wb") as out:
+        header = {"descr": TOKEN_DTYPE, "fortran_order": False, "shape": (count,)}
+        np.lib.format.write_array_header_1_0(out, header)
+        with raw_path.open("rb") as raw:
+            shutil.copyfileobj(raw, out, 1 << 20)
+    raw_path.unlink()
+
+
+def build_token_cache(
+    dataset_path: Path, tokenizer: Any, cache_root: Path, batch_size: int = 1024
+) -> TokenizedPairs:
+    """Tokenize ``prompt``/``chosen``/``rejected`` once and store them memory-mappable.
+
+    Ids are stored without special tokens; EOS and truncation are applied at load time so one
+    cache serves every training config. An existing valid cache is reused as is.
+    """
+    np = _require_numpy()
+    dataset_sha256 = dataset_hash(dataset_path)
+    fingerprint = tokenizer_fingerprint(tokenizer)
+    directory = cache_dir_for(cache_root, dataset_sha256, fingerprint)
+    if _is_valid(directory, dataset_sha256, fingerprint):
+        return TokenizedPairs(directory)
+
+    staging = cache_root / f".{directory.name}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    raw_files = {field: (staging / f"{field}.tokens.raw").open("wb") for field in CACHE_FIELDS}
+    offsets: Dict[str, List[int]] = {field: [0] for field in CACHE_FIELDS}
+    samples = 0
+    try:
+        for batch in _batches(iter_jsonl(dataset_path), max(1, batch_size)):
+            samples += len(batch)
+            for field in CACHE_FIELDS:
+                encoded = tokenizer([record[field] for record in batch], add_special_tokens=False)
+                ids = encoded["input_ids"]
+                flat = np.fromiter(chain.from_iterable(ids), dtype=TOKEN_DTYPE)
+                flat.tofile(raw_files[field])
+                end = offsets[field][-1]
+                for row in ids:
+                    end += len(row)
+                    offsets[field].append(end)
+    finally:
+        for handle in raw_files.values():
+            handle.close()
+
+    num_tokens = 0
+    for field in CACHE_FIELDS:
+        count = offsets[field][-1]
+        num_tokens += count
+        _finish_npy(np, staging / f"{field}.tokens.raw", staging / f"{field}.tokens.npy", count)
+        np.save(staging / f"{field}.offsets.npy", np.asarray(offsets[field], dtype=np.int64))
+    meta = TokenCacheMeta(dataset_sha256, fingerprint, samples, num_tokens)
+    (staging / META_NAME).write_text(json.dumps(asdict(meta), indent=2), encoding="utf-8")
+
+    if directory.exists():
+        shutil.rmtree(directory)
+    try:
+        staging.rename(directory)
+    except OSError:
+        # Another process published the same cache first.
+        shutil.rmtree(staging, ignore_errors=True)
+    return TokenizedPairs(directory)
@@ -1,11 +1,39 @@
 from __future__ import annotations
 
+import dataclasses
+import hashlib
+import importlib.metadata
+import inspect
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import warnings
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict
+from typing import Any, Callable, Dict, Iterator
 
 import yaml
 
+from ale_lite.roll.datasets import iter_jsonl
+from ale_lite.roll.stream import StreamPosition, resolve_shards, stream_records
+from ale_lite.roll.token_cache import CACHE_FIELDS, TokenizedPairs, build_token_cache
+
+TRUNCATION_MODES = ("keep_end", "keep_start")
+LENGTH_COLUMN = "length"
+REF_CHOSEN_COLUMN = "ref_chosen_logps"
+REF_REJECTED_COLUMN = "ref_rejected_logps"
+ARROW_CHUNK_ROWS = 65_536
+REQUIRED_TRAINER_OPTIONS = (
+    "max_length",
+    "max_prompt_length",
+    "max_completion_length",
+    "group_by_length",
+    "padding_free",
+)
+
 
 @dataclass
 class TrainConfig:
@@ -13,34 +41,282 @@ class TrainConfig:
     dataset_path: str
     output_dir: str
     full_finetune: bool = False
+    batch_size: int = 1
+    gradient_accumulation_steps: int = 1
+    num_train_epochs: float = 1.0
+    learning_rate: float = 5e-5
+    max_prompt_length: int | None = None
+    max_completion_length: int | None = None
+    max_length: int | None = None
+    truncation_mode: str = "keep_end"
+    group_by_length: bool = False
+    padding_free: bool = False
+    use_cpu: bool = False
+    token_cache_dir: str | None = None
+    streaming: bool = False
+    shuffle_buffer_size: int = 10_000
+    seed: int = 42
+    max_steps: int | None = None
+    resume_from_checkpoint: str | None = None
+    logging_steps: int = 1
+    save_steps: int = 10
+
+
+@dataclass
+class TrainStats:
+    samples: int
+    tokens: int
+    seconds: float
+    tokens_per_s: float
+    peak_memory_mb: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dataclasses.asdict(self)
+
+
+def _optional_int(value: Any) -> int | None:
+    return None if value is None else int(value)
 
 
 def load_train_config(path: Path) -> TrainConfig:
     data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    truncation_mode = str(data.get("truncation_mode", "keep_end"))
+    if truncation_mode not in TRUNCATION_MODES:
+        raise ValueError(f"Unsupported truncation_mode: {truncation_mode}")
     return TrainConfig(
         model_name_or_path=data["model_name_or_path"],
         dataset_path=data["dataset_path"],
         output_dir=data["output_dir"],
         full_finetune=bool(data.get("full_finetune", False)),
+        batch_size=int(data.get("batch_size", 1)),
+        gradient_accumulation_steps=int(data.get("gradient_accumulation_steps", 1)),
+        num_train_epochs=float(data.get("num_train_epochs", 1.0)),
+        learning_rate=float(data.get("learning_rate", 5e-5)),
+        max_prompt_length=_optional_int(data.get("max_prompt_length")),
+        max_completion_length=_optional_int(data.get("max_completion_length")),
+        max_length=_optional_int(data.get("max_length")),
+        truncation_mode=truncation_mode,
+        group_by_length=bool(data.get("group_by_length", False)),
+        padding_free=bool(data.get("padding_free", False)),
+        use_cpu=bool(data.get("use_cpu", False)),
+        token_cache_dir=data.get("token_cache_dir"),
+        streaming=bool(data.get("streaming", False)),
+        shuffle_buffer_size=int(data.get("shuffle_buffer_size", 10_000)),
+        seed=int(data.get("seed", 42)),
+        max_steps=_optional_int(data.get("max_steps")),
+        resume_from_checkpoint=data.get("resume_from_checkpoint"),
+        logging_steps=int(data.get("logging_steps", 1)),
+        save_steps=int(data.get("save_steps", 10)),
+    )
+
+
+def truncated_lengths(
+    config: TrainConfig, prompt: int, chosen: int, rejected: int
+) -> tuple[int, int, int]:
+    """Token counts after clipping completions, then the prompt, to the configured limits."""
+    if config.max_completion_length is not None:
+        chosen = min(chosen, config.max_completion_length)
+        rejected = min(rejected, config.max_completion_length)
+    if config.max_prompt_length is not None:
+        prompt = min(prompt, config.max_prompt_length)
+    if config.max_length is not None:
+        prompt = min(prompt, max(0, config.max_length - max(chosen, rejected)))
+        chosen = min(chosen, config.max_length - prompt)
+        rejected = min(rejected, config.max_length - prompt)
+    return prompt, chosen, rejected
+
+
+def peak_memory_mb() -> float:
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            return torch.cuda.max_memory_allocated() / (1024 * 1024)
+    except ImportError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _supported_kwargs(config_cls: Any, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    names = {field.name for field in dataclasses.fields(config_cls)}
+    unsupported = [key for key, value in kwargs.items() if key not in names and value]
+    required = [key for key in unsupported if key in REQUIRED_TRAINER_OPTIONS]
+    if required:
+        # Dropping these would change what is trained while the stats still report truncation.
+        raise ValueError(f"Installed TRL does not support {', '.join(required)}")
+    for key in unsupported:
+        warnings.warn(f"Installed TRL does not support {key}; ignoring it", stacklevel=3)
+    return {key: value for key, value in kwargs.items() if key in names}
+
+
+def _pretokenized_columns(trainer_cls: Any) -> tuple[str, str, str] | None:
+    """Column names the installed DPOTrainer collates, or None if it cannot skip tokenizing."""
+    if not hasattr(trainer_cls, "_prepare_dataset"):
+        return None
+    if "tokenize_row" in vars(trainer_cls):
+        return ("prompt_input_ids", "chosen_input_ids", "rejected_input_ids")
+    return ("prompt_ids", "chosen_ids", "rejected_ids")
+
+
+def truncate_prompt(config: TrainConfig, ids: list[int]) -> list[int]:
+    # TRL keeps the prompt end whatever truncation_mode is; that only applies to max_length.
+    if config.max_prompt_length is None:
+        return ids
+    return ids[-config.max_prompt_length :] if config.max_prompt_length else []
+
+
+def truncate_completion(config: TrainConfig, ids: list[int], eos_token_id: int) -> list[int]:
+    ids = ids + [eos_token_id]
+    if config.max_completion_length is not None:
+        ids = ids[: config.max_completion_length]
+    return ids
+
+
+def _truncated_rows(
+    np: Any, tokens: Any, offsets: Any, limit: int | None, keep_end: bool, eos: int | None
+) -> tuple[Any, Any]:
+    """Vectorized ``truncate_prompt``/``truncate_completion`` over rows of a flat id array.
+
+    Row ``i`` is ``tokens[offsets[i] - offsets[0] : offsets[i + 1] - offsets[0]]``; ``eos`` is
+    appended when given, then ``limit`` ids are kept from the end (``keep_end``) or the start.
+    Returns the new flat ids and offsets; untouched rows stay a view of ``tokens``.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    offsets = offsets - offsets[0]
+    lengths = np.diff(offsets) + (0 if eos is None else 1)
+    if limit is None and eos is None:
+        return tokens, offsets
+    kept = lengths if limit is None else np.minimum(lengths, max(limit, 0))
+    new_offsets = np.concatenate([[0], np.cumsum(kept)])
+    rows = np.repeat(np.arange(len(kept)), kept)
+    starts = offsets[:-1] + (lengths - kept if keep_end else 0)
+    source = starts[rows] + np.arange(new_offsets[-1]) - new_offsets[rows]
+    if eos is None:
+        return tokens[source], new_offsets
+    values = np.full(len(source), eos, dtype=tokens.dtype)
+    inside = source < offsets[1:][rows]
+    values[inside] = tokens[source[inside]]
+    return values, new_offsets
+
+
+def _pretokenized_arrow(
+    cache: TokenizedPairs,
+    config: TrainConfig,
+    columns: tuple[str, str, str],
+    eos_token_id: int,
+    length_column: list[int],
+    ref_columns: Dict[str, list[float]],
+) -> Path:
+    """Write the truncated cache as an Arrow file next to it, once per truncation setting.
+
+    Rows are converted ``ARROW_CHUNK_ROWS`` at a time straight from the memory-mapped arrays,
+    and ``datasets`` memory-maps the result, so token ids never become Python lists.
+    """
+    import numpy as np
+    import pyarrow as pa  # type: ignore[import-untyped]
+
+    settings = {
+        "columns": columns,
+        "eos": eos_token_id,
+        "max_prompt_length": config.max_prompt_length,
+        "max_completion_length": config.max_completion_length,
+        "max_length": config.max_length,
+        "ref_columns": sorted(ref_columns),
+    }
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+    path = cache.directory / f"dpo-{digest[:16]}.arrow"
+    if path.exists():
+        return path
+
+    # Like TRL's tokenize_row, prompts always keep their end; truncation_mode only applies to
+    # the max_length cut the collator makes later.
+    specs = [
+        (columns[0], "prompt", config.max_prompt_length, True, None),
+        (columns[1], "chosen", config.max_completion_length, False, eos_token_id),
+        (columns[2], "rejected", config.max_completion_length, False, eos_token_id),
+    ]
+    schema = pa.schema(
+        [pa.field(column, pa.list_(pa.int32())) for column, *_ in specs]
+        + [pa.field(LENGTH_COLUMN, pa.int64())]
+        + [pa.field(name, pa.float64()) for name in ref_columns]
     )
+    fd, tmp = tempfile.mkstemp(prefix=f"{path.name}.", suffix=".tmp", dir=cache.directory)
+    os.close(fd)
+    try:
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_stream(sink, schema) as writer:
+            for start in range(0, len(cache), ARROW_CHUNK_ROWS):
+                end = min(len(cache), start + ARROW_CHUNK_ROWS)
+                arrays = []
+                for _, field, limit, from_end, eos in specs:
+                    offsets = cache.offsets(field)[start : end + 1]
+                    tokens = cache.tokens(field)[offsets[0] : offsets[-1]]
+                    values, row_offsets = _truncated_rows(np, tokens, offsets, limit, from_end, eos)
+                    arrays.append(
+                        pa.ListArray.from_arrays(
+                            pa.array(row_offsets, pa.int32()), pa.array(values, pa.int32())
+                        )
+                    )
+                arrays.append(pa.array(length_column[start:end], pa.int64()))
+                arrays.extend(pa.array(ref_columns[name][start:end]) for name in ref_columns)
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        os.replace(tmp, path)
+    finally:
+        Path(tmp).unlink(missing_ok=True)
+    return path
+
+
+def _ref_columns(dataset_path: Path) -> Dict[str, list[float]] | None:
+    """Precomputed reference logprobs stored in the DPO file, if ``roll ref-logprobs`` ran."""
+    columns: Dict[str, list[float]] = {REF_CHOSEN_COLUMN: [], REF_REJECTED_COLUMN: []}
+    for record in iter_jsonl(dataset_path):
+        if REF_CHOSEN_COLUMN not in record:
+            return None
+        columns[REF_CHOSEN_COLUMN].append(float(record[REF_CHOSEN_COLUMN]))
+        columns[REF_REJECTED_COLUMN].append(float(record[REF_REJECTED_COLUMN]))
+    return columns
+
+
+def _mark_ref_precomputed(trainer: Any, trl_version: str | None = None) -> None:
+    """Stop TRL recomputing reference logprobs that the dataset already carries.
+
+    TRL has no public switch for this. Releases before 1.0 skip the pass once the private
+    ``_precomputed_train_ref_log_probs`` flag is set, so only those are supported.
+    """
+    if trl_version is None:
+        trl_version = importlib.metadata.version("trl")
+    major = int(trl_version.split(".")[0])
+    if major >= 1 or not hasattr(trainer, "_precomputed_train_ref_log_probs"):
+        raise RuntimeError(
+            f"Precomputed reference logprobs are not supported with TRL {trl_version}"
+        )
+    trainer._precomputed_train_ref_log_probs = True
+
 
+def train_dpo(config: TrainConfig, model: Any = None, tokenizer: Any = None) -> TrainStats:
+    """Run DPO training and return throughput stats (also written to ``train_stats.json``).
 
-def train_dpo(config: TrainConfig) -> None:
+    ``model`` and ``tokenizer`` may be passed in to train an already constructed model,
+    e.g. a tiny randomly initialised one on CPU.
+    """
     try:
         from datasets import load_dataset
         from peft import LoraConfig, get_peft_model
-        from transformers import AutoModelForCausalLM, AutoTokenizer, TrainingArguments
-        from trl import DPOTrainer
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        from trl import DPOConfig, DPOTrainer
         import accelerate  # noqa: F401
     except ImportError as exc:
         raise RuntimeError(
-            "DPO training requires optional dependencies. "
-            "Install with: pip install -e .[train]"
+            "DPO training requires optional dependencies. Install with: pip install -e .[train]"
         ) from exc
 
-    dataset = load_dataset("json", data_files=config.dataset_path)["train"]
-    model = AutoModelForCausalLM.from_pretrained(config.model_name_or_path)
-    tokenizer = AutoTokenizer.from_pretrained(config.model_name_or_path)
+    if model is None:
+        model = AutoModelForCausalLM.from_pretrained(config.model_name_or_path)
+    if tokenizer is None:
+        tokenizer = AutoTokenizer.from_pretrained(config.model_name_or_path)  # type: ignore[no-untyped-call]
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
 
     if not config.full_finetune:
         peft_config = LoraConfig(
@@ -52,19 +328,233 @@ def train_dpo(config: TrainConfig) -> None:
         )
         model = get_peft_model(model, peft_config)
 
-    training_args = TrainingArguments(
-        output_dir=config.output_dir,
-        per_device_train_batch_size=1,
-        num_train_epochs=1,
-        logging_steps=1,
-        save_steps=10,
+    if config.streaming:
+        return _train_streaming(config, model, tokenizer, DPOConfig, DPOTrainer)
+    if config.token_cache_dir:
+        return _train_from_token_cache(config, model, tokenizer, DPOConfig, DPOTrainer)
+
+    dataset = load_dataset("json", data_files=config.dataset_path)["train"]
+
+    def measure(example: Dict[str, str]) -> Dict[str, int]:
+        prompt, chosen, rejected = (
+            len(tokenizer(example[key], add_special_tokens=False)["input_ids"])
+            for key in ("prompt", "chosen", "rejected")
+        )
+        prompt, chosen, rejected = truncated_lengths(config, prompt, chosen, rejected)
+        return {
+            LENGTH_COLUMN: prompt + max(chosen, rejected),
+            "pair_tokens": 2 * prompt + chosen + rejected,
+        }
+
+    # The length column drives length-grouped sampling; pair_tokens feeds the throughput report.
+    dataset = dataset.map(measure)
+    total_tokens = int(sum(dataset["pair_tokens"]) * config.num_train_epochs)
+    dataset = dataset.remove_columns("pair_tokens")
+
+    return _run_trainer(config, model, tokenizer, dataset, total_tokens, DPOConfig, DPOTrainer)
+
+
+def _train_from_token_cache(
+    config: TrainConfig, model: Any, tokenizer: Any, config_cls: Any, trainer_cls: Any
+) -> TrainStats:
+    """Train from the memory-mapped token cache, building it on first use."""
+    from datasets import Dataset
+
+    columns = _pretokenized_columns(trainer_cls)
+    if columns is None:
+        raise RuntimeError(
+            "The installed TRL always tokenizes its dataset, so token_cache_dir would not be "
+            "used; unset it or upgrade TRL"
+        )
+    if config.token_cache_dir is None:
+        raise ValueError("token_cache_dir is not set")
+    cache = build_token_cache(Path(config.dataset_path), tokenizer, Path(config.token_cache_dir))
+    lengths = zip(*(cache.lengths(field).tolist() for field in CACHE_FIELDS), strict=True)
+    truncated = [truncated_lengths(config, *row) for row in lengths]
+    total_tokens = int(sum(2 * p + c + r for p, c, r in truncated) * config.num_train_epochs)
+    length_column = [p + max(c, r) for p, c, r in truncated]
+
+    ref_columns = _ref_columns(Path(config.dataset_path)) or {}
+    path = _pretokenized_arrow(
+        cache, config, columns, tokenizer.eos_token_id, length_column, ref_columns
+    )
+    dataset = Dataset.from_file(str(path))
+    prompt_column = columns[0]
+
+    class PretokenizedDPOTrainer(trainer_cls):  # type: ignore[misc]
+        def _prepare_dataset(self, dataset: Any, *args: Any, **kwargs: Any) -> Any:
+            if prompt_column in dataset.column_names:
+                return dataset
+            return super()._prepare_dataset(dataset, *args, **kwargs)
+
+    return _run_trainer(
+        config, model, tokenizer, dataset, total_tokens, config_cls, PretokenizedDPOTrainer
+    )
+
+
+def _train_streaming(
+    config: TrainConfig, model: Any, tokenizer: Any, config_cls: Any, trainer_cls: Any
+) -> TrainStats:
+    """Train from a lazily read, buffer-shuffled stream of the JSONL file or its shards."""
+    from datasets import Features, IterableDataset, Value
+    from transformers import TrainerCallback
+
+    if config.max_steps is None:
+        raise ValueError("Streaming training needs max_steps; the stream has no known length")
+    for option in ("group_by_length", "token_cache_dir"):
+        if getattr(config, option):
+            warnings.warn(f"{option} needs the whole dataset; ignored when streaming", stacklevel=2)
+
+    shards = resolve_shards(config.dataset_path)
+    first = next(iter_jsonl(shards[0]), {})
+    columns = ["prompt", "chosen", "rejected"]
+    if REF_CHOSEN_COLUMN in first:
+        columns += [REF_CHOSEN_COLUMN, REF_REJECTED_COLUMN]
+    features = Features(
+        {name: Value("float64" if name.endswith("_logps") else "string") for name in columns}
+    )
+    start = 0
+    if config.resume_from_checkpoint:
+        start = StreamPosition.read(Path(config.resume_from_checkpoint)).samples
+    counts = {"samples": 0, "tokens": 0}
+
+    def generate(paths: tuple[str, ...]) -> Iterator[Dict[str, Any]]:
+        records = stream_records(
+            [Path(path) for path in paths], config.shuffle_buffer_size, config.seed, start
+        )
+        for record in records:
+            counts["samples"] += 1
+            yield {name: record[name] for name in columns}
+
+    # A tuple, not a list: datasets would split list gen_kwargs across workers.
+    dataset = IterableDataset.from_generator(
+        generate, features=features, gen_kwargs={"paths": tuple(str(path) for path in shards)}
+    )
+    samples_per_step = config.batch_size * config.gradient_accumulation_steps
+
+    # Tokens are counted from the rows TRL itself tokenized and truncated; a TRL without
+    # _prepare_dataset reports none rather than tokenizing every record a second time.
+    tokenized_columns = _pretokenized_columns(trainer_cls)
+    if tokenized_columns is not None:
+
+        def count_tokens(example: Dict[str, Any]) -> Dict[str, Any]:
+            prompt, chosen, rejected = (len(example[column]) for column in tokenized_columns)
+            counts["tokens"] += 2 * prompt + chosen + rejected
+            return {}
+
+        class CountingDPOTrainer(trainer_cls):  # type: ignore[misc]
+            def _prepare_dataset(self, dataset: Any, *args: Any, **kwargs: Any) -> Any:
+                prepared = super()._prepare_dataset(dataset, *args, **kwargs)
+                return prepared.map(count_tokens)
+
+        trainer_cls = CountingDPOTrainer
+    else:
+        warnings.warn(
+            "Installed TRL hides its tokenized rows; tokens are not counted", stacklevel=2
+        )
+
+    # TrainerCallback is Any when transformers has no type information.
+    class StreamPositionCallback(TrainerCallback):  # type: ignore[misc, unused-ignore]
+        def on_save(self, args: Any, state: Any, control: Any, **kwargs: Any) -> None:
+            consumed = state.global_step * samples_per_step * args.world_size
+            checkpoint = Path(args.output_dir) / f"checkpoint-{state.global_step}"
+            StreamPosition(samples=consumed).write(checkpoint)
+
+    return _run_trainer(
+        config,
+        model,
+        tokenizer,
+        dataset,
+        lambda: counts["tokens"],
+        config_cls,
+        trainer_cls,
+        samples=lambda: counts["samples"],
+        # The stream itself skips to the recorded position; the Trainer must not skip again.
+        extra_args={"ignore_data_skip": True, "group_by_length": False},
+        callbacks=[StreamPositionCallback()],
+    )
+
+
+def _run_trainer(
+    config: TrainConfig,
+    model: Any,
+    tokenizer: Any,
+    dataset: Any,
+    total_tokens: int | Callable[[], int],
+    config_cls: Any,
+    trainer_cls: Any,
+    samples: Callable[[], int] | None = None,
+    extra_args: Dict[str, Any] | None = None,
+    callbacks: list[Any] | None = None,
+) -> TrainStats:
+    # Reference logprobs from ``roll ref-logprobs`` replace the reference forward pass, so TRL
+    # never builds or keeps a reference model.
+    ref_precomputed = REF_CHOSEN_COLUMN in (dataset.column_names or [])
+    if ref_precomputed:
+        if not hasattr(trainer_cls, "_prepare_dataset"):
+            # TRL 0.11 reads them from reference_*_logps columns.
+            dataset = dataset.rename_columns(
+                {
+                    REF_CHOSEN_COLUMN: "reference_chosen_logps",
+                    REF_REJECTED_COLUMN: "reference_rejected_logps",
+                }
+            )
+    training_args = config_cls(
+        **_supported_kwargs(
+            config_cls,
+            {
+                "output_dir": config.output_dir,
+                "per_device_train_batch_size": config.batch_size,
+                "gradient_accumulation_steps": config.gradient_accumulation_steps,
+                "num_train_epochs": config.num_train_epochs,
+                "learning_rate": config.learning_rate,
+                "logging_steps": config.logging_steps,
+                "save_steps": config.save_steps,
+                "max_length": config.max_length,
+                "max_prompt_length": config.max_prompt_length,
+                "max_completion_length": config.max_completion_length,
+                "truncation_mode": config.truncation_mode,
+                "group_by_length": config.group_by_length,
+                "length_column_name": LENGTH_COLUMN,
+                "padding_free": config.padding_free,
+                "use_cpu": config.use_cpu,
+                "remove_unused_columns": False,
+                "precompute_ref_log_probs": ref_precomputed,
+                "max_steps": config.max_steps if config.max_steps is not None else -1,
+                "seed": config.seed,
+                **(extra_args or {}),
+            },
+        )
     )
 
-    trainer = DPOTrainer(
+    # TRL renamed ``tokenizer`` to ``processing_class``.
+    trainer_params = inspect.signature(trainer_cls.__init__).parameters
+    tokenizer_arg = "processing_class" if "processing_class" in trainer_params else "tokenizer"
+    trainer = trainer_cls(
         model=model,
         args=training_args,
         train_dataset=dataset,
-        tokenizer=tokenizer,
+        callbacks=callbacks,
+        **{tokenizer_arg: tokenizer},
     )
-    trainer.train()
+    if ref_precomputed:
+        _mark_ref_precomputed(trainer)
+    started = time.perf_counter()
+    trainer.train(resume_from_checkpoint=config.resume_from_checkpoint)
+    seconds = time.perf_counter() - started
     trainer.save_model(config.output_dir)
+
+    tokens = total_tokens() if callable(total_tokens) else total_tokens
+    stats = TrainStats(
+        samples=samples() if samples is not None else len(dataset),
+        tokens=tokens,
+        seconds=seconds,
+        tokens_per_s=tokens / seconds if seconds > 0 else 0.0,
+        peak_memory_mb=peak_memory_mb(),
+    )
+    out_dir = Path(config.output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "train_stats.json").write_text(
+        json.dumps(stats.to_dict(), indent=2), encoding="utf-8"
+    )
+    return stats
@@ -1,11 +1,37 @@
 from __future__ import annotations
 
+import json
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Dict, List
 
 import typer
 
-from ale_lite.tbp.runner import load_config, run_task
-from ale_lite.tbp.tasks import load_tasks_from_dir
+from ale_lite.iflow.telemetry import JsonSnapshotExporter, serve_prometheus
+from ale_lite.iflow.trajectory import rollout_name
+from ale_lite.tbp.loadtest import LevelReport, ramp, saturation_knee, streaming_requester
+from ale_lite.tbp.manifest import RunManifest, discard_trajectory, task_key
+from ale_lite.tbp.runner import (
+    RunResult,
+    build_client,
+    load_config,
+    rollout_configs,
+    run_rollouts,
+    run_task,
+)
+from ale_lite.tbp.schedule import (
+    SCHEDULE_ORDERS,
+    SuiteEta,
+    estimate_durations,
+    format_duration,
+    load_durations,
+    order_by_estimate,
+)
+from ale_lite.tbp.summary import write_suite_summary
+from ale_lite.tbp.tasks import TaskSpec, load_tasks_from_dir
 
 app = typer.Typer(help="TerminalBenchPro harness")
 
@@ -15,11 +41,235 @@ def run(
     tasks: Path = typer.Option(..., "--tasks", exists=True, dir_okay=True),
     config: Path = typer.Option(..., "--config", exists=True, dir_okay=False),
     out: Path = typer.Option(Path("runs"), "--out"),
+    resume: bool = typer.Option(
+        False, "--resume", help="Skip tasks already completed with an identical config."
+    ),
+    metrics_port: int | None = typer.Option(
+        None, "--metrics-port", help="Serve Prometheus metrics on 127.0.0.1:PORT."
+    ),
+    metrics_json: Path | None = typer.Option(
+        None, "--metrics-json", help="Periodically write a JSON metrics snapshot."
+    ),
+    metrics_interval_s: float = typer.Option(10.0, "--metrics-interval-s"),
+    rollouts: int = typer.Option(
+        1, "--rollouts", min=1, help="Episodes per task, sharing one setup; reports pass@k."
+    ),
+    seed: int | None = typer.Option(None, "--seed", help="Rollout i sends llm seed SEED + i."),
+    temperatures: str = typer.Option(
+        "", "--temperatures", help="Comma-separated temperatures cycled across rollouts."
+    ),
+    rollout_concurrency: int = typer.Option(
+        1, "--rollout-concurrency", min=1, help="Rollouts of one task run at a time."
+    ),
+    workers: int = typer.Option(1, "--workers", min=1, help="Tasks run at a time."),
+    order: str = typer.Option(
+        "name", "--order", help="name | longest (best makespan) | shortest (fast feedback)."
+    ),
+    history: List[Path] = typer.Option(
+        [], "--history", help="Run directories whose manifests give task durations."
+    ),
+    default_task_s: float | None = typer.Option(
+        None, "--default-task-s", help="Estimate for tasks without history."
+    ),
+    budget_s: float | None = typer.Option(
+        None, "--budget-s", help="Wall-clock budget; skip tasks unlikely to finish in it."
+    ),
 ) -> None:
+    if order not in SCHEDULE_ORDERS:
+        raise typer.BadParameter(f"--order must be one of {', '.join(SCHEDULE_ORDERS)}")
     cfg = load_config(config)
-    results = []
+    server = serve_prometheus(metrics_port) if metrics_port is not None else None
+    exporter = None
+    if metrics_json is not None:
+        exporter = JsonSnapshotExporter(metrics_json, interval_s=metrics_interval_s)
+        exporter.start()
+    started = time.monotonic()
+    manifest = RunManifest(out)
+    results: List[RunResult] = []
+    suite: List[RunResult] = []
+    skipped = 0
+    rollout_temperatures = [float(value) for value in temperatures.split(",") if value.strip()]
+    rollout_mode = rollouts > 1 or seed is not None or rollout_temperatures
+    configs = rollout_configs(cfg, rollouts, seed, rollout_temperatures) if rollout_mode else []
+
+    plans: Dict[str, _TaskPlan] = {}
     for task in load_tasks_from_dir(tasks):
-        result = run_task(task, cfg, out)
-        results.append(result)
-        typer.echo(f"{task.id}: {result.score}")
+        plan = _plan_task(task, cfg, configs, manifest, resume)
+        skipped += len(plan.cached)
+        suite.extend(plan.cached)
+        if not plan.pending:
+            if rollout_mode:
+                passed = sum(result.success for result in plan.cached)
+                typer.echo(f"{task.id}: {passed}/{len(plan.cached)} rollouts passed (cached)")
+            else:
+                typer.echo(f"{task.id}: {plan.cached[0].score} (cached)")
+            continue
+        plans[task.id] = plan
+
+    episodes = {
+        task_id: math.ceil(len(plan.pending) / rollout_concurrency) if rollout_mode else 1
+        for task_id, plan in plans.items()
+    }
+    per_episode = estimate_durations(plans, load_durations([out, *history]), default_task_s)
+    estimates = {task_id: per_episode[task_id] * episodes[task_id] for task_id in plans}
+    queue = order_by_estimate(list(plans), estimates, order)
+    eta = SuiteEta(workers=workers, queued=dict(estimates))
+    over_budget = 0
+
+    def execute(plan: _TaskPlan) -> List[RunResult]:
+        if not rollout_mode:
+            return [run_task(plan.task, cfg, out)]
+        return run_rollouts(
+            plan.task, configs, out, indices=plan.pending, concurrency=rollout_concurrency
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running: Dict[Future[List[RunResult]], str] = {}
+        while queue or running:
+            while queue and len(running) < workers:
+                task_id = queue.pop(0)
+                plan = plans[task_id]
+                elapsed = time.monotonic() - started
+                expected = eta.expected_s(task_id)
+                if budget_s is not None and elapsed + expected > budget_s:
+                    eta.skip(task_id)
+                    over_budget += 1
+                    typer.echo(
+                        f"{task_id}: skipped, needs ~{format_duration(expected)} with "
+                        f"{format_duration(budget_s - elapsed)} of the budget left"
+                    )
+                    continue
+                for name in plan.trajectory_names:
+                    for path in discard_trajectory(out, name):
+                        typer.echo(f"{task_id}: removed stale {path.name}")
+                eta.start(task_id, time.monotonic())
+                running[pool.submit(execute, plan)] = task_id
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task_id = running.pop(future)
+                eta.finish(task_id, time.monotonic())
+                finished = future.result()
+                plan = plans[task_id]
+                for result in finished:
+                    manifest.record(plan.keys[result.rollout or 0], result)
+                results.extend(finished)
+                suite.extend(finished)
+                if rollout_mode:
+                    for result in finished:
+                        typer.echo(f"{task_id}[{result.rollout}]: {result.score}")
+                    everything = plan.cached + finished
+                    passed = sum(result.success for result in everything)
+                    typer.echo(f"{task_id}: {passed}/{len(everything)} rollouts passed")
+                else:
+                    typer.echo(f"{task_id}: {finished[0].score}")
+                remaining = len(queue) + len(running)
+                typer.echo(
+                    f"[{len(plans) - remaining}/{len(plans)}] "
+                    f"eta {format_duration(eta.eta_s(time.monotonic()))}"
+                )
+
     typer.echo(f"Completed {len(results)} tasks")
+    if skipped:
+        typer.echo(f"Skipped {skipped} completed tasks")
+    if over_budget:
+        typer.echo(f"Skipped {over_budget} tasks over the wall-clock budget")
+    summary = write_suite_summary(suite, out, wall_time_s=time.monotonic() - started)
+    overall = summary["overall"]
+    typer.echo(
+        f"tokens={overall['total_tokens']} wall_time_s={summary['wall_time_s']:.1f} "
+        f"episode_time_s={overall['episode_time_s']:.1f} "
+        f"llm_time_s={overall['llm_time_s']:.1f} tool_time_s={overall['tool_time_s']:.1f} "
+        f"tokens_per_success={overall['tokens_per_success']}"
+    )
+    if "pass_at_k" in summary:
+        typer.echo(" ".join(f"{name}={value:.3f}" for name, value in summary["pass_at_k"].items()))
+    if exporter is not None:
+        exporter.stop()
+    if server is not None:
+        server.shutdown()
+
+
+@dataclass
+class _TaskPlan:
+    task: TaskSpec
+    keys: List[str]
+    cached: List[RunResult]
+    pending: List[int]
+    trajectory_names: List[str]
+
+
+def _plan_task(
+    task: TaskSpec,
+    cfg: Dict[str, Any],
+    configs: List[Dict[str, Any]],
+    manifest: RunManifest,
+    resume: bool,
+) -> _TaskPlan:
+    """Split a task into cached results and the episodes still to run.
+
+    Without rollout ``configs`` the task is one episode keyed by ``cfg``; otherwise each
+    rollout is cached and rerun on its own.
+    """
+    if not configs:
+        key = task_key(task, cfg)
+        entry = manifest.completed(task.id, key) if resume else None
+        if entry is not None:
+            return _TaskPlan(task, [key], [entry.to_result()], [], [])
+        return _TaskPlan(task, [key], [], [0], [task.id])
+    keys = [task_key(task, config) for config in configs]
+    cached: List[RunResult] = []
+    pending: List[int] = []
+    for index, key in enumerate(keys):
+        entry = manifest.completed(task.id, key, rollout=index) if resume else None
+        if entry is None:
+            pending.append(index)
+        else:
+            cached.append(entry.to_result())
+    names = [rollout_name(task.id, index) for index in pending]
+    return _TaskPlan(task, keys, cached, pending, names)
+
+
+@app.command()
+def loadtest(
+    config: Path = typer.Option(..., "--config", exists=True, dir_okay=False),
+    levels: str = typer.Option("1,2,4,8,16", "--levels", help="Comma-separated concurrency ramp."),
+    duration_s: float = typer.Option(30.0, "--duration-s", help="Seconds to hold each level."),
+    steps: int = typer.Option(10, "--steps", help="Requests per synthetic episode."),
+    output_chars: int = typer.Option(800, "--output-chars", help="Stub tool output size."),
+    knee_gain: float = typer.Option(0.1, "--knee-gain", help="Min throughput gain per level."),
+    report: Path | None = typer.Option(None, "--report", help="Write a JSON report."),
+) -> None:
+    cfg = load_config(config)
+    agent_cfg: Dict[str, Any] = cfg.get("agent", {})
+    send = streaming_requester(build_client(cfg["llm"]))
+
+    def on_level(level: LevelReport) -> None:
+        typer.echo(
+            f"concurrency={level.concurrency} rps={level.throughput_rps:.2f} "
+            f"tok/s={level.completion_tokens_per_s:.1f} "
+            f"p50={level.latency_s.get('p50', 0):.3f}s p95={level.latency_s.get('p95', 0):.3f}s "
+            f"p99={level.latency_s.get('p99', 0):.3f}s ttft_p50={level.ttft_s.get('p50', 0):.3f}s "
+            f"errors={level.error_rate:.1%}"
+        )
+
+    reports = ramp(
+        send,
+        [int(value) for value in levels.split(",") if value.strip()],
+        duration_s,
+        on_level=on_level,
+        steps=steps,
+        context_max_tokens=int(agent_cfg.get("context_max_tokens", 8000)),
+        memory_items=int(agent_cfg.get("memory_items", 20)),
+        output_chars=output_chars,
+    )
+    knee = saturation_knee(reports, min_gain=knee_gain)
+    if knee is None:
+        typer.echo("saturation knee: not reached")
+    else:
+        typer.echo(f"saturation knee: concurrency={knee}")
+    if report is not None:
+        report.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"levels": [level.to_dict() for level in reports], "knee_concurrency": knee}
+        report.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from itertools import pairwise
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ale_lite.api.openai_client import (
+    OpenAIChatClient,
+    build_messages,
+    tool_choice_auto,
+    tool_schema,
+)
+from ale_lite.iflow.context import WorkingMemory
+from ale_lite.iflow.prompts import TaskSpec, system_prompt, task_prompt
+from ale_lite.iflow.tools import dispatch_tool_args
+from ale_lite.rock.sandbox import Sandbox, SandboxConfig
+
+ERROR_BACKOFF_S = 0.05
+MAX_ERROR_BACKOFF_S = 2.0
+
+
+class StubSandbox(Sandbox):
+    """In-memory sandbox returning canned command output, so load tests only exercise the LLM."""
+
+    def __init__(self, output_chars: int = 800) -> None:
+        super().__init__(SandboxConfig(backend="local"))
+        self.output_chars = output_chars
+        self.files: Dict[str, str] = {}
+
+    def create_workspace(self) -> None:
+        self.files = {}
+
+    def run_command(self, cmd: str, timeout_s: float) -> Dict[str, str | int]:
+        line = f"$ {cmd}\n"
+        repeats = max(1, self.output_chars // max(1, len(line)))
+        return {"stdout": (line * repeats)[: self.output_chars], "stderr": "", "exit_code": 0}
+
+    def read_file(self, path: str) -> str:
+        return self.files.get(path, "x" * self.output_chars)
+
+    def write_file(self, path: str, content: str) -> None:
+        self.files[path] = content
+
+    def list_dir(self, path: str) -> List[str]:
+        return sorted(self.files) or ["README.md", "src", "tests"]
+
+    def teardown(self) -> None:
+        self.files = {}
+
+    def describe(self) -> Dict[str, object]:
+        return {"type": "stub", "network_enabled": False}
+
+
+@dataclass
+class RequestSample:
+    latency_s: float
+    ttft_s: float | None
+    prompt_tokens: int
+    completion_tokens: int
+    error: str | None = None
+
+
+@dataclass
+class LevelReport:
+    concurrency: int
+    requests: int
+    errors: int
+    elapsed_s: float
+    throughput_rps: float
+    completion_tokens_per_s: float
+    latency_s: Dict[str, float] = field(default_factory=dict)
+    ttft_s: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.error_rate,
+            "elapsed_s": self.elapsed_s,
+            "throughput_rps": self.throughput_rps,
+            "completion_tokens_per_s": self.completion_tokens_per_s,
+            "latency_s": self.latency_s,
+            "ttft_s": self.ttft_s,
+        }
+
+
+Requester = Callable[[List[Dict[str, Any]]], Tuple[Dict[str, Any], RequestSample]]
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (``q`` in [0, 100])."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _summary(values: Sequence[float]) -> Dict[str, float]:
+    return {f"p{q}": percentile(values, q) for q in (50, 95, 99)}
+
+
+def streaming_requester(client: OpenAIChatClient) -> Requester:
+    """Send one streamed chat request and rebuild the assistant turn, timing the first chunk."""
+
+    def send(messages: List[Dict[str, Any]]) -> tuple[Dict[str, Any], RequestSample]:
+        start = time.perf_counter()
+        ttft: float | None = None
+        content: List[str] = []
+        calls: Dict[int, Dict[str, Any]] = {}
+        usage = None
+        stream = client.client.chat.completions.create(
+            model=client.config.model,
+            messages=messages,
+            temperature=client.config.temperature,
+            max_tokens=client.config.max_tokens,
+            timeout=client.config.timeout_s,
+            tools=tool_schema(),
+            tool_choice=tool_choice_auto(),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        for chunk in stream:
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content.append(delta.content)
+            for call in delta.tool_calls or []:
+                entry = calls.setdefault(
+                    call.index,
+                    {
+                        "id": call.id or "",
+                        "type": "function",
+                        "function": {"name": "", "arguments": ""},
+                    },
+                )
+                if call.function is not None:
+                    entry["function"]["name"] += call.function.name or ""
+                    entry["function"]["arguments"] += call.function.arguments or ""
+        text = "".join(content)
+        tool_calls = [calls[index] for index in sorted(calls)]
+        completion_tokens = int(getattr(usage, "completion_tokens", 0) or 0)
+        if not completion_tokens:
+            completion_tokens = max(1, len(text + json.dumps(tool_calls)) // 4)
+        sample = RequestSample(
+            latency_s=time.perf_counter() - start,
+            ttft_s=ttft,
+            prompt_tokens=int(getattr(usage, "prompt_tokens", 0) or 0),
+            completion_tokens=completion_tokens,
+        )
+        return {"content": text, "tool_calls": tool_calls}, sample
+
+    return send
+
+
+def _synthetic_episode(
+    send: Requester,
+    deadline: float,
+    steps: int,
+    context_max_tokens: int,
+    memory_items: int,
+    output_chars: int,
+    record: Callable[[RequestSample], None],
+) -> None:
+    sandbox = StubSandbox(output_chars=output_chars)
+    memory = WorkingMemory(max_items=memory_items)
+    task = TaskSpec(
+        goal="Fix the failing unit test in the repository.",
+        evaluation="Success criteria: unit_tests_pass",
+    )
+    backoff = ERROR_BACKOFF_S
+    for _ in range(steps):
+        if time.monotonic() >= deadline:
+            return
+        messages = build_messages(
+            system_prompt(),
+            task_prompt(task),
+            memory.to_messages(),
+            max_tokens=context_max_tokens,
+            memory_summary=memory.summary_with,
+        )
+        start = time.perf_counter()
+        try:
+            response, sample = send(messages)
+        except Exception as exc:
+            record(RequestSample(time.perf_counter() - start, None, 0, 0, error=str(exc)))
+            # Back off so a failing endpoint is not hammered in a tight retry loop.
+            time.sleep(max(0.0, min(backoff, deadline - time.monotonic())))
+            backoff = min(backoff * 2, MAX_ERROR_BACKOFF_S)
+            continue
+        backoff = ERROR_BACKOFF_S
+        record(sample)
+        tool_calls = response["tool_calls"]
+        memory.add({"role": "assistant", "content": response["content"], "tool_calls": tool_calls})
+        if not tool_calls:
+            tool_calls = [
+                {"function": {"name": "terminal.exec", "arguments": json.dumps({"cmd": "ls"})}}
+            ]
+        for call in tool_calls:
+            name = call["function"]["name"]
+            try:
+                arguments = json.loads(call["function"]["arguments"] or "{}")
+                output = dispatch_tool_args(sandbox, name, arguments).output
+            except (KeyError, ValueError) as exc:
+                output = f"tool error: {exc}"
+            memory.add({"role": "tool", "name": name, "content": output})
+
+
+def run_level(
+    send: Requester,
+    concurrency: int,
+    duration_s: float,
+    steps: int = 10,
+    context_max_tokens: int = 8000,
+    memory_items: int = 20,
+    output_chars: int = 800,
+) -> LevelReport:
+    samples: List[RequestSample] = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration_s
+
+    def record(sample: RequestSample) -> None:
+        with lock:
+            samples.append(sample)
+
+    def loop() -> None:
+        while time.monotonic() < deadline:
+            _synthetic_episode(
+                send, deadline, steps, context_max_tokens, memory_items, output_chars, record
+            )
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=loop, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    ok = [sample for sample in samples if sample.error is None]
+    return LevelReport(
+        concurrency=concurrency,
+        requests=len(samples),
+        errors=len(samples) - len(ok),
+        elapsed_s=elapsed,
+        throughput_rps=len(ok) / elapsed if elapsed > 0 else 0.0,
+        completion_tokens_per_s=sum(s.completion_tokens for s in ok) / elapsed
+        if elapsed > 0
+        else 0.0,
+        latency_s=_summary([sample.latency_s for sample in ok]),
+        ttft_s=_summary([sample.ttft_s for sample in ok if sample.ttft_s is not None]),
+    )
+
+
+def saturation_knee(levels: Sequence[LevelReport], min_gain: float = 0.1) -> Optional[int]:
+    """Return the last concurrency level that still improved throughput by ``min_gain``.
+
+    ``None`` means throughput was still scaling at the highest level tested.
+    """
+    for previous, current in pairwise(levels):
+        if current.throughput_rps < previous.throughput_rps * (1 + min_gain):
+            return previous.concurrency
+    return None
+
+
+def ramp(
+    send: Requester,
+    concurrency_levels: Sequence[int],
+    duration_s: float,
+    on_level: Callable[[LevelReport], None] | None = None,
+    **episode: Any,
+) -> List[LevelReport]:
+    reports: List[LevelReport] = []
+    for concurrency in concurrency_levels:
+        report = run_level(send, concurrency, duration_s, **episode)
+        reports.append(report)
+        if on_level is not None:
+            on_level(report)
+    return reports
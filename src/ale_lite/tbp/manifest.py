@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ale_lite.iflow.trajectory import (
+    TRAJECTORY_FORMATS,
+    checkpoints_path,
+    index_path,
+    rollout_name,
+    trajectory_filename,
+)
+from ale_lite.tbp.runner import RunResult
+from ale_lite.tbp.tasks import TaskSpec
+
+MANIFEST_NAME = "run_manifest.jsonl"
+_UNHASHED_LLM_KEYS = {"api_key"}
+
+
+@dataclass
+class ManifestEntry:
+    task_id: str
+    key: str
+    success: bool
+    score: float
+    trajectory_path: str
+    completed_at: float
+    model: str = ""
+    duration_s: float = 0.0
+    usage: Dict[str, Any] = field(default_factory=dict)
+    rollout: int | None = None
+
+    @property
+    def entry_id(self) -> str:
+        return self.task_id if self.rollout is None else rollout_name(self.task_id, self.rollout)
+
+    def to_result(self) -> RunResult:
+        return RunResult(
+            task_id=self.task_id,
+            success=self.success,
+            score=self.score,
+            trajectory_path=Path(self.trajectory_path),
+            model=self.model,
+            duration_s=self.duration_s,
+            usage=dict(self.usage),
+            rollout=self.rollout,
+        )
+
+
+def task_key(task: TaskSpec, config: Dict[str, Any]) -> str:
+    """Hash everything that can change an episode's result: the task and the run config."""
+    llm = {k: v for k, v in (config.get("llm") or {}).items() if k not in _UNHASHED_LLM_KEYS}
+    material = {
+        "task": asdict(task),
+        "llm": llm,
+        "agent": config.get("agent") or {},
+        "sandbox": config.get("sandbox") or {},
+        "trajectory": config.get("trajectory") or {},
+    }
+    encoded = json.dumps(material, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class RunManifest:
+    """Append-only record of completed tasks in a run directory; the last entry per task wins."""
+
+    def __init__(self, out_dir: Path) -> None:
+        self.path = out_dir / MANIFEST_NAME
+        self.entries: Dict[str, ManifestEntry] = {}
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = ManifestEntry(**json.loads(line))
+                    except (json.JSONDecodeError, TypeError):
+                        continue
+                    self.entries[entry.entry_id] = entry
+
+    def completed(self, task_id: str, key: str, rollout: int | None = None) -> ManifestEntry | None:
+        entry_id = task_id if rollout is None else rollout_name(task_id, rollout)
+        entry = self.entries.get(entry_id)
+        if entry is None or entry.key != key:
+            return None
+        if not Path(entry.trajectory_path).exists():
+            return None
+        return entry
+
+    def record(self, key: str, result: RunResult) -> None:
+        entry = ManifestEntry(
+            task_id=result.task_id,
+            key=key,
+            success=result.success,
+            score=result.score,
+            trajectory_path=str(result.trajectory_path),
+            completed_at=time.time(),
+            model=result.model,
+            duration_s=result.duration_s,
+            usage=dict(result.usage),
+            rollout=result.rollout,
+        )
+        self.entries[entry.entry_id] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(asdict(entry), sort_keys=True) + "\n")
+            handle.flush()
+
+
+def discard_trajectory(out_dir: Path, task_id: str) -> List[Path]:
+    """Remove any trajectory artifacts left for ``task_id``, e.g. by a crashed run."""
+    removed: List[Path] = []
+    for fmt in TRAJECTORY_FORMATS:
+        path = out_dir / trajectory_filename(task_id, fmt)
+        for candidate in (path, index_path(path)):
+            if candidate.exists():
+                candidate.unlink()
+                removed.append(candidate)
+        checkpoints = checkpoints_path(path)
+        if checkpoints.is_dir():
+            shutil.rmtree(checkpoints)
+            removed.append(checkpoints)
+    return removed
@@ -1,14 +1,24 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from ale_lite.api.openai_client import OpenAIChatClient, OpenAIConfig
-from ale_lite.iflow.agent import Agent, AgentConfig
+from ale_lite.iflow.agent import Agent, AgentConfig, EpisodeUsage
+from ale_lite.iflow.blobs import DEFAULT_BLOB_THRESHOLD
 from ale_lite.iflow.prompts import TaskSpec as AgentTaskSpec
-from ale_lite.iflow.trajectory import TrajectoryWriter, outcome_event
-from ale_lite.rock.factory import make_sandbox
+from ale_lite.iflow.stall import DEFAULT_STALL_ACTIONS
+from ale_lite.iflow.telemetry import span, span_event
+from ale_lite.iflow.trajectory import (
+    TrajectoryWriter,
+    outcome_event,
+    rollout_name,
+    trajectory_filename,
+)
+from ale_lite.rock.factory import build_sandbox, make_sandbox, resolve_backend
 from ale_lite.rock.sandbox import Sandbox, SandboxConfig
 from ale_lite.tbp.scoring import ScoreResult, evaluate
 from ale_lite.tbp.tasks import TaskSpec
@@ -20,6 +30,10 @@ class RunResult:
     success: bool
     score: float
     trajectory_path: Path
+    model: str = ""
+    duration_s: float = 0.0
+    usage: Dict[str, Any] = field(default_factory=dict)
+    rollout: int | None = None
 
 
 def load_config(path: Path) -> Dict[str, Dict[str, object]]:
@@ -28,13 +42,43 @@ def load_config(path: Path) -> Dict[str, Dict[str, object]]:
     return yaml.safe_load(path.read_text(encoding="utf-8"))
 
 
-def run_task(
-    task: TaskSpec,
-    config: Dict[str, Dict[str, object]],
-    out_dir: Path,
-    agent_factory: Optional[Callable[[Sandbox, TrajectoryWriter], Agent]] = None,
-) -> RunResult:
-    out_dir.mkdir(parents=True, exist_ok=True)
+def openai_config(llm_config: Dict[str, object]) -> OpenAIConfig:
+    seed = llm_config.get("seed")
+    return OpenAIConfig(
+        base_url=str(llm_config["base_url"]),
+        api_key=str(llm_config["api_key"]),
+        model=str(llm_config["model"]),
+        temperature=float(llm_config.get("temperature", 0.2)),
+        max_tokens=int(llm_config.get("max_tokens", 1024)),
+        timeout_s=float(llm_config.get("timeout_s", 120)),
+        seed=None if seed is None else int(seed),
+    )
+
+
+def build_client(llm_config: Dict[str, object]) -> OpenAIChatClient:
+    return OpenAIChatClient(openai_config(llm_config))
+
+
+def rollout_configs(
+    config: Dict[str, Any],
+    rollouts: int,
+    seed: int | None = None,
+    temperatures: Sequence[float] = (),
+) -> List[Dict[str, Any]]:
+    """One run config per rollout: rollout ``i`` gets ``llm.seed = seed + i`` and cycles
+    through ``temperatures``; everything else is shared."""
+    configs = []
+    for index in range(rollouts):
+        llm = dict(config.get("llm") or {})
+        if seed is not None:
+            llm["seed"] = seed + index
+        if temperatures:
+            llm["temperature"] = float(temperatures[index % len(temperatures)])
+        configs.append({**config, "llm": llm})
+    return configs
+
+
+def _sandbox_config(task: TaskSpec, config: Dict[str, Any]) -> SandboxConfig:
     sandbox_cfg = config.get("sandbox", {})
     network_enabled = bool(
         task.constraints.get(
@@ -42,7 +86,7 @@ def run_task(
             sandbox_cfg.get("network_enabled", sandbox_cfg.get("network", False)),
         )
     )
-    sandbox_config = SandboxConfig(
+    return SandboxConfig(
         backend=sandbox_cfg.get("backend"),
         prefer_docker=bool(sandbox_cfg.get("prefer_docker", False)),
         image=sandbox_cfg.get("image"),
@@ -50,63 +94,167 @@ def run_task(
         allowlist_paths=sandbox_cfg.get("allowlist_paths"),
         time_limit_s=int(task.constraints.get("time_limit_s", 30)),
     )
-    sandbox = make_sandbox(sandbox_config, task_image=task.image)
-    sandbox.create_workspace()
-    trajectory_path = out_dir / f"{task.id}_trajectory.jsonl"
-    trajectory = TrajectoryWriter(trajectory_path)
 
-    for step in task.setup_steps:
-        sandbox.run_command(step, timeout_s=30)
 
-    if agent_factory is None:
-        llm_config = config["llm"]
-        agent_cfg = config.get("agent", {})
-        time_limit_s = float(task.constraints.get("time_limit_s", agent_cfg.get("time_limit_s", 600)))
-        client = OpenAIChatClient(
-            OpenAIConfig(
-                base_url=str(llm_config["base_url"]),
-                api_key=str(llm_config["api_key"]),
-                model=str(llm_config["model"]),
-                temperature=float(llm_config.get("temperature", 0.2)),
-                max_tokens=int(llm_config.get("max_tokens", 1024)),
-                timeout_s=float(llm_config.get("timeout_s", 120)),
-            )
-        )
-        agent = Agent(
-            client,
-            sandbox,
-            trajectory,
-            AgentConfig(
-                max_steps=int(agent_cfg.get("max_steps", 40)),
-                max_turns=int(agent_cfg.get("max_turns", 80)),
-                tool_timeout_s=float(agent_cfg.get("tool_timeout_s", 60)),
-                time_limit_s=time_limit_s,
-                context_max_tokens=int(agent_cfg.get("context_max_tokens", 8000)),
-                memory_items=int(agent_cfg.get("memory_items", 20)),
-            ),
-        )
-    else:
-        agent = agent_factory(sandbox, trajectory)
+def _open_trajectory(
+    config: Dict[str, Any], out_dir: Path, name: str
+) -> Tuple[Path, TrajectoryWriter]:
+    trajectory_cfg = config.get("trajectory", {})
+    trajectory_format = str(trajectory_cfg.get("format", "jsonl"))
+    trajectory_path = out_dir / trajectory_filename(name, trajectory_format)
+    blob_dir = trajectory_cfg.get("blob_dir")
+    trajectory = TrajectoryWriter(
+        trajectory_path,
+        blob_threshold=int(trajectory_cfg.get("blob_threshold", DEFAULT_BLOB_THRESHOLD)),
+        blob_dir=Path(blob_dir) if blob_dir else None,
+    )
+    return trajectory_path, trajectory
 
-    agent_task = AgentTaskSpec(goal=task.goal, evaluation=task.evaluation_text)
-    result = agent.run(agent_task)
-
-    score_result = evaluate(sandbox, task.success_criteria)
-    trajectory.log(
-        "outcome",
-        outcome_event(
-            score_result.success,
-            score_result.score,
-            result.reason,
-            result.outcome,
-            result.duration_s,
-        ),
+
+def _agent_config(task: TaskSpec, config: Dict[str, Any]) -> AgentConfig:
+    agent_cfg = config.get("agent", {})
+    time_limit_s = float(task.constraints.get("time_limit_s", agent_cfg.get("time_limit_s", 600)))
+    return AgentConfig(
+        max_steps=int(agent_cfg.get("max_steps", 40)),
+        max_turns=int(agent_cfg.get("max_turns", 80)),
+        tool_timeout_s=float(agent_cfg.get("tool_timeout_s", 60)),
+        time_limit_s=time_limit_s,
+        context_max_tokens=int(agent_cfg.get("context_max_tokens", 8000)),
+        memory_items=int(agent_cfg.get("memory_items", 20)),
+        memory_summary_tokens=int(agent_cfg.get("memory_summary_tokens", 512)),
+        tool_output_tokens=dict(agent_cfg.get("tool_output_tokens") or {}),
+        checkpoint_every_steps=int(agent_cfg.get("checkpoint_every_steps", 0)),
+        checkpoint_on_mutation=bool(agent_cfg.get("checkpoint_on_mutation", False)),
+        stall_window=int(agent_cfg.get("stall_window", 0)),
+        stall_patience=int(agent_cfg.get("stall_patience", 2)),
+        stall_actions=list(agent_cfg.get("stall_actions") or DEFAULT_STALL_ACTIONS),
     )
-    sandbox.teardown()
+
+
+def _run_episode(
+    task: TaskSpec,
+    config: Dict[str, Any],
+    sandbox: Sandbox,
+    trajectory: TrajectoryWriter,
+    trajectory_path: Path,
+    agent: Agent,
+    started: float,
+    rollout: int | None = None,
+) -> RunResult:
+    agent_task = AgentTaskSpec(goal=task.goal, evaluation=task.evaluation_text)
+    try:
+        with span(trajectory, "run.agent", task_id=task.id):
+            result = agent.run(agent_task)
+
+        with span(trajectory, "run.scoring", task_id=task.id, criteria=task.success_criteria.type):
+            score_result = evaluate(sandbox, task.success_criteria)
+        usage = getattr(result, "usage", None) or EpisodeUsage()
+        trajectory.log(
+            "outcome",
+            outcome_event(
+                score_result.success,
+                score_result.score,
+                result.reason,
+                result.outcome,
+                result.duration_s,
+                usage=usage.to_dict(),
+            ),
+        )
+    finally:
+        # A crashing agent or scorer must not leak the sandbox or leave the trajectory unflushed.
+        with span(None, "run.teardown", task_id=task.id):
+            trajectory.close()
+            sandbox.teardown()
 
     return RunResult(
         task_id=task.id,
         success=score_result.success,
         score=score_result.score,
         trajectory_path=trajectory_path,
+        model=str((config.get("llm") or {}).get("model", "")),
+        duration_s=time.perf_counter() - started,
+        usage=usage.to_dict(),
+        rollout=rollout,
     )
+
+
+def run_task(
+    task: TaskSpec,
+    config: Dict[str, Dict[str, object]],
+    out_dir: Path,
+    agent_factory: Optional[Callable[[Sandbox, TrajectoryWriter], Agent]] = None,
+) -> RunResult:
+    started = time.perf_counter()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sandbox = make_sandbox(_sandbox_config(task, config), task_image=task.image)
+    sandbox.create_workspace()
+    trajectory_path, trajectory = _open_trajectory(config, out_dir, task.id)
+
+    with span(trajectory, "run.setup", task_id=task.id, steps=len(task.setup_steps)):
+        for step in task.setup_steps:
+            sandbox.run_command(step, timeout_s=30)
+
+    if agent_factory is None:
+        client = build_client(config["llm"])
+        agent = Agent(client, sandbox, trajectory, _agent_config(task, config))
+    else:
+        agent = agent_factory(sandbox, trajectory)
+    return _run_episode(task, config, sandbox, trajectory, trajectory_path, agent, started)
+
+
+def run_rollouts(
+    task: TaskSpec,
+    configs: Sequence[Dict[str, Any]],
+    out_dir: Path,
+    indices: Sequence[int] | None = None,
+    concurrency: int = 1,
+    agent_factory: Optional[Callable[[Sandbox, TrajectoryWriter], Agent]] = None,
+) -> List[RunResult]:
+    """Run rollout ``i`` of ``task`` with ``configs[i]`` for each of ``indices`` (all by default).
+
+    The backend is resolved and the setup steps run once; every rollout starts from a copy of
+    the post-setup workspace and writes ``<task>.rollout<i>`` trajectories. One HTTP client is
+    shared, each rollout applying its own seed and temperature. Up to ``concurrency`` rollouts
+    run at a time; results follow ``indices``.
+    """
+    indices = list(range(len(configs))) if indices is None else list(indices)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if not indices:
+        return []
+    sandbox_config = _sandbox_config(task, configs[0])
+    resolved = resolve_backend(sandbox_config, task_image=task.image)
+    base = build_sandbox(sandbox_config, resolved)
+    base.create_workspace()
+    try:
+        with span(None, "run.setup", task_id=task.id, steps=len(task.setup_steps)) as attributes:
+            setup_started = time.perf_counter()
+            for step in task.setup_steps:
+                base.run_command(step, timeout_s=30)
+        setup_s = time.perf_counter() - setup_started
+        shared_client = None if agent_factory is not None else build_client(configs[0]["llm"])
+
+        def run_one(index: int) -> RunResult:
+            started = time.perf_counter()
+            config = configs[index]
+            sandbox = build_sandbox(sandbox_config, resolved)
+            sandbox.create_workspace()
+            sandbox.copy_workspace_from(base)
+            name = rollout_name(task.id, index)
+            trajectory_path, trajectory = _open_trajectory(config, out_dir, name)
+            trajectory.log(
+                "span", span_event("run.setup", setup_s, {**attributes, "rollout": index})
+            )
+            if agent_factory is not None:
+                agent = agent_factory(sandbox, trajectory)
+            else:
+                assert shared_client is not None
+                client = OpenAIChatClient(openai_config(config["llm"]), client=shared_client.client)
+                agent = Agent(client, sandbox, trajectory, _agent_config(task, config))
+            return _run_episode(
+                task, config, sandbox, trajectory, trajectory_path, agent, started, index
+            )
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            return list(pool.map(run_one, indices))
+    finally:
+        base.teardown()
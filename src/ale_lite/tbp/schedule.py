@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import statistics
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from ale_lite.tbp.manifest import RunManifest
+
+SCHEDULE_ORDERS = ("name", "longest", "shortest")
+DEFAULT_TASK_S = 300.0
+
+
+def load_durations(run_dirs: Iterable[Path]) -> Dict[str, List[float]]:
+    """Recorded episode durations per task id from the run manifests of ``run_dirs``."""
+    durations: Dict[str, List[float]] = {}
+    for run_dir in run_dirs:
+        for entry in RunManifest(run_dir).entries.values():
+            if entry.duration_s > 0:
+                durations.setdefault(entry.task_id, []).append(entry.duration_s)
+    return durations
+
+
+def estimate_durations(
+    task_ids: Iterable[str],
+    history: Mapping[str, Sequence[float]],
+    default_s: float | None = None,
+) -> Dict[str, float]:
+    """Mean recorded duration per task; unseen tasks get ``default_s``, else the median of
+    the known task means, else ``DEFAULT_TASK_S``."""
+    means = {task_id: statistics.fmean(values) for task_id, values in history.items() if values}
+    if default_s is None:
+        default_s = statistics.median(means.values()) if means else DEFAULT_TASK_S
+    return {task_id: means.get(task_id, default_s) for task_id in task_ids}
+
+
+def order_by_estimate(
+    task_ids: Sequence[str], estimates: Mapping[str, float], order: str = "name"
+) -> List[str]:
+    """``longest`` first minimizes the makespan across workers; ``shortest`` first gives the
+    quickest feedback; ``name`` keeps the given order. Ties keep the given order."""
+    if order not in SCHEDULE_ORDERS:
+        raise ValueError(f"Unsupported schedule order: {order}")
+    if order == "name":
+        return list(task_ids)
+    sign = -1.0 if order == "longest" else 1.0
+    return sorted(task_ids, key=lambda task_id: sign * estimates[task_id])
+
+
+@dataclass
+class SuiteEta:
+    """Remaining wall time of a suite from per-task estimates, calibrated as tasks finish.
+
+    Estimates are scaled by (actual / estimated) seconds of the finished tasks, so a run on a
+    slower endpoint than the history corrects itself after the first few tasks.
+    """
+
+    workers: int
+    queued: Dict[str, float]
+    running: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    actual_s: float = 0.0
+    estimated_s: float = 0.0
+
+    @property
+    def scale(self) -> float:
+        return self.actual_s / self.estimated_s if self.estimated_s > 0 else 1.0
+
+    def expected_s(self, task_id: str) -> float:
+        return self.queued[task_id] * self.scale
+
+    def start(self, task_id: str, now: float) -> None:
+        self.running[task_id] = (now, self.queued.pop(task_id))
+
+    def skip(self, task_id: str) -> None:
+        self.queued.pop(task_id, None)
+
+    def finish(self, task_id: str, now: float) -> None:
+        started, estimate = self.running.pop(task_id)
+        self.actual_s += now - started
+        self.estimated_s += estimate
+
+    def eta_s(self, now: float) -> float:
+        scale = self.scale
+        remaining = [estimate * scale for estimate in self.queued.values()]
+        remaining += [
+            max(0.0, estimate * scale - (now - started))
+            for started, estimate in self.running.values()
+        ]
+        if not remaining:
+            return 0.0
+        return max(sum(remaining) / max(1, self.workers), max(remaining))
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(max(0.0, seconds)))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
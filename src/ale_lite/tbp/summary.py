@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from ale_lite.tbp.runner import RunResult
+
+SUMMARY_NAME = "suite_summary.json"
+
+
+@dataclass
+class UsageTotals:
+    tasks: int = 0
+    successes: int = 0
+    score: float = 0.0
+    episode_time_s: float = 0.0
+    llm_time_s: float = 0.0
+    tool_time_s: float = 0.0
+    llm_calls: int = 0
+    tool_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    wasted_steps: int = 0
+
+    def add(self, result: RunResult) -> None:
+        usage = result.usage
+        self.tasks += 1
+        self.successes += int(result.success)
+        self.score += result.score
+        self.episode_time_s += result.duration_s
+        self.llm_time_s += float(usage.get("llm_time_s", 0.0))
+        self.tool_time_s += float(usage.get("tool_time_s", 0.0))
+        self.llm_calls += int(usage.get("llm_calls", 0))
+        self.tool_calls += int(usage.get("tool_calls", 0))
+        self.prompt_tokens += int(usage.get("prompt_tokens", 0))
+        self.completion_tokens += int(usage.get("completion_tokens", 0))
+        self.wasted_steps += int(usage.get("wasted_steps", 0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        total_tokens = self.prompt_tokens + self.completion_tokens
+        data: Dict[str, Any] = asdict(self)
+        data.update(
+            {
+                "total_tokens": total_tokens,
+                "success_rate": self.successes / self.tasks if self.tasks else 0.0,
+                "mean_score": self.score / self.tasks if self.tasks else 0.0,
+                "tokens_per_success": total_tokens / self.successes if self.successes else None,
+                "completion_tokens_per_llm_s": (
+                    self.completion_tokens / self.llm_time_s if self.llm_time_s > 0 else None
+                ),
+            }
+        )
+        return data
+
+
+def pass_at_k(n: int, c: int, k: int) -> float:
+    """Unbiased pass@k from ``n`` rollouts of which ``c`` succeeded."""
+    if n - c < k:
+        return 1.0
+    return 1.0 - math.comb(n - c, k) / math.comb(n, k)
+
+
+def pass_at_k_report(results: Iterable[RunResult]) -> Dict[str, float]:
+    """Mean pass@k over tasks for k = 1, 2, 4, ... and the smallest rollout count."""
+    counts: Dict[str, Tuple[int, int]] = {}
+    for result in results:
+        n, c = counts.get(result.task_id, (0, 0))
+        counts[result.task_id] = (n + 1, c + int(result.success))
+    if not counts:
+        return {}
+    max_k = min(n for n, _ in counts.values())
+    ks: List[int] = [k for k in (2**power for power in range(max_k.bit_length())) if k < max_k]
+    ks.append(max_k)
+    return {
+        f"pass@{k}": sum(pass_at_k(n, c, k) for n, c in counts.values()) / len(counts)
+        for k in ks
+    }
+
+
+def summarize_results(
+    results: Iterable[RunResult], wall_time_s: float | None = None
+) -> Dict[str, Any]:
+    """Usage totals overall and per model.
+
+    ``episode_time_s`` sums episode durations, so it exceeds the elapsed time when episodes
+    run concurrently; the suite's own elapsed time is reported as ``wall_time_s`` when given.
+    """
+    overall = UsageTotals()
+    models: Dict[str, UsageTotals] = {}
+    rollouts: List[RunResult] = []
+    for result in results:
+        overall.add(result)
+        models.setdefault(result.model or "unknown", UsageTotals()).add(result)
+        if result.rollout is not None:
+            rollouts.append(result)
+    summary: Dict[str, Any] = {
+        "overall": overall.to_dict(),
+        "models": {name: totals.to_dict() for name, totals in sorted(models.items())},
+    }
+    if wall_time_s is not None:
+        summary["wall_time_s"] = wall_time_s
+    if rollouts:
+        summary["pass_at_k"] = pass_at_k_report(rollouts)
+    return summary
+
+
+def write_suite_summary(
+    results: Iterable[RunResult], out_dir: Path, wall_time_s: float | None = None
+) -> Dict[str, Any]:
+    summary = summarize_results(results, wall_time_s)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / SUMMARY_NAME
+    path.write_text(json.dumps(summary, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return summary
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from ale_lite.roll.ipa import assign_rewards, chunk_trajectory
+from ale_lite.roll.ipa import _split_micro_steps, assign_rewards, chunk_trajectory
 
 
 def test_chunking_and_ipa() -> None:
@@ -28,3 +28,17 @@ def test_chunking_and_ipa() -> None:
     scored = assign_rewards(chunks, final_reward=1.0)
     assert scored[-1]["reward"] >= scored[0]["reward"]
     assert "advantage" in scored[0]
+
+
+def test_micro_steps_share_source_text() -> None:
+    content = "plan <micro-step> read </micro-step>\n<micro-step>write</micro-step> done"
+    events = [
+        {"type": "tool", "payload": {"name": "terminal.exec", "result": {"exit_code": 1}}},
+        {"type": "message", "payload": {"role": "assistant", "content": content}},
+    ]
+    chunks = chunk_trajectory(events)
+    assert [chunk.assistant_text for chunk in chunks] == ["plan", "read", "write", "done"]
+    assert len(chunks[0].tool_calls) == 1
+    assert all(not chunk.tool_calls for chunk in chunks[1:])
+    assert _split_micro_steps("a <micro-step> unterminated") == ["a", "unterminated"]
+    assert _split_micro_steps("  plain  ") == ["  plain  "]
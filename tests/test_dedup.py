@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from ale_lite.roll.dedup import (
+    NearDuplicateFilter,
+    dedup_chunks,
+    dpo_text,
+    lsh_params,
+    shingles,
+)
+
+
+def test_lsh_params_track_threshold() -> None:
+    bands, rows = lsh_params(0.8, 64)
+    assert bands * rows <= 64
+    assert abs((1 / bands) ** (1 / rows) - 0.8) < 0.05
+
+
+def test_near_duplicate_dpo_records_are_removed() -> None:
+    base = "run the unit tests with pytest and then fix the failing assertion in math utils"
+    records = [
+        {"prompt": "p", "chosen": base, "rejected": "no"},
+        {"prompt": "p", "chosen": base + " now", "rejected": "no"},
+        {"prompt": "p", "chosen": "list the directory contents to find the config", "rejected": "no"},
+    ]
+    dedup = NearDuplicateFilter(threshold=0.7)
+    kept = list(dedup.filter(records, dpo_text))
+    assert [record["chosen"] for record in kept] == [base, records[2]["chosen"]]
+    assert dedup.stats.removed == 1
+    assert dedup.stats.seen == 3
+
+
+def test_dedup_chunks_drops_repeated_rollouts() -> None:
+    def record(text: str) -> dict[str, object]:
+        chunk = {"assistant_text": text, "tool_calls": [{"name": "terminal.exec", "arguments": {}}]}
+        return {"chunks": [{"chunk": chunk, "reward": 1.0}]}
+
+    records = [record("cat note.txt"), record("cat note.txt"), record("echo fixed > note.txt")]
+    kept = list(dedup_chunks(records, NearDuplicateFilter(threshold=0.9)))
+    assert len(kept) == 2
+
+
+def test_index_is_bounded() -> None:
+    dedup = NearDuplicateFilter(threshold=0.8, max_index_entries=10)
+    for index in range(50):
+        dedup.is_duplicate(f"completely different text number {index} " * 3)
+    assert len(dedup._index) <= 10
+
+
+def test_texts_shorter_than_a_shingle_are_kept() -> None:
+    assert shingles("") == set()
+    assert shingles("git status") == set()
+    dedup = NearDuplicateFilter(threshold=0.8)
+    assert not any(dedup.is_duplicate(text) for text in ["", "", "ok", "ls", "ok"])
+    assert dedup.stats.kept == 5
+    assert not dedup._index
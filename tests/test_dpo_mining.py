@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from ale_lite.roll.mining import MinerConfig, mine_dpo_pairs
+
+
+def _record(task_id: str, rewards_and_texts: list[tuple[float, str]]) -> dict[str, object]:
+    return {
+        "task_id": task_id,
+        "chunks": [
+            {
+                "chunk": {
+                    "state_summary": "{}",
+                    "assistant_text": text,
+                    "tool_calls": [],
+                    "observations": [{"content": f"obs {index}"}],
+                    "outcome_features": {},
+                },
+                "reward": reward,
+                "advantage": 0.0,
+            }
+            for index, (reward, text) in enumerate(rewards_and_texts)
+        ],
+    }
+
+
+def test_mining_pairs_across_trajectories_of_same_task() -> None:
+    records = [
+        _record("a", [(0.1, "a-bad"), (0.5, "a-x")]),
+        _record("a", [(0.9, "a-good"), (0.5, "a-y")]),
+        _record("a", [(0.4, "a-mid"), (0.5, "a-z")]),
+        _record("b", [(1.0, "b-only")]),
+    ]
+    pairs = list(mine_dpo_pairs(iter(records), MinerConfig(group_by="observation", top_k=2)))
+    # Equal rewards at "obs 1" give no signal, and task "b" has a single chunk.
+    assert pairs == [{"prompt": "{}\n\nobs 0", "chosen": "a-good", "rejected": "a-bad"}]
+
+
+def test_mining_respects_margin() -> None:
+    records = [_record("a", [(0.5, "x")]), _record("a", [(0.55, "y")])]
+    assert list(mine_dpo_pairs(records, MinerConfig(min_margin=0.1))) == []
+    assert len(list(mine_dpo_pairs(records, MinerConfig(min_margin=0.01)))) == 1
+
+
+def test_mining_spills_groups_past_max_groups(tmp_path) -> None:
+    records = [
+        _record(f"t{task}", [(0.1 * rollout, f"t{task}-{rollout}-{i}") for i in range(3)])
+        for rollout in range(4)
+        for task in range(25)
+    ]
+    expected = list(mine_dpo_pairs(records, MinerConfig(top_k=2)))
+    config = MinerConfig(top_k=2, max_groups=4, spill_partitions=3, tmp_dir=tmp_path)
+    spilled = list(mine_dpo_pairs(records, config))
+
+    def key(pair: dict[str, str]) -> tuple[str, ...]:
+        return tuple(sorted(pair.items()))
+
+    assert len(expected) == 150
+    assert sorted(spilled, key=key) == sorted(expected, key=key)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from ale_lite.roll.stream import StreamPosition, resolve_shards, shuffle_buffer, stream_records
+
+
+def _write_shards(directory: Path, shards: int, per_shard: int) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    for shard in range(shards):
+        rows = [
+            {"prompt": f"p{shard}-{i}", "chosen": "good", "rejected": "bad"}
+            for i in range(per_shard)
+        ]
+        (directory / f"part-{shard:03d}.jsonl").write_text(
+            "".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8"
+        )
+
+
+def test_resolve_shards(tmp_path: Path) -> None:
+    _write_shards(tmp_path / "data", 3, 1)
+    assert [p.name for p in resolve_shards(str(tmp_path / "data"))] == [
+        "part-000.jsonl",
+        "part-001.jsonl",
+        "part-002.jsonl",
+    ]
+    assert len(resolve_shards(str(tmp_path / "data" / "part-00[01].jsonl"))) == 2
+    with pytest.raises(FileNotFoundError):
+        resolve_shards(str(tmp_path / "missing" / "*.jsonl"))
+
+
+def test_shuffle_buffer_is_a_bounded_permutation() -> None:
+    items = list(range(100))
+    shuffled = list(shuffle_buffer(items, 10, random.Random(0)))
+    assert sorted(shuffled) == items and shuffled != items
+    # An item can only move ahead of at most buffer-size earlier items.
+    assert all(shuffled.index(i) >= i - 10 for i in items)
+    assert list(shuffle_buffer(items, 1, random.Random(0))) == items
+
+
+def test_stream_is_deterministic_and_resumable(tmp_path: Path) -> None:
+    _write_shards(tmp_path, 4, 5)
+    shards = resolve_shards(str(tmp_path))
+    full = [r["prompt"] for r in stream_records(shards, buffer_size=4, seed=7, epochs=2)]
+    assert len(full) == 40
+    assert sorted(full[:20]) == sorted(full[20:]) and full[:20] != full[20:]
+
+    resumed = [r["prompt"] for r in stream_records(shards, 4, seed=7, start=13, epochs=2)]
+    assert resumed == full[13:]
+
+    StreamPosition(samples=13).write(tmp_path / "checkpoint-3")
+    assert StreamPosition.read(tmp_path / "checkpoint-3").samples == 13
+    assert StreamPosition.read(tmp_path / "checkpoint-4").samples == 0
+
+
+def test_stream_of_empty_dataset_ends(tmp_path: Path) -> None:
+    (tmp_path / "empty.jsonl").write_text("", encoding="utf-8")
+    assert list(stream_records([tmp_path / "empty.jsonl"])) == []
+
+
+def test_streaming_train_resumes_from_checkpoint(tmp_path: Path) -> None:
+    for module in ("torch", "transformers", "trl", "peft", "datasets", "accelerate", "tokenizers"):
+        pytest.importorskip(module)
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+    from ale_lite.roll.train_dpo import TrainConfig, train_dpo
+
+    words = ["<pad>", "<eos>", "<unk>", "good", "bad"]
+    backend = Tokenizer(models.WordLevel({w: i for i, w in enumerate(words)}, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=backend, pad_token="<pad>", eos_token="<eos>", unk_token="<unk>"
+    )
+    model = GPT2LMHeadModel(
+        GPT2Config(vocab_size=len(words), n_positions=32, n_embd=16, n_layer=1, n_head=2)
+    )
+    model.save_pretrained(tmp_path / "tiny")
+    tokenizer.save_pretrained(tmp_path / "tiny")
+    _write_shards(tmp_path / "data", 2, 4)
+    config = TrainConfig(
+        model_name_or_path=str(tmp_path / "tiny"),
+        dataset_path=str(tmp_path / "data"),
+        output_dir=str(tmp_path / "out"),
+        full_finetune=True,
+        batch_size=2,
+        streaming=True,
+        shuffle_buffer_size=3,
+        max_steps=2,
+        save_steps=1,
+        use_cpu=True,
+    )
+    stats = train_dpo(config)
+    assert stats.samples >= 4 and stats.tokens > 0
+    checkpoint = tmp_path / "out" / "checkpoint-1"
+    assert StreamPosition.read(checkpoint).samples == 2
+
+    config.max_steps = 3
+    config.resume_from_checkpoint = str(checkpoint)
+    train_dpo(config)
+    assert StreamPosition.read(tmp_path / "out" / "checkpoint-3").samples == 6
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from ale_lite.roll.ipa import TOOL_ERROR_PENALTY, Chunk, assign_rewards, has_tool_error
+
+np = pytest.importorskip("numpy")
+
+from ale_lite.roll.ipa_batch import batch_rewards, build_batch  # noqa: E402
+
+
+def _chunk(exit_code: int | None) -> Chunk:
+    calls = [] if exit_code is None else [{"name": "run", "result": {"exit_code": exit_code}}]
+    return Chunk("{}", "text", calls, [], {})
+
+
+def _random_trajectories(seed: int) -> tuple[list[list[Chunk]], list[float]]:
+    rng = random.Random(seed)
+    trajectories = [
+        [_chunk(rng.choice([None, 0, 1])) for _ in range(rng.randint(0, 12))] for _ in range(200)
+    ]
+    return trajectories, [rng.random() for _ in trajectories]
+
+
+def test_position_mode_matches_assign_rewards() -> None:
+    trajectories, finals = _random_trajectories(7)
+    rewards, advantages = batch_rewards(build_batch(trajectories, finals))
+    expected = [
+        item
+        for chunks, final in zip(trajectories, finals, strict=True)
+        for item in assign_rewards(chunks, final)
+    ]
+    assert rewards.tolist() == [item["reward"] for item in expected]
+    assert advantages.tolist() == [item["advantage"] for item in expected]
+
+
+def test_discounted_and_gae_returns() -> None:
+    trajectories = [[_chunk(None), _chunk(1), _chunk(0)], [_chunk(None)]]
+    batch = build_batch(trajectories, [1.0, 0.5])
+
+    returns, _ = batch_rewards(batch, mode="discounted", gamma=0.5)
+    assert returns.tolist() == pytest.approx([0.2, 0.4, 1.0, 0.5])
+
+    values = np.zeros(4)
+    rewards, advantages = batch_rewards(batch, mode="gae", gamma=0.5, lam=1.0, values=values)
+    # With zero values and lam=1, GAE reduces to the discounted return.
+    assert advantages.tolist() == pytest.approx([0.2, 0.4, 1.0, 0.5])
+    assert rewards.tolist() == pytest.approx(advantages.tolist())
+
+
+def _scalar_returns(rewards: list[float], discount: float) -> list[float]:
+    out, acc = [], 0.0
+    for reward in reversed(rewards):
+        acc = reward + discount * acc
+        out.append(acc)
+    return out[::-1]
+
+
+@pytest.mark.parametrize("gamma,length", [(0.5, 80), (0.9, 400), (0.5, 1200)])
+def test_discounted_returns_are_independent_of_the_batch(gamma: float, length: int) -> None:
+    rng = random.Random(length)
+    trajectories = [[_chunk(rng.choice([None, 0, 1])) for _ in range(n)] for n in (length, 7, 0)]
+    finals = [1.0, 0.25, 0.5]
+    batch = build_batch(trajectories, finals)
+    with np.errstate(all="raise"):
+        returns, _ = batch_rewards(batch, mode="discounted", gamma=gamma)
+        advantages = batch_rewards(batch, mode="gae", gamma=gamma, values=np.zeros(length + 7))[1]
+
+    offset = 0
+    for chunks, final in zip(trajectories, finals, strict=True):
+        alone, _ = batch_rewards(build_batch([chunks], [final]), mode="discounted", gamma=gamma)
+        steps = [-TOOL_ERROR_PENALTY if has_tool_error(chunk) else 0.0 for chunk in chunks]
+        if steps:
+            steps[-1] += final
+        expected = _scalar_returns(steps, gamma)
+        assert returns[offset : offset + len(chunks)].tolist() == alone.tolist()
+        assert alone.tolist() == pytest.approx(expected, abs=1e-12)
+        expected_gae = _scalar_returns(steps, gamma * 0.95)
+        assert advantages[offset : offset + len(chunks)].tolist() == pytest.approx(
+            expected_gae, abs=1e-12
+        )
+        offset += len(chunks)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from ale_lite.roll.ipa import (
+    NormalizedEncoder,
+    assign_rewards,
+    chunk_trajectory,
+    iter_ipa_scored,
+    scored_chunk,
+    write_ipa_scored,
+)
+
+
+def _events(task: int) -> list[dict[str, object]]:
+    return [
+        {"type": "config", "payload": {"model": "x"}},
+        {"type": "tool", "payload": {"name": "terminal.exec", "result": {"exit_code": task}}},
+        {"type": "message", "payload": {"role": "tool", "content": f"out {task}"}},
+        {
+            "type": "message",
+            "payload": {"role": "assistant", "content": "a <micro-step>b</micro-step>"},
+        },
+        {"type": "outcome", "payload": {"score": 1.0}},
+    ]
+
+
+def _write(path: Path, layout: str, drop_events: bool = False) -> None:
+    encoder = NormalizedEncoder(drop_events=drop_events)
+    lines = []
+    for task in range(3):
+        record = {"task_id": str(task), "events": _events(task)}
+        chunks = chunk_trajectory(record["events"], with_refs=layout == "normalized")
+        scored = [
+            (item["chunk"], item["reward"], item["advantage"])
+            for item in assign_rewards(chunks, 1.0)
+        ]
+        if layout == "normalized":
+            lines.extend(encoder.encode(record, scored))
+        else:
+            record["chunks"] = [scored_chunk(*item) for item in scored]
+            lines.append(record)
+    write_ipa_scored(lines, path)
+
+
+def test_normalized_layout_round_trips(tmp_path: Path) -> None:
+    _write(tmp_path / "inline.jsonl", "inline")
+    _write(tmp_path / "normalized.jsonl", "normalized")
+    _write(tmp_path / "dropped.jsonl", "normalized", drop_events=True)
+
+    raw = [json.loads(line) for line in (tmp_path / "normalized.jsonl").read_text().splitlines()]
+    assert [line for line in raw if "state" in line and len(line) == 1] == [
+        {"state": {"id": 0, "summary": '{"model": "x"}'}}
+    ]
+    assert raw[1]["chunks"][0]["tools"] == [1]
+
+    inline = [record["chunks"] for record in iter_ipa_scored(tmp_path / "inline.jsonl")]
+    for name in ("normalized.jsonl", "dropped.jsonl"):
+        records = list(iter_ipa_scored(tmp_path / name))
+        assert [record["chunks"] for record in records] == inline
+    assert all("events" not in record for record in records)
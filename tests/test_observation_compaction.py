@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from ale_lite.iflow.observation import compact_observation
+from ale_lite.iflow.tools import dispatch_tool_args
+from ale_lite.rock.local_sandbox import LocalSandbox
+from ale_lite.rock.sandbox import SandboxConfig
+
+
+def test_small_output_only_loses_terminal_noise() -> None:
+    text = "\x1b[31mred\x1b[0m\n 10%|##        |\r100%|##########|\nok\r\n"
+    assert compact_observation(text, 100) == ("red\n100%|##########|\nok\n", False)
+
+
+def test_large_output_keeps_head_and_tail_with_fetch_marker() -> None:
+    lines = [f"test_{index} PASSED" for index in range(300)]
+    lines += ["warning: deprecated"] * 40 + ["E   AssertionError: boom", "1 failed"]
+    output, truncated = compact_observation("\n".join(lines), 100, " (sed -n '{start},{end}p')")
+
+    assert truncated
+    assert len(output) <= 100 * 4 + 100
+    assert output.startswith("test_0 PASSED")
+    assert output.endswith("E   AssertionError: boom\n1 failed")
+    assert "[previous line repeated 39 more times]" in output
+    marker = next(line for line in output.splitlines() if line.startswith("[... lines"))
+    start, end = marker.split()[2].split("-")
+    assert f"(sed -n '{start},{end}p')" in marker
+    assert f"test_{int(start) - 1} PASSED" not in output
+
+
+def test_long_tables_keep_header_and_last_rows() -> None:
+    table = "\n".join(f"| {index} | name{index} |" for index in range(100))
+    output, truncated = compact_observation(table, 60)
+    assert truncated
+    assert "| 0 | name0 |" in output and "| 99 | name99 |" in output
+    assert "[... 92 table rows elided (lines 6-97) ...]" in output
+
+
+def test_dispatch_applies_per_tool_budget() -> None:
+    sandbox = LocalSandbox(SandboxConfig())
+    sandbox.create_workspace()
+    sandbox.write_file("big.txt", "\n".join(f"line {index}" for index in range(1000)))
+
+    result = dispatch_tool_args(
+        sandbox, "filesystem.read", {"path": "big.txt"}, {"filesystem.read": 50}
+    )
+    assert result.truncated
+    assert "sed -n" in result.output and "big.txt" in result.output
+    assert result.output.endswith("line 999")
+    assert len(result.raw["content"].splitlines()) == 1000
+
+    untouched = dispatch_tool_args(sandbox, "filesystem.read", {"path": "big.txt"})
+    assert untouched.truncated
+    assert len(untouched.output) > len(result.output)
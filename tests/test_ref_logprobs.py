@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from ale_lite.roll.train_dpo import TrainConfig
+
+
+def _tiny_model_and_tokenizer() -> tuple[Any, Any]:
+    for module in ("torch", "transformers", "tokenizers"):
+        pytest.importorskip(module)
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+    torch.manual_seed(0)
+    words = ["<pad>", "<eos>", "<unk>", "fix", "the", "bug", "ignore", "it", "task"]
+    backend = Tokenizer(models.WordLevel({w: i for i, w in enumerate(words)}, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=backend, pad_token="<pad>", eos_token="<eos>", unk_token="<unk>"
+    )
+    model = GPT2LMHeadModel(
+        GPT2Config(vocab_size=len(words), n_positions=32, n_embd=16, n_layer=1, n_head=2)
+    )
+    return model.eval(), tokenizer
+
+
+def test_completion_logprobs_ignore_padding_and_prompt() -> None:
+    model, _ = _tiny_model_and_tokenizer()
+    import torch
+
+    from ale_lite.roll.ref_logprobs import completion_logprobs
+
+    prompt, completion = [8, 8], [3, 4, 5, 1]
+    with torch.no_grad():
+        logits = model(input_ids=torch.tensor([prompt + completion])).logits[0]
+    logprobs = torch.log_softmax(logits, dim=-1)
+    expected = sum(
+        logprobs[len(prompt) - 1 + k, token].item() for k, token in enumerate(completion)
+    )
+
+    single = completion_logprobs(model, [prompt], [completion], pad_token_id=0)
+    batched = completion_logprobs(model, [prompt, [8]], [completion, [6, 7, 1, 1, 1, 1, 1]], 0)
+    assert single[0] == pytest.approx(expected, abs=1e-5)
+    assert batched[0] == pytest.approx(expected, abs=1e-5)
+
+
+def test_precompute_then_train_without_reference_model(tmp_path: Path) -> None:
+    model, tokenizer = _tiny_model_and_tokenizer()
+    from ale_lite.roll.ref_logprobs import precompute_ref_logprobs
+
+    dataset = tmp_path / "dpo.jsonl"
+    dataset.write_text(
+        "".join(
+            json.dumps(
+                {"prompt": "task " * (i + 1), "chosen": "fix the bug", "rejected": "ignore it"}
+            )
+            + "\n"
+            for i in range(4)
+        ),
+        encoding="utf-8",
+    )
+    config = TrainConfig(
+        model_name_or_path="tiny",
+        dataset_path=str(dataset),
+        output_dir=str(tmp_path / "out"),
+        full_finetune=True,
+        batch_size=2,
+        max_prompt_length=3,
+        max_completion_length=4,
+        use_cpu=True,
+    )
+    out = tmp_path / "dpo_ref.jsonl"
+    assert precompute_ref_logprobs(config, out, batch_size=3, model=model, tokenizer=tokenizer) == 4
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert all(r["ref_chosen_logps"] < 0 and r["ref_rejected_logps"] < 0 for r in records)
+
+    for module in ("trl", "peft", "datasets", "accelerate"):
+        pytest.importorskip(module)
+    from ale_lite.roll.train_dpo import train_dpo
+
+    config.dataset_path = str(out)
+    stats = train_dpo(config, model=model, tokenizer=tokenizer)
+    assert stats.samples == 4
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from ale_lite.iflow.cli import app
+from ale_lite.iflow.trajectory import TrajectoryWriter, config_event, tool_event
+
+
+def _write(path: Path, expected_stdout: str) -> None:
+    writer = TrajectoryWriter(path)
+    writer.log("config", config_event({}, {"type": "local", "network_enabled": False}, {}))
+    for _ in range(2):
+        writer.log(
+            "tool",
+            tool_event(
+                "terminal.exec",
+                {"cmd": "echo hi", "timeout_s": 10},
+                {"stdout": expected_stdout, "stderr": "", "exit_code": 0},
+            ),
+        )
+    writer.close()
+
+
+def test_replay_all_reports_divergence(tmp_path: Path) -> None:
+    runs = tmp_path / "runs"
+    _write(runs / "same_trajectory.jsonl", "hi\n")
+    _write(runs / "drift_trajectory.jsonl", "bye\n")
+    report = tmp_path / "report.json"
+    result = CliRunner().invoke(
+        app,
+        [
+            "replay-all",
+            "--runs",
+            str(runs),
+            "--workers",
+            "2",
+            "--report",
+            str(report),
+            "--stop-on-divergence",
+        ],
+    )
+    assert result.exit_code == 1
+    assert "drift_trajectory.jsonl: tool[0] terminal.exec" in result.output
+    data = json.loads(report.read_text(encoding="utf-8"))
+    assert data["trajectories"] == 2
+    assert data["diverged"] == 1
+    by_name = {Path(item["path"]).name: item for item in data["results"]}
+    assert by_name["same_trajectory.jsonl"]["diffs"] == []
+    assert len(by_name["drift_trajectory.jsonl"]["diffs"]) == 1
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from ale_lite.roll.shuffle import shuffle_split, split_for
+
+
+def _write(path: Path, tasks: int, per_task: int) -> list[str]:
+    lines = [
+        json.dumps({"task_id": f"task-{task}", "rollout": rollout, "events": ["x" * 50]})
+        for task in range(tasks)
+        for rollout in range(per_task)
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return lines
+
+
+def _read(path: Path) -> list[str]:
+    return path.read_text(encoding="utf-8").splitlines()
+
+
+def test_shuffle_split_groups_tasks_and_shuffles(tmp_path: Path) -> None:
+    lines = _write(tmp_path / "raw.jsonl", tasks=40, per_task=5)
+    stats = shuffle_split(
+        [tmp_path / "raw.jsonl"], tmp_path / "out", eval_fraction=0.25, seed=3, bucket_bytes=2048
+    )
+    train, eval_ = _read(tmp_path / "out" / "train.jsonl"), _read(tmp_path / "out" / "eval.jsonl")
+
+    assert stats.buckets > 1
+    assert sorted(train + eval_) == sorted(lines)
+    assert train != [line for line in lines if line in set(train)]
+    train_tasks = {json.loads(line)["task_id"] for line in train}
+    eval_tasks = {json.loads(line)["task_id"] for line in eval_}
+    assert not train_tasks & eval_tasks and eval_tasks
+    assert stats.records == {"train": len(train), "eval": len(eval_)}
+    assert sorted(path.name for path in (tmp_path / "out").iterdir()) == [
+        "eval.jsonl",
+        "train.jsonl",
+    ]
+
+    shuffle_split(
+        [tmp_path / "raw.jsonl"], tmp_path / "again", eval_fraction=0.25, seed=3, bucket_bytes=2048
+    )
+    assert _read(tmp_path / "again" / "train.jsonl") == train
+
+
+def test_split_is_stable_per_group() -> None:
+    assert split_for("task-1", 0.0, seed=0) == "train"
+    assert split_for("task-1", 1.0, seed=0) == "eval"
+    assert {split_for("task-7", 0.5, seed=1) for _ in range(3)} == {split_for("task-7", 0.5, 1)}
+
+
+def test_records_without_group_key_are_counted(tmp_path: Path) -> None:
+    (tmp_path / "dpo.jsonl").write_text(
+        "".join(json.dumps({"prompt": str(i)}) + "\n" for i in range(10)), encoding="utf-8"
+    )
+    stats = shuffle_split([tmp_path / "dpo.jsonl"], tmp_path / "out", eval_fraction=0.5)
+    assert stats.ungrouped == 10
+    assert sum(stats.records.values()) == 10
+
+
+def test_existing_tmp_dir_is_left_in_place(tmp_path: Path) -> None:
+    _write(tmp_path / "raw.jsonl", tasks=5, per_task=2)
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    (scratch / "precious.txt").write_text("keep", encoding="utf-8")
+    shuffle_split([tmp_path / "raw.jsonl"], tmp_path / "out", tmp_dir=scratch)
+    assert [path.name for path in scratch.iterdir()] == ["precious.txt"]
+    assert (scratch / "precious.txt").read_text(encoding="utf-8") == "keep"
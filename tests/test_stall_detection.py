@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from ale_lite.api.openai_client import OpenAIConfig
+from ale_lite.iflow.agent import Agent, AgentConfig
+from ale_lite.iflow.prompts import TaskSpec
+from ale_lite.iflow.stall import StallDetector, call_fingerprint
+from ale_lite.iflow.trajectory import TrajectoryWriter, load_trajectory
+from ale_lite.rock.local_sandbox import LocalSandbox
+from ale_lite.rock.sandbox import SandboxConfig
+
+
+class LoopingClient:
+    """Runs the same command forever, recording what each request allowed."""
+
+    def __init__(self) -> None:
+        self.config = OpenAIConfig(base_url="http://", api_key="x", model="x")
+        self.requests: list[tuple[list[str], str]] = []
+
+    def chat(self, messages, tools=None, tool_choice=None, max_retries=3):
+        self.requests.append(([tool["function"]["name"] for tool in tools], tool_choice))
+        call = {
+            "id": "1",
+            "type": "function",
+            "function": {"name": "terminal.exec", "arguments": '{"cmd": "echo same"}'},
+        }
+        return {"content": "", "tool_calls": [call], "usage": {}}
+
+
+def test_detector_flags_repeats_and_cycles_but_not_progress() -> None:
+    detector = StallDetector(window=6, patience=2)
+    stalls = [detector.observe(step, fingerprint) for step, fingerprint in enumerate("ABAB")]
+    assert stalls[:3] == [None, None, None]
+    assert stalls[3] is not None and stalls[3].action == "nudge"
+    assert detector.wasted_steps == 2
+
+    detector = StallDetector(window=6, patience=2)
+    # Re-running the same failing test between different edits is progress.
+    for step, fingerprint in enumerate(["test", "edit1", "test", "edit2", "test"]):
+        assert detector.observe(step, fingerprint) is None
+
+    detector = StallDetector(window=6, patience=1, actions=["nudge", "terminate"])
+    actions = [detector.observe(i, "reply") for i in range(4)]
+    assert [stall.action if stall else None for stall in actions] == [
+        None,
+        "nudge",
+        "terminate",
+        "terminate",
+    ]
+    with pytest.raises(ValueError):
+        StallDetector(actions=["explode"])
+
+
+def test_fingerprint_ignores_injected_timeout() -> None:
+    first = call_fingerprint("terminal.exec", {"cmd": "ls", "timeout_s": 59.1}, "out")
+    assert first == call_fingerprint("terminal.exec", {"cmd": "ls", "timeout_s": 12.0}, "out")
+    assert first != call_fingerprint("terminal.exec", {"cmd": "ls"}, "other out")
+
+
+def _run_loop(path: Path, config: AgentConfig) -> tuple[LoopingClient, object]:
+    sandbox = LocalSandbox(SandboxConfig())
+    sandbox.create_workspace()
+    client = LoopingClient()
+    result = Agent(client, sandbox, TrajectoryWriter(path), config).run(
+        TaskSpec(goal="g", evaluation="e")
+    )
+    sandbox.teardown()
+    return client, result
+
+
+def test_agent_escalates_and_stops_a_loop(tmp_path: Path) -> None:
+    path = tmp_path / "t_trajectory.jsonl"
+    config = AgentConfig(
+        max_steps=40, stall_window=8, stall_actions=["nudge", "force_tool", "terminate"]
+    )
+    client, result = _run_loop(path, config)
+
+    assert result.outcome == "stalled"
+    assert len(client.requests) == 7
+    assert result.usage.wasted_steps == 6
+    events = load_trajectory(path)
+    stalls = [event["payload"] for event in events if event["type"] == "stall"]
+    assert [stall["action"] for stall in stalls] == ["nudge", "force_tool", "terminate"]
+    assert stalls[-1]["wasted_steps"] == 6
+    assert any(
+        event["type"] == "message" and event["payload"]["role"] == "user" for event in events
+    )
+    forced_tools, forced_choice = client.requests[5]
+    assert forced_choice == "required" and "terminal.exec" not in forced_tools
+    assert client.requests[6][1] == "auto"
+
+
+def test_default_actions_never_terminate(tmp_path: Path) -> None:
+    config = AgentConfig(max_steps=12, stall_window=8)
+    client, result = _run_loop(tmp_path / "t_trajectory.jsonl", config)
+    assert result.outcome != "stalled"
+    assert len(client.requests) == 12
+    assert result.usage.wasted_steps == 11
+
+
+def test_default_config_never_intervenes(tmp_path: Path) -> None:
+    path = tmp_path / "t_trajectory.jsonl"
+    client, result = _run_loop(path, AgentConfig(max_steps=12))
+    assert result.outcome == "max_steps"
+    assert [choice for _, choice in client.requests] == ["auto"] * 12
+    assert all("terminal.exec" in tools for tools, _ in client.requests)
+    events = load_trajectory(path)
+    assert not [event for event in events if event["type"] == "stall"]
+    assert not any(
+        event["type"] == "message" and event["payload"]["role"] == "user" for event in events
+    )
+    assert result.usage.wasted_steps == 0
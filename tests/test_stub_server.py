@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from ale_lite.api.openai_client import OpenAIChatClient, OpenAIConfig
+from ale_lite.api.stub_server import StubScript, StubServer
+from ale_lite.iflow.agent import Agent, AgentConfig
+from ale_lite.iflow.prompts import TaskSpec
+from ale_lite.iflow.trajectory import TrajectoryWriter
+from ale_lite.rock.local_sandbox import LocalSandbox
+from ale_lite.rock.sandbox import SandboxConfig
+
+
+def test_stub_server_drives_full_episode(tmp_path: Path) -> None:
+    sandbox = LocalSandbox(SandboxConfig())
+    sandbox.create_workspace()
+    with StubServer() as server:
+        client = OpenAIChatClient(OpenAIConfig(base_url=server.base_url, api_key="x", model="stub"))
+        agent = Agent(client, sandbox, TrajectoryWriter(tmp_path / "t_trajectory.jsonl"), AgentConfig())
+        result = agent.run(TaskSpec(goal="fix note", evaluation="file_contains"))
+        assert server.requests == 4
+    assert result.success is True
+    assert sandbox.read_file("note.txt") == "fixed\n"
+    sandbox.teardown()
+
+
+def test_stub_script_advances_past_working_memory(tmp_path: Path) -> None:
+    turns = [
+        {
+            "content": f"step {i}",
+            "tool_calls": [
+                {"name": "filesystem.write", "arguments": {"path": f"f{i}.txt", "content": "x"}}
+            ],
+        }
+        for i in range(30)
+    ]
+    turns.append({"content": "SUCCESS", "tool_calls": []})
+    sandbox = LocalSandbox(SandboxConfig())
+    sandbox.create_workspace()
+    with StubServer(StubScript(turns=turns)) as server:
+        client = OpenAIChatClient(OpenAIConfig(base_url=server.base_url, api_key="x", model="stub"))
+        config = AgentConfig(max_steps=31, memory_items=4)
+        agent = Agent(client, sandbox, TrajectoryWriter(tmp_path / "t_trajectory.jsonl"), config)
+        result = agent.run(TaskSpec(goal="write files", evaluation="e"))
+        assert server.requests == 31
+    assert result.success is True
+    assert sandbox.read_file("f29.txt") == "x"
+    sandbox.teardown()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from ale_lite.api.openai_client import OpenAIConfig
+from ale_lite.iflow.agent import Agent, AgentConfig
+from ale_lite.iflow.trajectory import TrajectoryWriter, load_trajectory
+from ale_lite.tbp.runner import run_task
+from ale_lite.tbp.summary import summarize_results
+from ale_lite.tbp.tasks import SuccessCriteria, TaskSpec
+
+
+class UsageClient:
+    def __init__(self) -> None:
+        self.config = OpenAIConfig(base_url="http://", api_key="x", model="m")
+        self.turns = [
+            {
+                "content": "",
+                "tool_calls": [
+                    {
+                        "id": "1",
+                        "type": "function",
+                        "function": {"name": "terminal.exec", "arguments": '{"cmd": "true"}'},
+                    }
+                ],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 10},
+            },
+            {
+                "content": "SUCCESS",
+                "tool_calls": [],
+                "usage": {"prompt_tokens": 150, "completion_tokens": 5},
+            },
+        ]
+
+    def chat(self, messages, tools=None, tool_choice=None, max_retries=3):
+        return self.turns.pop(0)
+
+
+def test_usage_rolls_up_into_outcome_and_suite(tmp_path: Path) -> None:
+    task = TaskSpec(
+        id="usage",
+        description="usage",
+        goal="g",
+        success_criteria=SuccessCriteria(type="command_exit_code", command="true"),
+    )
+
+    def factory(sandbox, trajectory: TrajectoryWriter) -> Agent:
+        return Agent(UsageClient(), sandbox, trajectory, AgentConfig())
+
+    config = {"llm": {"model": "m"}, "sandbox": {"backend": "local"}}
+    result = run_task(task, config, tmp_path, agent_factory=factory)
+    assert result.usage["prompt_tokens"] == 250
+    assert result.usage["completion_tokens"] == 15
+    assert result.usage["llm_calls"] == 2
+    assert result.usage["tool_calls"] == 1
+    outcome = next(e for e in load_trajectory(result.trajectory_path) if e["type"] == "outcome")
+    assert outcome["payload"]["usage"] == result.usage
+
+    summary = summarize_results([result, result], wall_time_s=result.duration_s)
+    assert summary["overall"]["total_tokens"] == 530
+    assert summary["overall"]["episode_time_s"] == 2 * result.duration_s
+    assert summary["wall_time_s"] == result.duration_s
+    assert summary["models"]["m"]["tokens_per_success"] == 265
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from ale_lite.api.openai_client import OpenAIChatClient, OpenAIConfig
+from ale_lite.api.stub_server import StubScript, StubServer
+from ale_lite.tbp.loadtest import (
+    LevelReport,
+    ramp,
+    run_level,
+    saturation_knee,
+    streaming_requester,
+)
+
+
+def _level(concurrency: int, rps: float) -> LevelReport:
+    return LevelReport(concurrency, 10, 0, 1.0, rps, 0.0)
+
+
+def test_saturation_knee() -> None:
+    assert saturation_knee([_level(1, 10), _level(2, 19), _level(4, 20)]) == 2
+    assert saturation_knee([_level(1, 10), _level(2, 19)]) is None
+
+
+def test_loadtest_ramp_against_stub_server() -> None:
+    script = StubScript(latency_s=0.02, ttft_s=0.01, loop=True)
+    with StubServer(script) as server:
+        client = OpenAIChatClient(OpenAIConfig(base_url=server.base_url, api_key="x", model="stub"))
+        reports = ramp(streaming_requester(client), [1, 2], duration_s=0.3, steps=3)
+    assert [report.concurrency for report in reports] == [1, 2]
+    for report in reports:
+        assert report.requests > 0
+        assert report.errors == 0
+        assert report.latency_s["p50"] >= 0.02
+        assert 0.01 <= report.ttft_s["p50"] <= report.latency_s["p99"]
+
+
+def test_streaming_requester_reads_server_usage() -> None:
+    with StubServer(StubScript()) as server:
+        client = OpenAIChatClient(OpenAIConfig(base_url=server.base_url, api_key="x", model="stub"))
+        _, sample = streaming_requester(client)([{"role": "user", "content": "hello"}])
+    assert sample.prompt_tokens > 0
+    assert sample.completion_tokens > 0
+
+
+def test_failing_requests_back_off() -> None:
+    def send(messages: List[Dict[str, Any]]) -> Any:
+        raise ConnectionError("refused")
+
+    report = run_level(send, concurrency=1, duration_s=0.3)
+    assert report.requests == report.errors
+    # 0.05s doubling per failure: a handful of attempts, not a tight loop.
+    assert 1 <= report.requests <= 5
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import yaml
+from typer.testing import CliRunner
+
+from ale_lite.tbp.cli import app
+from ale_lite.tbp.runner import RunResult
+
+
+def _write_task(tasks: Path, task_id: str) -> None:
+    data = {
+        "id": task_id,
+        "description": task_id,
+        "goal": "goal",
+        "success_criteria": {"type": "command_exit_code", "command": "true"},
+    }
+    (tasks / f"{task_id}.yaml").write_text(yaml.safe_dump(data), encoding="utf-8")
+
+
+def test_tbp_resume_skips_completed_and_cleans_partial(tmp_path: Path, monkeypatch) -> None:
+    tasks = tmp_path / "tasks"
+    tasks.mkdir()
+    for task_id in ("a", "b"):
+        _write_task(tasks, task_id)
+    config = tmp_path / "config.yaml"
+    config.write_text(yaml.safe_dump({"llm": {"model": "m1", "api_key": "k"}}), encoding="utf-8")
+    out = tmp_path / "runs"
+    ran: list[str] = []
+
+    def fake_run_task(task, cfg, out_dir):
+        ran.append(task.id)
+        path = out_dir / f"{task.id}_trajectory.jsonl"
+        assert not path.exists()
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path.write_text("{}\n", encoding="utf-8")
+        return RunResult(task_id=task.id, success=True, score=1.0, trajectory_path=path)
+
+    monkeypatch.setattr("ale_lite.tbp.cli.run_task", fake_run_task)
+    runner = CliRunner()
+    args = ["run", "--tasks", str(tasks), "--config", str(config), "--out", str(out), "--resume"]
+    assert runner.invoke(app, args).exit_code == 0
+    assert ran == ["a", "b"]
+
+    # Simulate a crash mid-way through a third task.
+    _write_task(tasks, "c")
+    (out / "c_trajectory.jsonl").write_text('{"partial": true}\n', encoding="utf-8")
+    ran.clear()
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0
+    assert ran == ["c"]
+    assert "removed stale c_trajectory.jsonl" in result.output
+
+    # A config change invalidates every cached task.
+    config.write_text(yaml.safe_dump({"llm": {"model": "m2", "api_key": "k"}}), encoding="utf-8")
+    ran.clear()
+    assert runner.invoke(app, args).exit_code == 0
+    assert ran == ["a", "b", "c"]
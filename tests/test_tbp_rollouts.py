@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+import yaml
+from typer.testing import CliRunner
+
+from ale_lite.iflow.trajectory import TrajectoryWriter, load_trajectory
+from ale_lite.tbp.cli import app
+from ale_lite.tbp.runner import RunResult, rollout_configs, run_rollouts
+from ale_lite.tbp.summary import pass_at_k, summarize_results
+from ale_lite.tbp.tasks import SuccessCriteria, TaskSpec
+
+
+class FixOddRollouts:
+    def __init__(self, sandbox, trajectory: TrajectoryWriter) -> None:
+        self.sandbox = sandbox
+        self.trajectory = trajectory
+
+    def run(self, task) -> object:
+        assert self.sandbox.read_file("setup.log") == "x"
+        if self.trajectory.path.name.split("_")[0] in ("fix.rollout1", "fix.rollout3"):
+            self.sandbox.write_file("note.txt", "fixed")
+        return type(
+            "Result",
+            (),
+            {"success": True, "reason": "done", "outcome": "success", "duration_s": 0.0},
+        )
+
+
+def test_rollouts_share_setup_and_report_pass_at_k(tmp_path: Path) -> None:
+    task = TaskSpec(
+        id="fix",
+        description="fix",
+        goal="fix note",
+        setup_steps=["printf x >> setup.log", "printf broken > note.txt"],
+        success_criteria=SuccessCriteria(type="file_contains", file="note.txt", contains="fixed"),
+    )
+    config = {"llm": {"model": "m", "temperature": 0.2}, "sandbox": {"backend": "local"}}
+    configs = rollout_configs(config, 4, seed=7, temperatures=[0.2, 1.0])
+
+    results = run_rollouts(task, configs, tmp_path, concurrency=2, agent_factory=FixOddRollouts)
+    assert [result.rollout for result in results] == [0, 1, 2, 3]
+    assert [result.success for result in results] == [False, True, False, True]
+    assert results[2].trajectory_path.name == "fix.rollout2_trajectory.jsonl"
+    setup = [e for e in load_trajectory(results[2].trajectory_path) if e["type"] == "span"][0]
+    assert setup["payload"]["name"] == "run.setup"
+    assert setup["payload"]["attributes"]["rollout"] == 2
+
+    summary = summarize_results(results)
+    assert summary["pass_at_k"] == {
+        "pass@1": 0.5,
+        "pass@2": pytest.approx(5 / 6),
+        "pass@4": 1.0,
+    }
+
+
+def test_rollout_configs_vary_seed_and_temperature() -> None:
+    configs = rollout_configs(
+        {"llm": {"model": "m"}, "agent": {}}, 3, seed=10, temperatures=[0.0, 0.8]
+    )
+    assert [config["llm"]["seed"] for config in configs] == [10, 11, 12]
+    assert [config["llm"]["temperature"] for config in configs] == [0.0, 0.8, 0.0]
+    assert pass_at_k(5, 0, 3) == 0.0
+    assert pass_at_k(5, 3, 3) == 1.0
+
+
+def test_cli_rollouts_resume_per_rollout(tmp_path: Path, monkeypatch) -> None:
+    tasks = tmp_path / "tasks"
+    tasks.mkdir()
+    data = {
+        "id": "a",
+        "description": "a",
+        "goal": "goal",
+        "success_criteria": {"type": "command_exit_code", "command": "true"},
+    }
+    (tasks / "a.yaml").write_text(yaml.safe_dump(data), encoding="utf-8")
+    config = tmp_path / "config.yaml"
+    config.write_text(yaml.safe_dump({"llm": {"model": "m", "api_key": "k"}}), encoding="utf-8")
+    out = tmp_path / "runs"
+    ran: list[list[int]] = []
+
+    def fake_run_rollouts(task, configs, out_dir, indices, concurrency):
+        ran.append(list(indices))
+        results = []
+        for index in indices:
+            path = out_dir / f"{task.id}.rollout{index}_trajectory.jsonl"
+            out_dir.mkdir(parents=True, exist_ok=True)
+            path.write_text("{}\n", encoding="utf-8")
+            success = index == 0
+            results.append(RunResult(task.id, success, float(success), path, rollout=index))
+        return results
+
+    monkeypatch.setattr("ale_lite.tbp.cli.run_rollouts", fake_run_rollouts)
+    args = ["run", "--tasks", str(tasks), "--config", str(config), "--out", str(out)]
+    args += ["--rollouts", "3", "--seed", "1", "--resume"]
+    result = CliRunner().invoke(app, args)
+    assert result.exit_code == 0, result.output
+    assert ran == [[0, 1, 2]]
+    assert "a: 1/3 rollouts passed" in result.output
+    assert "pass@1=0.333 pass@2=0.667 pass@3=1.000" in result.output
+
+    (out / "a.rollout2_trajectory.jsonl").unlink()
+    result = CliRunner().invoke(app, args)
+    assert ran[-1] == [2]
+    assert "Skipped 2 completed tasks" in result.output
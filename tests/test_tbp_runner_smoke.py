@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import pytest
+
 from ale_lite.iflow.trajectory import TrajectoryWriter
 from ale_lite.rock.docker_sandbox import DockerSandbox
 from ale_lite.tbp.runner import run_task
@@ -81,3 +83,34 @@ def test_tbp_runner_uses_factory_backend(tmp_path: Path, monkeypatch) -> None:
     assert "/work" in " ".join(args)
     assert "-w" in args
     assert "/work" in args
+
+
+def test_tbp_runner_tears_down_when_agent_raises(tmp_path: Path) -> None:
+    task = TaskSpec(
+        id="crash",
+        description="crash",
+        goal="crash",
+        setup_steps=[],
+        success_criteria=SuccessCriteria(type="command_exit_code", command="true"),
+        constraints={"network": False},
+        scoring={},
+    )
+    config = {
+        "llm": {"base_url": "http://", "api_key": "x", "model": "x"},
+        "sandbox": {"backend": "local"},
+    }
+    calls: list[str] = []
+
+    class RaisingAgent:
+        def run(self, task) -> object:
+            raise RuntimeError("agent crashed")
+
+    def factory(sandbox, trajectory: TrajectoryWriter):
+        close, teardown = trajectory.close, sandbox.teardown
+        trajectory.close = lambda: (calls.append("close"), close())[1]
+        sandbox.teardown = lambda: (calls.append("teardown"), teardown())[1]
+        return RaisingAgent()
+
+    with pytest.raises(RuntimeError, match="agent crashed"):
+        run_task(task, config, tmp_path, agent_factory=factory)
+    assert calls == ["close", "teardown"]
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+import yaml
+from typer.testing import CliRunner
+
+from ale_lite.tbp.cli import app
+from ale_lite.tbp.manifest import RunManifest
+from ale_lite.tbp.runner import RunResult
+from ale_lite.tbp.schedule import (
+    SuiteEta,
+    estimate_durations,
+    format_duration,
+    load_durations,
+    order_by_estimate,
+)
+
+
+def _result(task_id: str, duration_s: float, path: Path) -> RunResult:
+    return RunResult(task_id, True, 1.0, path, duration_s=duration_s)
+
+
+def test_estimates_order_and_eta(tmp_path: Path) -> None:
+    manifest = RunManifest(tmp_path)
+    manifest.record("k", _result("a", 10.0, tmp_path / "a"))
+    manifest.record("k", _result("b", 30.0, tmp_path / "b"))
+    estimates = estimate_durations(["a", "b", "c"], load_durations([tmp_path]))
+    assert estimates == {"a": 10.0, "b": 30.0, "c": 20.0}
+    assert order_by_estimate(["a", "b", "c"], estimates, "longest") == ["b", "c", "a"]
+    assert order_by_estimate(["a", "b", "c"], estimates, "shortest") == ["a", "c", "b"]
+    assert order_by_estimate(["c", "a"], estimates, "name") == ["c", "a"]
+    with pytest.raises(ValueError):
+        order_by_estimate(["a"], estimates, "random")
+
+    eta = SuiteEta(workers=2, queued=dict(estimates))
+    assert eta.eta_s(0.0) == 30.0
+    eta.start("b", 0.0)
+    eta.finish("b", 60.0)  # twice as slow as recorded: later estimates double
+    assert eta.expected_s("c") == 40.0
+    assert eta.eta_s(60.0) == 40.0
+    assert format_duration(3725) == "1h02m"
+    assert format_duration(65) == "1m05s"
+
+
+def test_cli_orders_by_history_and_skips_over_budget(tmp_path: Path, monkeypatch) -> None:
+    tasks = tmp_path / "tasks"
+    tasks.mkdir()
+    for task_id in ("a", "b", "c"):
+        data = {
+            "id": task_id,
+            "description": task_id,
+            "goal": "goal",
+            "success_criteria": {"type": "command_exit_code", "command": "true"},
+        }
+        (tasks / f"{task_id}.yaml").write_text(yaml.safe_dump(data), encoding="utf-8")
+    config = tmp_path / "config.yaml"
+    config.write_text(yaml.safe_dump({"llm": {"model": "m", "api_key": "k"}}), encoding="utf-8")
+    history = tmp_path / "previous"
+    manifest = RunManifest(history)
+    for task_id, duration in (("a", 5.0), ("b", 50.0), ("c", 500.0)):
+        manifest.record("old", _result(task_id, duration, history / task_id))
+    ran: list[str] = []
+
+    def fake_run_task(task, cfg, out_dir):
+        ran.append(task.id)
+        return _result(task.id, 0.01, out_dir / f"{task.id}_trajectory.jsonl")
+
+    monkeypatch.setattr("ale_lite.tbp.cli.run_task", fake_run_task)
+    args = ["run", "--tasks", str(tasks), "--config", str(config), "--out", str(tmp_path / "o1")]
+    args += ["--history", str(history), "--order", "longest", "--budget-s", "100"]
+    result = CliRunner().invoke(app, args)
+    assert result.exit_code == 0, result.output
+    # c is tried first, before any finished task could calibrate its estimate down.
+    assert ran == ["b", "a"]
+    assert "c: skipped, needs ~8m20s" in result.output
+    assert "Skipped 1 tasks over the wall-clock budget" in result.output
+    assert "[2/3] eta" in result.output
+
+    ran.clear()
+    args = ["run", "--tasks", str(tasks), "--config", str(config), "--out", str(tmp_path / "o2")]
+    args += ["--history", str(history), "--order", "shortest", "--workers", "2"]
+    assert CliRunner().invoke(app, args).exit_code == 0
+    assert sorted(ran) == ["a", "b", "c"] and ran[0] in ("a", "b")
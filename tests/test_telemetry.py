@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from ale_lite.api.openai_client import OpenAIConfig
+from ale_lite.iflow.agent import Agent, AgentConfig
+from ale_lite.iflow.prompts import TaskSpec
+from ale_lite.iflow.telemetry import JsonSnapshotExporter, MetricsRegistry, span
+from ale_lite.iflow.trajectory import TrajectoryWriter, load_trajectory
+from ale_lite.rock.local_sandbox import LocalSandbox
+from ale_lite.rock.sandbox import SandboxConfig
+
+
+class UsageClient:
+    def __init__(self) -> None:
+        self.config = OpenAIConfig(base_url="http://", api_key="x", model="x")
+
+    def chat(self, messages, tools=None, tool_choice=None, max_retries=3):
+        return {
+            "content": "SUCCESS",
+            "tool_calls": [],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15},
+        }
+
+
+def test_agent_records_spans_and_usage(tmp_path: Path) -> None:
+    sandbox = LocalSandbox(SandboxConfig())
+    sandbox.create_workspace()
+    path = tmp_path / "t_trajectory.jsonl"
+    Agent(UsageClient(), sandbox, TrajectoryWriter(path), AgentConfig()).run(
+        TaskSpec(goal="g", evaluation="e")
+    )
+    sandbox.teardown()
+    spans = [event["payload"] for event in load_trajectory(path) if event["type"] == "span"]
+    assert [item["name"] for item in spans] == ["agent.context", "agent.llm"]
+    assert spans[1]["attributes"]["prompt_tokens"] == 12
+    assert spans[1]["attributes"]["completion_tokens"] == 3
+
+
+def test_registry_exports_prometheus_and_json(tmp_path: Path) -> None:
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.observe("latency_seconds", 0.05, span="x")
+    registry.observe("latency_seconds", 0.5, span="x")
+    registry.inc("tokens_total", 7, kind="prompt")
+    with span(None, "timed", registry=registry):
+        pass
+    text = registry.to_prometheus()
+    assert 'latency_seconds_bucket{span="x",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{span="x",le="+Inf"} 2' in text
+    assert 'tokens_total{kind="prompt"} 7.0' in text
+    assert 'ale_lite_span_seconds_count{span="timed"} 1' in text
+
+    registry.inc("quoted_total", 1, model='say "hi"\\now\nthen')
+    assert 'quoted_total{model="say \\"hi\\"\\\\now\\nthen"} 1.0' in registry.to_prometheus()
+
+    out = tmp_path / "metrics.json"
+    JsonSnapshotExporter(out, registry=registry).write()
+    snapshot = json.loads(out.read_text(encoding="utf-8"))
+    assert snapshot["histograms"]["latency_seconds"][0]["count"] == 2
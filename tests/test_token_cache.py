@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ale_lite.roll.token_cache import (  # noqa: E402
+    build_token_cache,
+    find_token_cache,
+    tokenizer_fingerprint,
+)
+
+
+class WhitespaceTokenizer:
+    """Minimal callable with the batch-encoding interface of Hugging Face tokenizers."""
+
+    def __init__(self, vocab: dict[str, int]) -> None:
+        self.vocab = vocab
+        self.special_tokens_map = {"eos_token": "<eos>"}
+
+    def get_vocab(self) -> dict[str, int]:
+        return dict(self.vocab)
+
+    def __call__(self, texts: list[str], add_special_tokens: bool = True) -> dict[str, Any]:
+        return {"input_ids": [[self.vocab.get(w, 0) for w in text.split()] for text in texts]}
+
+
+def _write_dataset(path: Path, rows: list[tuple[str, str, str]]) -> None:
+    path.write_text(
+        "".join(json.dumps({"prompt": p, "chosen": c, "rejected": r}) + "\n" for p, c, r in rows),
+        encoding="utf-8",
+    )
+
+
+def test_token_cache_round_trip_and_reuse(tmp_path: Path) -> None:
+    tokenizer = WhitespaceTokenizer({"fix": 1, "the": 2, "bug": 3, "skip": 4, "task": 5})
+    dataset = tmp_path / "dpo.jsonl"
+    _write_dataset(dataset, [("task", "fix the bug", "skip"), ("task task", "", "the bug")])
+    cache_root = tmp_path / "cache"
+
+    assert find_token_cache(cache_root, dataset, tokenizer) is None
+    cache = build_token_cache(dataset, tokenizer, cache_root, batch_size=1)
+    assert len(cache) == 2
+    assert cache[0]["chosen"].tolist() == [1, 2, 3]
+    assert cache[1]["chosen"].tolist() == []
+    assert cache.ids("prompt", 1).tolist() == [5, 5]
+    assert cache.lengths("rejected").tolist() == [1, 2]
+    assert isinstance(cache.ids("prompt", 0).base, np.memmap)
+    assert cache.meta.num_tokens == 9
+
+    reused = find_token_cache(cache_root, dataset, tokenizer)
+    assert reused is not None and reused.directory == cache.directory
+
+    _write_dataset(dataset, [("task", "fix", "skip")])
+    assert find_token_cache(cache_root, dataset, tokenizer) is None
+
+
+def test_tokenizer_fingerprint_tracks_vocab() -> None:
+    a = WhitespaceTokenizer({"a": 1})
+    assert tokenizer_fingerprint(a) == tokenizer_fingerprint(WhitespaceTokenizer({"a": 1}))
+    assert tokenizer_fingerprint(a) != tokenizer_fingerprint(WhitespaceTokenizer({"a": 2}))
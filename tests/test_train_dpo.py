@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from ale_lite.roll.token_cache import build_token_cache
+from ale_lite.roll.train_dpo import (
+    TRUNCATION_MODES,
+    TrainConfig,
+    _mark_ref_precomputed,
+    _pretokenized_arrow,
+    _supported_kwargs,
+    _train_from_token_cache,
+    _truncated_rows,
+    load_train_config,
+    train_dpo,
+    truncate_completion,
+    truncate_prompt,
+    truncated_lengths,
+)
+
+
+def test_load_train_config_batching_options(tmp_path: Path) -> None:
+    path = tmp_path / "train.yaml"
+    path.write_text(
+        "model_name_or_path: m\n"
+        "dataset_path: d.jsonl\n"
+        "output_dir: out\n"
+        "batch_size: 8\n"
+        "gradient_accumulation_steps: 4\n"
+        "max_prompt_length: 512\n"
+        "max_length: 1024\n"
+        "group_by_length: true\n",
+        encoding="utf-8",
+    )
+    config = load_train_config(path)
+    assert (config.batch_size, config.gradient_accumulation_steps) == (8, 4)
+    assert (config.max_prompt_length, config.max_completion_length, config.max_length) == (
+        512,
+        None,
+        1024,
+    )
+    assert config.group_by_length and not config.padding_free
+
+    path.write_text(path.read_text() + "truncation_mode: middle\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_train_config(path)
+
+
+def test_truncated_lengths() -> None:
+    config = TrainConfig("m", "d", "o", max_prompt_length=8, max_completion_length=6, max_length=12)
+    assert truncated_lengths(config, 20, 10, 3) == (6, 6, 3)
+    assert truncated_lengths(config, 4, 2, 3) == (4, 2, 3)
+    assert truncated_lengths(TrainConfig("m", "d", "o"), 20, 10, 3) == (20, 10, 3)
+
+
+def test_truncated_rows_match_scalar_truncation() -> None:
+    np = pytest.importorskip("numpy")
+    rows = [[1, 2, 3, 4, 5], [], [6], [7, 8, 9]]
+    tokens = np.asarray([token for row in rows for token in row], dtype="<i4")
+    offsets = np.cumsum([0] + [len(row) for row in rows])
+    for mode in TRUNCATION_MODES:
+        for limit in (None, 0, 2, 10):
+            config = TrainConfig(
+                "m",
+                "d",
+                "o",
+                max_prompt_length=limit,
+                max_completion_length=limit,
+                truncation_mode=mode,
+            )
+            values, new_offsets = _truncated_rows(np, tokens, offsets, limit, True, None)
+            assert [
+                values[new_offsets[i] : new_offsets[i + 1]].tolist() for i in range(len(rows))
+            ] == [truncate_prompt(config, row) for row in rows]
+            values, new_offsets = _truncated_rows(np, tokens[5:], offsets[1:], limit, False, 0)
+            assert [
+                values[new_offsets[i] : new_offsets[i + 1]].tolist() for i in range(len(rows) - 1)
+            ] == [truncate_completion(config, row, 0) for row in rows[1:]]
+
+
+def test_prompt_truncation_keeps_the_end_in_every_mode() -> None:
+    for mode in TRUNCATION_MODES:
+        config = TrainConfig("m", "d", "o", max_prompt_length=2, truncation_mode=mode)
+        assert truncate_prompt(config, [1, 2, 3, 4]) == [3, 4]
+
+
+def test_mark_ref_precomputed_checks_trl_version() -> None:
+    class Trainer:
+        _precomputed_train_ref_log_probs = False
+
+    trainer = Trainer()
+    _mark_ref_precomputed(trainer, "0.19.1")
+    assert trainer._precomputed_train_ref_log_probs is True
+    with pytest.raises(RuntimeError, match="TRL 1.0.0"):
+        _mark_ref_precomputed(Trainer(), "1.0.0")
+    with pytest.raises(RuntimeError, match="TRL 0.19.1"):
+        _mark_ref_precomputed(object(), "0.19.1")
+
+
+def test_token_cache_is_refused_when_trl_always_tokenizes(tmp_path: Path) -> None:
+    pytest.importorskip("datasets")
+    config = TrainConfig("m", "d", str(tmp_path), token_cache_dir=str(tmp_path / "tokens"))
+    with pytest.raises(RuntimeError, match="always tokenizes"):
+        _train_from_token_cache(config, None, None, None, object)
+
+
+WORDS = ["<pad>", "<eos>", "<unk>", "fix", "the", "bug", "ignore", "it", "task"]
+
+
+def _tiny_tokenizer() -> Any:
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+
+    backend = Tokenizer(models.WordLevel({w: i for i, w in enumerate(WORDS)}, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(
+        tokenizer_object=backend, pad_token="<pad>", eos_token="<eos>", unk_token="<unk>"
+    )
+
+
+def _write_pairs(path: Path) -> Path:
+    path.write_text(
+        "".join(
+            json.dumps(
+                {
+                    "prompt": "fix " + "task " * (i + 1),
+                    "chosen": "fix the bug",
+                    "rejected": "ignore it",
+                }
+            )
+            + "\n"
+            for i in range(4)
+        ),
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_cached_rows_match_trl_tokenize_row(tmp_path: Path) -> None:
+    for module in ("pyarrow", "transformers", "trl", "tokenizers"):
+        pytest.importorskip(module)
+    import pyarrow as pa
+    from trl import DPOTrainer
+
+    if "tokenize_row" not in vars(DPOTrainer):
+        pytest.skip("installed TRL has no tokenize_row")
+    tokenizer = _tiny_tokenizer()
+    dataset = _write_pairs(tmp_path / "dpo.jsonl")
+    cache = build_token_cache(dataset, tokenizer, tmp_path / "tokens")
+    config = TrainConfig(
+        "m",
+        str(dataset),
+        "o",
+        max_prompt_length=2,
+        max_completion_length=3,
+        truncation_mode="keep_start",
+    )
+    columns = ("prompt_input_ids", "chosen_input_ids", "rejected_input_ids")
+    path = _pretokenized_arrow(cache, config, columns, tokenizer.eos_token_id, [0] * 4, {})
+    with pa.OSFile(str(path), "rb") as source:
+        rows = pa.ipc.open_stream(source).read_all().select(list(columns)).to_pylist()
+    records = [json.loads(line) for line in dataset.read_text(encoding="utf-8").splitlines()]
+    assert rows == [
+        DPOTrainer.tokenize_row(record, tokenizer, 2, 3, add_special_tokens=False)
+        for record in records
+    ]
+
+
+@pytest.mark.parametrize("use_token_cache", [False, True])
+def test_train_dpo_tiny_model_on_cpu(tmp_path: Path, use_token_cache: bool) -> None:
+    for module in ("torch", "transformers", "trl", "peft", "datasets", "accelerate", "tokenizers"):
+        pytest.importorskip(module)
+    from transformers import GPT2Config, GPT2LMHeadModel
+
+    tokenizer = _tiny_tokenizer()
+    model = GPT2LMHeadModel(
+        GPT2Config(vocab_size=len(WORDS), n_positions=32, n_embd=16, n_layer=1, n_head=2)
+    )
+    # Loaded from disk like a real checkpoint, so TRL can rebuild a reference model from it.
+    model.save_pretrained(tmp_path / "tiny")
+    tokenizer.save_pretrained(tmp_path / "tiny")
+    dataset = _write_pairs(tmp_path / "dpo.jsonl")
+    config = TrainConfig(
+        model_name_or_path=str(tmp_path / "tiny"),
+        dataset_path=str(dataset),
+        output_dir=str(tmp_path / "out"),
+        full_finetune=True,
+        batch_size=2,
+        gradient_accumulation_steps=2,
+        max_prompt_length=3,
+        max_length=6,
+        group_by_length=True,
+        use_cpu=True,
+        token_cache_dir=str(tmp_path / "tokens") if use_token_cache else None,
+    )
+    stats = train_dpo(config)
+    assert stats.samples == 4
+    assert stats.tokens > 0 and stats.tokens_per_s > 0
+    assert json.loads((tmp_path / "out" / "train_stats.json").read_text())["samples"] == 4
+    if use_token_cache:
+        (cache_dir,) = (tmp_path / "tokens").iterdir()
+        assert len(list(cache_dir.glob("dpo-*.arrow"))) == 1
+
+
+def test_unsupported_truncation_options_fail() -> None:
+    import dataclasses
+
+    @dataclasses.dataclass
+    class OldConfig:
+        output_dir: str = ""
+        max_length: int | None = None
+
+    kwargs = {"output_dir": "o", "max_length": 8, "max_prompt_length": 4, "use_cpu": False}
+    with pytest.raises(ValueError, match="max_prompt_length"):
+        _supported_kwargs(OldConfig, kwargs)
+    assert _supported_kwargs(OldConfig, {**kwargs, "max_prompt_length": None}) == {
+        "output_dir": "o",
+        "max_length": 8,
+    }
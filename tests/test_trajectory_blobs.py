@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from ale_lite.iflow.blobs import BLOB_KEY, BlobStore
+from ale_lite.iflow.replay import reexec_tools
+from ale_lite.iflow.trajectory import (
+    TrajectoryWriter,
+    convert_trajectory,
+    iter_trajectory,
+    load_trajectory,
+    tool_event,
+)
+from ale_lite.rock.local_sandbox import LocalSandbox
+from ale_lite.rock.sandbox import SandboxConfig
+from ale_lite.roll.datasets import collect_runs
+
+CONTENT = "\n".join(f"line {index}" for index in range(2000))
+
+
+def _write_rollout(path: Path) -> None:
+    writer = TrajectoryWriter(path, blob_threshold=1024)
+    arguments = {"path": "notes.txt", "content": CONTENT}
+    writer.log("tool", tool_event("filesystem.write", arguments, dict(arguments)))
+    writer.log("tool", tool_event("filesystem.read", {"path": "notes.txt"}, dict(arguments)))
+    writer.log("message", {"role": "tool", "content": "small", "tool_calls": []})
+    writer.close()
+
+
+def test_large_payloads_are_stored_once_and_resolved(tmp_path: Path) -> None:
+    runs = tmp_path / "runs"
+    _write_rollout(runs / "a_trajectory.jsonl")
+    _write_rollout(runs / "b_trajectory.jsonl")
+
+    assert len(list((runs / "blobs").rglob("*.z"))) == 1
+    assert (runs / "a_trajectory.jsonl").stat().st_size < len(CONTENT)
+    raw = list(iter_trajectory(runs / "a_trajectory.jsonl", resolve=False))
+    assert BLOB_KEY in raw[0]["payload"]["arguments"]["content"]
+    assert raw[0]["payload"]["arguments"]["path"] == "notes.txt"
+
+    events = load_trajectory(runs / "a_trajectory.jsonl")
+    assert events[1]["payload"]["result"]["content"] == CONTENT
+    collected = {item.task_id: item for item in collect_runs(runs)}
+    assert collected["b"].events[0]["payload"]["result"]["content"] == CONTENT
+
+
+def test_reexec_and_convert_resolve_references(tmp_path: Path) -> None:
+    path = tmp_path / "runs" / "a_trajectory.jsonl"
+    _write_rollout(path)
+    sandbox = LocalSandbox(SandboxConfig())
+    sandbox.create_workspace()
+    assert reexec_tools(load_trajectory(path), sandbox) == []
+
+    copy = tmp_path / "other" / "a_trajectory.jsonl"
+    convert_trajectory(path, copy)
+    assert (tmp_path / "other" / "blobs").is_dir()
+    assert load_trajectory(copy) == load_trajectory(path)
+
+    inline = tmp_path / "inline_trajectory.jsonl"
+    writer = TrajectoryWriter(inline, blob_threshold=0)
+    writer.log("tool", tool_event("filesystem.read", {"path": "x"}, {"content": CONTENT}))
+    writer.close()
+    assert not (tmp_path / "blobs").exists()
+    assert CONTENT.splitlines()[-1] in inline.read_text(encoding="utf-8")
+
+
+def test_concurrent_puts_of_one_payload(tmp_path: Path) -> None:
+    store = BlobStore(tmp_path / "blobs")
+    barrier = threading.Barrier(8)
+
+    def put(payload: str) -> str:
+        barrier.wait()
+        return store.put(payload)
+
+    for trial in range(20):
+        payload = f"{trial}:{CONTENT * 20}"
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            digests = set(pool.map(put, [payload] * 8))
+        assert len(digests) == 1
+        assert store.get(digests.pop()) == payload
+    assert sorted(path.suffix for path in (tmp_path / "blobs").rglob("*.*")) == [".z"] * 20
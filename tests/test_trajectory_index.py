@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from ale_lite.iflow.replay import replay_steps, summarize, summarize_trajectory
+from ale_lite.iflow.trajectory import (
+    TrajectoryWriter,
+    build_index,
+    load_index,
+    load_trajectory,
+    outcome_event,
+)
+
+
+def _write_episode(path: Path, block_events: int = 64) -> TrajectoryWriter:
+    writer = TrajectoryWriter(path, block_events=block_events)
+    writer.log("config", {"model": {}, "sandbox": {}, "agent": {}})
+    for step in range(3):
+        writer.log("message", {"role": "assistant", "content": f"step {step}", "tool_calls": []})
+        writer.log("tool", {"name": "terminal.exec", "arguments": {}, "result": {"exit_code": 0}})
+        writer.log("message", {"role": "tool", "content": "ok", "tool_calls": []})
+    writer.log("outcome", outcome_event(True, 1.0, "done", "success", 0.5))
+    writer.close()
+    return writer
+
+
+@pytest.mark.parametrize("name", ["a_trajectory.jsonl", "a_trajectory.jsonl.zst"])
+def test_index_summary_matches_full_scan(tmp_path: Path, name: str) -> None:
+    if name.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    path = tmp_path / name
+    _write_episode(path, block_events=4)
+    index = load_index(path)
+    assert index is not None
+    assert index.to_dict() == build_index(path).to_dict()
+    assert summarize_trajectory(path) == summarize(load_trajectory(path))
+
+    events = list(replay_steps(path, 1, 2))
+    assert [event["type"] for event in events] == ["message", "tool", "message"]
+    assert events[0]["payload"]["content"] == "step 1"
+
+
+def test_step_range_past_the_end_or_reversed_is_empty(tmp_path: Path) -> None:
+    path = tmp_path / "c_trajectory.jsonl"
+    _write_episode(path)
+    index = build_index(path)
+    end = len(index.offsets)
+    assert index.step_range(5) == (end, end)
+    assert index.step_range(5, 1) == (end, end)
+    start, stop = index.step_range(2, 1)
+    assert start == stop
+    assert list(replay_steps(path, 5, 1)) == []
+    assert list(replay_steps(path, 2, 1)) == []
+
+
+def test_stale_index_is_ignored(tmp_path: Path) -> None:
+    path = tmp_path / "b_trajectory.jsonl"
+    _write_episode(path)
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write("{}\n")
+    assert load_index(path) is None
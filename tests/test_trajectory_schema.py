@@ -2,7 +2,14 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from ale_lite.iflow.trajectory import SCHEMA_VERSION, TrajectoryWriter, load_trajectory
+import pytest
+
+from ale_lite.iflow.trajectory import (
+    SCHEMA_VERSION,
+    TrajectoryWriter,
+    convert_trajectory,
+    load_trajectory,
+)
 
 
 def test_trajectory_schema(tmp_path: Path) -> None:
@@ -12,3 +19,18 @@ def test_trajectory_schema(tmp_path: Path) -> None:
     events = load_trajectory(path)
     assert events[0]["schema_version"] == SCHEMA_VERSION
     assert events[0]["type"] == "message"
+
+
+def test_compressed_trajectory_round_trip(tmp_path: Path) -> None:
+    pytest.importorskip("zstandard")
+    path = tmp_path / "traj_trajectory.jsonl.zst"
+    writer = TrajectoryWriter(path, block_events=2)
+    for index in range(5):
+        writer.log("message", {"role": "assistant", "content": f"step {index}"})
+    writer.close()
+    events = load_trajectory(path)
+    assert [event["payload"]["content"] for event in events] == [f"step {i}" for i in range(5)]
+
+    plain = tmp_path / "plain_trajectory.jsonl"
+    assert convert_trajectory(path, plain) == 5
+    assert load_trajectory(plain) == events
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from ale_lite.api.openai_client import build_messages
+from ale_lite.iflow.context import WorkingMemory, summary_line
+
+
+def _assistant(index: int) -> dict[str, object]:
+    return {
+        "role": "assistant",
+        "content": f"step {index}",
+        "tool_calls": [
+            {"function": {"name": "terminal.exec", "arguments": f'{{"cmd": "ls {index}"}}'}}
+        ],
+    }
+
+
+def test_evicted_items_fold_into_rolling_summary() -> None:
+    memory = WorkingMemory(max_items=2, summary_max_tokens=1000)
+    for index in range(5):
+        memory.add(_assistant(index))
+
+    assert [item["content"] for item in memory.to_messages()] == ["step 3", "step 4"]
+    assert memory.evicted == 3
+    assert memory.summary.splitlines() == [summary_line(_assistant(i)) for i in range(3)]
+    assert 'terminal.exec({"cmd": "ls 0"})' in memory.summary
+
+
+def test_rolling_summary_stays_within_token_budget() -> None:
+    memory = WorkingMemory(max_items=1, summary_max_tokens=20)
+    for index in range(50):
+        memory.add({"role": "tool", "name": "terminal.exec", "content": f"output {index}"})
+
+    lines = memory.summary.splitlines()
+    assert lines[0].endswith("earlier items omitted)")
+    assert lines[-1] == "tool terminal.exec: output 48"
+    assert sum(len(line) + 1 for line in lines[1:]) <= 20 * 4
+
+
+def test_build_messages_uses_cached_summary() -> None:
+    memory = WorkingMemory(max_items=3)
+    for index in range(6):
+        memory.add({"role": "assistant", "content": f"message-{index}-" + "x" * 80})
+
+    messages = build_messages(
+        "system",
+        "user prompt",
+        memory.to_messages(),
+        max_tokens=60,
+        memory_summary=memory.summary_with,
+    )
+    summary = next(
+        m["content"] for m in messages if m["content"].startswith("Working memory summary:")
+    )
+    assert "message-0-" in summary
+    assert messages[-1]["content"].startswith("message-5-")
+
+    unbounded = build_messages(
+        "system", "user prompt", memory.to_messages(), memory_summary=memory.summary_with
+    )
+    assert unbounded[2]["content"] == f"Working memory summary:\n{memory.summary}"
+    assert len(unbounded) == 6
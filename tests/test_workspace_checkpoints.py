@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from ale_lite.api.openai_client import OpenAIConfig
+from ale_lite.iflow.agent import Agent, AgentConfig
+from ale_lite.iflow.prompts import TaskSpec
+from ale_lite.iflow.replay import reexec_tools, restore_nearest_checkpoint, tool_index_for_step
+from ale_lite.iflow.trajectory import TrajectoryWriter, load_trajectory
+from ale_lite.rock.local_sandbox import LocalSandbox
+from ale_lite.rock.sandbox import SandboxConfig
+
+
+class ScriptedClient:
+    def __init__(self, responses: list[dict[str, object]]) -> None:
+        self.config = OpenAIConfig(base_url="http://", api_key="x", model="x")
+        self.responses = list(responses)
+
+    def chat(self, messages, tools=None, tool_choice=None, max_retries=3):
+        return self.responses.pop(0)
+
+
+def _call(name: str, arguments: dict[str, object]) -> dict[str, object]:
+    return {
+        "content": "",
+        "tool_calls": [
+            {
+                "id": "1",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments)},
+            }
+        ],
+    }
+
+
+def test_replay_resumes_from_checkpoint(tmp_path: Path) -> None:
+    responses = [
+        _call("filesystem.write", {"path": "a.txt", "content": "one"}),
+        _call("filesystem.write", {"path": "b.txt", "content": "two"}),
+        _call("filesystem.read", {"path": "a.txt"}),
+        _call("terminal.exec", {"cmd": "rm b.txt && cat a.txt"}),
+        {"content": "SUCCESS", "tool_calls": []},
+    ]
+    sandbox = LocalSandbox(SandboxConfig())
+    sandbox.create_workspace()
+    sandbox.write_file("seed.txt", "setup")
+    path = tmp_path / "task_trajectory.jsonl"
+    agent = Agent(
+        ScriptedClient(responses),
+        sandbox,
+        TrajectoryWriter(path),
+        AgentConfig(checkpoint_on_mutation=True),
+    )
+    assert agent.run(TaskSpec(goal="g", evaluation="e")).success is True
+    sandbox.teardown()
+
+    events = load_trajectory(path)
+    checkpoints = [event["payload"] for event in events if event["type"] == "checkpoint"]
+    assert [item["tool_index"] for item in checkpoints] == [0, 1, 2, 4]
+    assert checkpoints[-1]["deleted"] == ["b.txt"]
+
+    replay_sandbox = LocalSandbox(SandboxConfig())
+    replay_sandbox.create_workspace()
+    start = restore_nearest_checkpoint(path, events, replay_sandbox, tool_index_for_step(events, 3))
+    assert start == 2
+    assert replay_sandbox.read_file("seed.txt") == "setup"
+    assert replay_sandbox.read_file("b.txt") == "two"
+    assert reexec_tools(events, replay_sandbox, start_tool=start) == []
+    replay_sandbox.teardown()